@@ -22,6 +22,7 @@ from typing import Iterable, Sequence, Union
 from mrmustard import math, settings
 from mrmustard.math.parameter_set import ParameterSet
 from mrmustard.math.parameters import Constant, Variable
+from mrmustard.physics import fock
 from mrmustard.utils.typing import Tensor
 from .state import State
 
@@ -143,18 +144,40 @@ class FockMeasurement(Measurement):
         raise NotImplementedError
 
     def _measure_gaussian(self, other: State) -> Union[State, float]:
-        return self._measure_fock(other)
-
-    def _measure_fock(self, other: State) -> Union[State, float]:
         r"""
-        Returns a tensor representing the post-measurement state in the unmeasured modes in the Fock basis.
-        The first `N` indices of the returned tensor correspond to the Fock measurements of the `N` modes that
-        the detector is measuring. The remaining indices correspond to the density matrix of the unmeasured modes.
-
-        Args
-            other (State): the quantum state
-        Returns
-            Tensor: a tensor representing the post-measurement state
+        Same as ``_measure_fock``, but if at most one mode of ``other`` is left unmeasured only the
+        diagonal of its density matrix in the measured modes is computed, with the compact Fock
+        strategies, rather than the whole density matrix.
+        """
+        leftover = [other.indices(m) for m in other.modes if m not in self._modes]
+        if len(leftover) > 1:
+            return self._measure_fock(other)
+        cutoffs = self._prepare_stochastic_channel(other)
+        probs = fock.wigner_to_fock_diagonal(
+            other.cov, other.means, cutoffs, leftover[0] if leftover else None
+        )
+        # the measured modes follow the two indices of the leftover mode (if any) in the order
+        # of ``other``: reorder them as in ``self.modes``
+        num_left = 2 * len(leftover)
+        measured = sorted(other.indices(m) for m in self._modes)
+        probs = math.transpose(
+            probs,
+            list(range(num_left))
+            + [num_left + measured.index(other.indices(m)) for m in self._modes],
+        )
+        for k, (_, stoch) in enumerate(zip(self._modes, self._internal_stochastic_channel)):
+            # sum_m P(meas|m)rho_mm, with the outcome moving to the end
+            probs = math.tensordot(
+                probs, stoch[: self._cutoffs[k], : probs.shape[num_left]], [[num_left], [1]]
+            )
+        if not leftover:
+            return math.real(probs)  # all modes are measured
+        return math.transpose(probs, list(range(2, probs.ndim)) + [0, 1])
+
+    def _prepare_stochastic_channel(self, other: State) -> list[int]:
+        r"""
+        Recomputes the stochastic channel for ``other`` if needed and returns the cutoffs of the
+        modes of ``other`` to represent it with.
         """
         cutoffs = []
         for mode in other.modes:
@@ -168,6 +191,20 @@ class FockMeasurement(Measurement):
             [c > settings.PNR_INTERNAL_CUTOFF for c in other.cutoffs]
         ):
             self.recompute_stochastic_channel(cutoffs)
+        return cutoffs
+
+    def _measure_fock(self, other: State) -> Union[State, float]:
+        r"""
+        Returns a tensor representing the post-measurement state in the unmeasured modes in the Fock basis.
+        The first `N` indices of the returned tensor correspond to the Fock measurements of the `N` modes that
+        the detector is measuring. The remaining indices correspond to the density matrix of the unmeasured modes.
+
+        Args
+            other (State): the quantum state
+        Returns
+            Tensor: a tensor representing the post-measurement state
+        """
+        cutoffs = self._prepare_stochastic_channel(other)
         dm = other.dm(cutoffs)
         for k, (mode, stoch) in enumerate(zip(self._modes, self._internal_stochastic_channel)):
             # move the mode indices to the end
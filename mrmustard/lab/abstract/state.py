@@ -83,6 +83,7 @@ class State:  # pylint: disable=too-many-public-methods
 
         """
         self._purity = None
+        self._is_pure = None
         self._fock_probabilities = None
         self._cutoffs = cutoffs
         self._cov = cov
@@ -94,7 +95,8 @@ class State:  # pylint: disable=too-many-public-methods
         self._norm = _norm
         if cov is not None and means is not None:
             self.is_gaussian = True
-            self.is_hilbert_vector = np.allclose(gaussian.purity(self.cov), 1.0, atol=1e-6)
+            self._purity = gaussian.purity(cov)
+            self.is_hilbert_vector = np.allclose(self._purity, 1.0, atol=1e-6)
             self.num_modes = cov.shape[-1] // 2
         elif eigenvalues is not None and symplectic is not None:
             self.is_gaussian = True
@@ -173,7 +175,9 @@ class State:  # pylint: disable=too-many-public-methods
     @property
     def is_pure(self):
         r"""Returns ``True`` if the state is pure and ``False`` otherwise."""
-        return np.isclose(self.purity, 1.0, atol=1e-6)
+        if self._is_pure is None:
+            self._is_pure = np.isclose(self.purity, 1.0, atol=1e-6)
+        return self._is_pure
 
     @property
     def means(self) -> Optional[RealVector]:
@@ -435,7 +439,7 @@ class State:  # pylint: disable=too-many-public-methods
 
         # return the probability (norm) of the state when there are no modes left
         return (
-            fock.math.abs(out_fock) ** 2
+            fock.math.abs_square(out_fock)
             if other.is_pure and self.is_pure
             else fock.math.abs(out_fock)
         )
@@ -91,7 +91,7 @@ class Circuit(Transformation):
             if opd.shape is not None and opd.shape[-1] == 1 and len(op.modes) > 1:
                 opd = opd.clone(len(op.modes), modes=op.modes)
             X = opX @ X
-            Y = opX @ Y @ opX.T + opY
+            Y = opX.conjugate(Y) + opY
             d = opX @ d + opd
         return X.to_xxpp(), Y.to_xxpp(), d.to_xxpp()
 
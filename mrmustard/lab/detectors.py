@@ -18,6 +18,8 @@ This module implements the set of detector classes that perform measurements on
 
 from typing import Iterable, List, Optional, Tuple, Union
 
+import numpy as np
+
 from mrmustard import settings
 from mrmustard.physics import fock, gaussian
 from mrmustard.utils.typing import RealMatrix, RealVector
@@ -118,15 +120,20 @@ class PNRDetector(FockMeasurement):
                 else self.dark_counts.value
             )
             for c, qe, dc in zip(cutoffs, efficiency, dark_counts):
-                dark_prior = math.poisson(max_k=settings.PNR_INTERNAL_CUTOFF, rate=dc)
+                # the prior must cover every output shift, including cutoffs above the internal one
+                max_k = max(c, settings.PNR_INTERNAL_CUTOFF)
+                dark_prior = math.poisson(max_k=max_k, rate=dc)
                 condprob = math.binomial_conditional_prob(
                     success_prob=qe, dim_in=settings.PNR_INTERNAL_CUTOFF, dim_out=c
                 )
-                self._internal_stochastic_channel.append(
-                    math.convolve_probs_1d(
-                        condprob, [dark_prior, math.eye(settings.PNR_INTERNAL_CUTOFF)[0]]
-                    )
+                # the dark counts add to the detected photons, so the channel is convolved with
+                # the dark prior along the output axis: a product with its Toeplitz matrix
+                shifts = np.subtract.outer(np.arange(c), np.arange(c))
+                toeplitz = math.gather(
+                    math.pad(dark_prior, [(0, 1)]),  # the trailing zero fills the upper triangle
+                    np.where(shifts >= 0, shifts, max_k),
                 )
+                self._internal_stochastic_channel.append(math.matmul(toeplitz, condprob))
 
 
 # pylint: disable: no-member
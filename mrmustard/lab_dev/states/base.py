@@ -910,7 +910,7 @@ class Ket(State):
         leftover_modes = self.wires.modes - operator.wires.modes
         if op_type is OperatorType.KET_LIKE:
             result = (self @ operator.dual) >> TraceOut(leftover_modes)
-            result = math.abs(result) ** 2 if not leftover_modes else result
+            result = math.abs_square(result) if not leftover_modes else result
 
         elif op_type is OperatorType.DM_LIKE:
             result = (self.adjoint @ (self @ operator.dual)) >> TraceOut(leftover_modes)
@@ -14,10 +14,16 @@
 
 """This module contains the implementation of the decorator class :class:`Autocast`."""
 
-from functools import wraps
+from functools import lru_cache, wraps
 from typing import List
 
 
+@lru_cache()
+def _dtype_name(dtype) -> str:
+    r"""Returns the name of a dtype (cached, as ``np.dtype.name`` is slow to compute)."""
+    return dtype.name
+
+
 class Autocast:
     r"""A decorator that casts all castable arguments of a method to the dtype with highest precision."""
 
@@ -27,18 +33,20 @@ class Autocast:
 
     def can_cast(self, arg):
         r"""Returns `True` if the argument can be casted."""
-        return hasattr(arg, "dtype") and arg.dtype.name not in self.no_cast
+        return hasattr(arg, "dtype") and _dtype_name(arg.dtype) not in self.no_cast
 
     def should_cast(self, arg, proposed_dtype):
         r"""Returns `True` if the `arg` can (and should) be casted to `proposed_dtype`."""
         if not self.can_cast(arg):
             return False
-        return self.dtype_order.index(proposed_dtype) > self.dtype_order.index(arg.dtype.name)
+        return self.dtype_order.index(proposed_dtype) > self.dtype_order.index(
+            _dtype_name(arg.dtype)
+        )
 
     def get_dtypes(self, *args, **kwargs) -> List:
         r"""Returns the dtypes of the arguments."""
-        args_dtypes = [arg.dtype.name for arg in args if self.can_cast(arg)]
-        kwargs_dtypes = [v.dtype.name for v in kwargs.values() if self.can_cast(v)]
+        args_dtypes = [_dtype_name(arg.dtype) for arg in args if self.can_cast(arg)]
+        kwargs_dtypes = [_dtype_name(v.dtype) for v in kwargs.values() if self.can_cast(v)]
         return args_dtypes + kwargs_dtypes
 
     # pylint: disable=unnecessary-lambda
@@ -18,7 +18,7 @@
 import importlib.util
 import sys
 from functools import lru_cache
-from itertools import product
+from math import prod as mprod
 from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
@@ -61,6 +61,12 @@ def lazy_import(module_name: str):
         return module, loader
 
 
+def _read_only(array: np.ndarray) -> np.ndarray:
+    r"""Marks an array as read-only, so that an array shared by a cache cannot be modified in place."""
+    array.flags.writeable = False
+    return array
+
+
 # lazy import for numpy
 module_name_np = "mrmustard.math.backend_numpy"
 module_np, loader_np = lazy_import(module_name_np)
@@ -102,11 +108,15 @@ class BackendManager:  # pylint: disable=too-many-public-methods, fixme
         Applies a function ``fn`` from the backend in use to the given ``args``.
         """
         try:
-            attr = getattr(self.backend, fn)
-        except AttributeError:
-            msg = f"Function ``{fn}`` not implemented for backend ``{self.backend_name}``."
-            # pylint: disable=raise-missing-from
-            raise NotImplementedError(msg)
+            attr = self._functions[fn]
+        except KeyError:
+            try:
+                attr = getattr(self.backend, fn)
+            except AttributeError:
+                msg = f"Function ``{fn}`` not implemented for backend ``{self.backend_name}``."
+                # pylint: disable=raise-missing-from
+                raise NotImplementedError(msg)
+            self._functions[fn] = attr
         return attr(*args)
 
     def _bind(self) -> None:
@@ -126,6 +136,9 @@ class BackendManager:  # pylint: disable=too-many-public-methods, fixme
         ]:
             setattr(self, name, getattr(self._backend, name))
 
+        # the functions of the backend resolved so far by ``_apply``
+        self._functions = {}
+
     def __new__(cls):
         # singleton
         try:
@@ -200,6 +213,17 @@ class BackendManager:  # pylint: disable=too-many-public-methods, fixme
         """
         return self._apply("abs", (array,))
 
+    def abs_square(self, array: Tensor) -> Tensor:
+        r"""The squared absolute value of array, in whichever form is fastest for the backend.
+
+        Args:
+            array: The array to take the squared absolute value of.
+
+        Returns:
+            The (real) squared absolute value of the given ``array``.
+        """
+        return self._apply("abs_square", (array,))
+
     def allclose(self, array1: Tensor, array2: Tensor, atol=1e-9) -> bool:
         r"""
         Whether two arrays are equal within tolerance.
@@ -325,9 +349,12 @@ class BackendManager:  # pylint: disable=too-many-public-methods, fixme
     def block_diag(self, mat1: Matrix, mat2: Matrix) -> Matrix:
         r"""Returns a block diagonal matrix from the given matrices.
 
+        Leading batch axes of the matrices are broadcast against each other and kept in
+        front of the result.
+
         Args:
-            mat1: A matrix.
-            mat2: A matrix.
+            mat1: A (batched) matrix.
+            mat2: A (batched) matrix.
 
         Returns:
             A block diagonal matrix from the given matrices.
@@ -359,6 +386,19 @@ class BackendManager:  # pylint: disable=too-many-public-methods, fixme
         """
         return self._apply("block", (blocks, axes))
 
+    def broadcast_to(self, array: Tensor, shape: Sequence[int]) -> Tensor:
+        r"""The array broadcast to the given shape, without copying its data where the backend
+        allows it (on numpy the result is a read-only view).
+
+        Args:
+            array: The array to broadcast.
+            shape: The shape to broadcast to.
+
+        Returns:
+            The broadcast array.
+        """
+        return self._apply("broadcast_to", (array, shape))
+
     def cast(self, array: Tensor, dtype=None) -> Tensor:
         r"""Casts ``array`` to ``dtype``.
 
@@ -528,6 +568,17 @@ class BackendManager:  # pylint: disable=too-many-public-methods, fixme
         """
         return self._apply("eigh", (tensor,))
 
+    def eigvalsh(self, tensor: Tensor) -> Tensor:
+        r"""The eigenvalues of a Hermitian matrix, in ascending order.
+
+        Args:
+            tensor: The Hermitian tensor to calculate the eigenvalues of.
+
+        Returns:
+            The (real) eigenvalues of ``tensor``.
+        """
+        return self._apply("eigvalsh", (tensor,))
+
     def einsum(self, string: str, *tensors) -> Tensor:
         r"""The result of the Einstein summation convention on the tensors.
 
@@ -629,6 +680,20 @@ class BackendManager:  # pylint: disable=too-many-public-methods, fixme
             ),
         )
 
+    def gather2d(self, array: Tensor, rows: Sequence[int], columns: Sequence[int]) -> Tensor:
+        r"""The block of ``array`` at the given rows (first axis) and columns (second axis),
+        gathered in a single operation.
+
+        Args:
+            array: The array to gather values from.
+            rows: The indices to gather along the first axis.
+            columns: The indices to gather along the second axis.
+
+        Returns:
+            The array of shape ``(len(rows), len(columns), *array.shape[2:])``.
+        """
+        return self._apply("gather2d", (array, rows, columns))
+
     def hermite_renormalized_batch(
         self, A: Tensor, B: Tensor, C: Tensor, shape: Tuple[int]
     ) -> Tensor:
@@ -649,6 +714,26 @@ class BackendManager:  # pylint: disable=too-many-public-methods, fixme
         """
         return self._apply("hermite_renormalized_batch", (A, B, C, shape))
 
+    def hermite_renormalized_batched(
+        self, A: Tensor, B: Tensor, C: Tensor, shape: Tuple[int]
+    ) -> Tensor:
+        r"""Renormalized multidimensional Hermite polynomials of a batch of triples
+        ``(A[k], B[k], C[k])``, with the batch dimension on the first index.
+
+        Equivalent to stacking ``hermite_renormalized(A[k], B[k], C[k], shape)`` for every
+        ``k``, but computes the whole batch in a single call where the backend allows it.
+
+        Args:
+            A: The batched A matrices.
+            B: The batched B vectors.
+            C: The batched C scalars.
+            shape: The shape of each tensor in the batch.
+
+        Returns:
+            The batched Hermite polynomials of shape ``(batch,) + shape``.
+        """
+        return self._apply("hermite_renormalized_batched", (A, B, C, shape))
+
     def hermite_renormalized_diagonal(
         self, A: Tensor, B: Tensor, C: Tensor, cutoffs: Tuple[int]
     ) -> Tensor:
@@ -1019,6 +1104,19 @@ class BackendManager:  # pylint: disable=too-many-public-methods, fixme
         """
         return self._apply("sinh", (array,))
 
+    def slogdet(self, matrix: Tensor) -> Tuple[Tensor, Tensor]:
+        r"""The sign and the log of the absolute value of the determinant of matrix.
+        Unlike ``det``, this does not overflow or underflow for large matrices.
+
+        Args:
+            matrix: The matrix to take the determinant of
+
+        Returns:
+            The sign (a phase for complex matrices) and the (real) natural logarithm
+            of the absolute value of the determinant of ``matrix``.
+        """
+        return self._apply("slogdet", (matrix,))
+
     def solve(self, matrix: Tensor, rhs: Tensor) -> Tensor:
         r"""The solution of the linear system :math:`Ax = b`.
 
@@ -1083,6 +1181,17 @@ class BackendManager:  # pylint: disable=too-many-public-methods, fixme
             axes = sorted(neg) + sorted(pos)[::-1]
         return self._apply("sum", (array, axes))
 
+    def tanh(self, array: Tensor) -> Tensor:
+        r"""The hyperbolic tangent of ``array``.
+
+        Args:
+            array: The array to take the hyperbolic tangent of
+
+        Returns:
+            The hyperbolic tangent of ``array``
+        """
+        return self._apply("tanh", (array,))
+
     def tensordot(self, a: Tensor, b: Tensor, axes: Sequence[int]) -> Tensor:
         r"""The tensordot product of ``a`` and ``b``.
 
@@ -1263,7 +1372,7 @@ class BackendManager:  # pylint: disable=too-many-public-methods, fixme
             scale_tril: lower-triangular Tensor with non-zero diagonal elements
 
         Returns:
-            tfp.distributions.MultivariateNormalTriL: instance of ``tfp.distributions.MultivariateNormalTriL``
+            A distribution with a ``sample(dtype)`` and a ``prob(x)`` method.
         """
         return self._apply("MultivariateNormalTriL", (loc, scale_tril))
 
@@ -1282,6 +1391,27 @@ class BackendManager:  # pylint: disable=too-many-public-methods, fixme
 
         return wrapper
 
+    def jit(self, func):
+        r"""
+        A decorator that compiles a function into a graph on the tensorflow backend (with
+        ``tf.function``) and leaves it unchanged on the numpy backend.
+
+        Python arguments of the decorated function (e.g. tuples of modes or settings) are
+        treated as constants, so the function is retraced for every new value they take.
+        """
+        compiled = {}
+
+        def wrapper(*args, **kwargs):
+            if self.backend_name == "numpy":
+                return func(*args, **kwargs)
+            if self.backend_name not in compiled:
+                from tensorflow import function  # pylint: disable=import-outside-toplevel
+
+                compiled[self.backend_name] = function(func)
+            return compiled[self.backend_name](*args, **kwargs)
+
+        return wrapper
+
     def DefaultEuclideanOptimizer(self):
         r"""Default optimizer for the Euclidean parameters."""
         return self._apply("DefaultEuclideanOptimizer")
@@ -1362,9 +1492,8 @@ class BackendManager:  # pylint: disable=too-many-public-methods, fixme
         r"""Apply the same 2-vector (i.e. single-mode) to a larger number of modes."""
         if vec.shape[-1] != 2:
             raise ValueError("vec must be 2-dimensional (i.e. single-mode)")
-        x, y = vec[..., -2], vec[..., -1]
-        vec = self.concat([self.tile([x], [num_modes]), self.tile([y], [num_modes])], axis=-1)
-        return vec
+        vec = self.tile(self.expand_dims(vec, axis=-1), (1, num_modes))  # shape [2,N]
+        return self.reshape(vec, [2 * num_modes])
 
     def single_mode_to_multimode_mat(self, mat: Tensor, num_modes: int):
         r"""Apply the same :math:`2\times 2` matrix (i.e. single-mode) to a larger number of modes."""
@@ -1389,7 +1518,7 @@ class BackendManager:  # pylint: disable=too-many-public-methods, fixme
         """
         I = np.identity(num_modes)
         O = np.zeros((num_modes, num_modes))
-        return np.block([[O, I], [I, O]])
+        return _read_only(np.block([[O, I], [I, O]]))
 
     @staticmethod
     @lru_cache()
@@ -1404,14 +1533,14 @@ class BackendManager:  # pylint: disable=too-many-public-methods, fixme
         """
         I = np.identity(num_modes)
         O = np.zeros((num_modes, num_modes))
-        return np.block([[I, O], [O, -I]])
+        return _read_only(np.block([[I, O], [O, -I]]))
 
     @staticmethod
     @lru_cache()
     def rotmat(num_modes: int):
         "Rotation matrix from quadratures to complex amplitudes."
         I = np.identity(num_modes)
-        return np.sqrt(0.5) * np.block([[I, 1j * I], [I, -1j * I]])
+        return _read_only(np.sqrt(0.5) * np.block([[I, 1j * I], [I, -1j * I]]))
 
     @staticmethod
     @lru_cache()
@@ -1419,7 +1548,7 @@ class BackendManager:  # pylint: disable=too-many-public-methods, fixme
         """Symplectic form."""
         I = np.identity(num_modes)
         O = np.zeros_like(I)
-        return np.block([[O, I], [-I, O]])
+        return _read_only(np.block([[O, I], [-I, O]]))
 
     def add_at_modes(
         self, old: Tensor, new: Optional[Tensor], modes: Sequence[int]
@@ -1429,10 +1558,9 @@ class BackendManager:  # pylint: disable=too-many-public-methods, fixme
             return old
         shape = getattr(old, "shape", ())
         N = (shape[-1] if shape != () else 0) // 2
-        indices = modes + [m + N for m in modes]
-        return self.update_add_tensor(
-            old, list(product(*[indices] * len(new.shape))), self.reshape(new, -1)
-        )
+        indices = np.array(modes + [m + N for m in modes], dtype=np.int32)
+        grid = np.stack(np.meshgrid(*[indices] * len(new.shape), indexing="ij"), axis=-1)
+        return self.update_add_tensor(old, grid.reshape(-1, len(new.shape)), self.reshape(new, -1))
 
     def left_matmul_at_modes(
         self, a_partial: Tensor, b_full: Tensor, modes: Sequence[int]
@@ -1495,7 +1623,8 @@ class BackendManager:  # pylint: disable=too-many-public-methods, fixme
     def all_diagonals(self, rho: Tensor, real: bool) -> Tensor:
         """Returns all the diagonals of a density matrix."""
         cutoffs = rho.shape[: rho.ndim // 2]
-        rho = self.reshape(rho, (int(np.prod(cutoffs)), int(np.prod(cutoffs))))
+        d = mprod(cutoffs)
+        rho = self.reshape(rho, (d, d))
         diag = self.diag_part(rho)
         if real:
             return self.real(self.reshape(diag, cutoffs))
@@ -1504,7 +1633,7 @@ class BackendManager:  # pylint: disable=too-many-public-methods, fixme
 
     def poisson(self, max_k: int, rate: Tensor) -> Tensor:
         """Poisson distribution up to ``max_k``."""
-        k = self.arange(max_k)
+        k = self.arange(max_k, dtype=self.float64)
         rate = self.cast(rate, k.dtype)
         return self.exp(k * self.log(rate + 1e-9) - rate - self.lgamma(k + 1.0))
 
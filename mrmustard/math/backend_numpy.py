@@ -17,11 +17,11 @@
 # pylint: disable = missing-function-docstring, missing-class-docstring, fixme
 
 
+from functools import lru_cache
 from math import lgamma as mlgamma
 from typing import List, Optional, Sequence, Tuple, Union
 
 import numpy as np
-import scipy as sp
 from scipy.linalg import expm as scipy_expm
 from scipy.linalg import sqrtm as scipy_sqrtm
 from scipy.special import xlogy as scipy_xlogy
@@ -30,7 +30,7 @@ from scipy.stats import multivariate_normal
 from ..utils.settings import settings
 from .autocast import Autocast
 from .backend_base import BackendBase
-from .lattice.strategies import binomial, vanilla, vanilla_batch
+from .lattice.strategies import binomial, vanilla, vanilla_batch, vanilla_batched
 from .lattice.strategies.compactFock.inputValidation import (
     hermite_multidimensional_1leftoverMode,
     hermite_multidimensional_diagonal,
@@ -59,6 +59,10 @@ class BackendNumpy(BackendBase):  # pragma: no cover
     def abs(self, array: np.ndarray) -> np.ndarray:
         return np.abs(array)
 
+    def abs_square(self, array: np.ndarray) -> np.ndarray:
+        # numpy's vectorized complex abs beats squaring the strided real and imaginary views
+        return np.abs(array) ** 2
+
     def allclose(self, array1: np.array, array2: np.array, atol: float) -> bool:
         array1 = self.asnumpy(array1)
         array2 = self.asnumpy(array2)
@@ -94,7 +98,7 @@ class BackendNumpy(BackendBase):  # pragma: no cover
         return np.atleast_2d(self.astensor(array, dtype))
 
     def atleast_3d(self, array: np.ndarray, dtype=None) -> np.ndarray:
-        array = self.atleast_2d(self.atleast_1d(array))
+        array = self.atleast_2d(array, dtype)
         if len(array.shape) == 2:
             array = array[None, ...]
         return array
@@ -103,12 +107,23 @@ class BackendNumpy(BackendBase):  # pragma: no cover
         rows = [self.concat(row, axis=axes[1]) for row in blocks]
         return self.concat(rows, axis=axes[0])
 
-    def block_diag(self, *blocks: List[np.ndarray]) -> np.ndarray:
-        return sp.linalg.block_diag(*blocks)
+    def block_diag(self, mat1: np.ndarray, mat2: np.ndarray) -> np.ndarray:
+        # a single preallocated output, which also covers leading batch axes (unlike scipy's)
+        mat1, mat2 = np.asarray(mat1), np.asarray(mat2)
+        n1, m1 = mat1.shape[-2:]
+        n2, m2 = mat2.shape[-2:]
+        batch = np.broadcast_shapes(mat1.shape[:-2], mat2.shape[:-2])
+        out = np.zeros(batch + (n1 + n2, m1 + m2), dtype=np.result_type(mat1, mat2))
+        out[..., :n1, :m1] = mat1
+        out[..., n1:, m1:] = mat2
+        return out
 
     def boolean_mask(self, tensor: np.ndarray, mask: np.ndarray) -> np.ndarray:
         return np.array([t for i, t in enumerate(tensor) if mask[i]])
 
+    def broadcast_to(self, array: np.ndarray, shape: Sequence[int]) -> np.ndarray:
+        return np.broadcast_to(array, shape)
+
     def cast(self, array: np.ndarray, dtype=None) -> np.ndarray:
         if dtype is None:
             return array
@@ -183,6 +198,11 @@ class BackendNumpy(BackendBase):  # pragma: no cover
 
     def einsum(self, string: str, *tensors) -> Optional[np.ndarray]:
         if type(string) is str:
+            if len(tensors) > 1:
+                # without a contraction path numpy loops over all the indices of all the operands
+                # rather than handing the pairwise contractions to BLAS
+                path = _einsum_path(string, tuple(np.shape(t) for t in tensors))
+                return np.einsum(string, *tensors, optimize=path)
             return np.einsum(string, *tensors)
         return None  # provide same functionality as numpy.einsum or upgrade to opt_einsum
 
@@ -207,6 +227,9 @@ class BackendNumpy(BackendBase):  # pragma: no cover
     def gather(self, array: np.ndarray, indices: np.ndarray, axis: int = 0) -> np.ndarray:
         return np.take(array, indices, axis=axis)
 
+    def gather2d(self, array: np.ndarray, rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        return array[np.asarray(rows)[:, None], columns]
+
     def imag(self, array: np.ndarray) -> np.ndarray:
         return np.imag(array)
 
@@ -267,7 +290,7 @@ class BackendNumpy(BackendBase):  # pragma: no cover
 
     @Autocast()
     def outer(self, array1: np.ndarray, array2: np.ndarray) -> np.ndarray:
-        return np.tensordot(array1, array2, [[], []])
+        return np.multiply.outer(array1, array2)
 
     def pad(
         self,
@@ -309,6 +332,9 @@ class BackendNumpy(BackendBase):  # pragma: no cover
     def sinh(self, array: np.ndarray) -> np.ndarray:
         return np.sinh(array)
 
+    def slogdet(self, matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return np.linalg.slogdet(matrix)
+
     def solve(self, matrix: np.ndarray, rhs: np.ndarray) -> np.ndarray:
         if len(rhs.shape) == len(matrix.shape) - 1:
             rhs = np.expand_dims(rhs, -1)
@@ -330,6 +356,9 @@ class BackendNumpy(BackendBase):  # pragma: no cover
             ret = np.sum(ret, axis=axis)
         return ret
 
+    def tanh(self, array: np.ndarray) -> np.ndarray:
+        return np.tanh(array)
+
     @Autocast()
     def tensordot(self, a: np.ndarray, b: np.ndarray, axes: List[int]) -> np.ndarray:
         return np.tensordot(a, b, axes)
@@ -359,8 +388,9 @@ class BackendNumpy(BackendBase):  # pragma: no cover
         self, tensor: np.ndarray, indices: np.ndarray, values: np.ndarray
     ) -> np.ndarray:
         indices = self.atleast_2d(indices)
-        for i, v in zip(indices, values):
-            tensor[tuple(i)] += v
+        if indices.size:
+            # unbuffered, so that repeated indices accumulate like in ``tf.tensor_scatter_nd_add``
+            np.add.at(tensor, tuple(indices.T), values)
         return tensor
 
     def zeros(self, shape: Sequence[int], dtype=np.float64) -> np.ndarray:
@@ -384,27 +414,27 @@ class BackendNumpy(BackendBase):  # pragma: no cover
             def __init__(self, probs):
                 self._probs = probs
 
-            def sample(self):
+            def sample(self, sample_shape=()):
                 idx = [i for i, _ in enumerate(probs)]
-                return np.random.choice(idx, p=probs / sum(probs))
+                return np.random.choice(idx, size=sample_shape or None, p=probs / sum(probs))
 
         return Generator(probs)
 
     def MultivariateNormalTriL(self, loc: np.ndarray, scale_tril: np.ndarray):
         class Generator:
-            def __init__(self, mean, cov):
+            def __init__(self, mean, scale_tril):
                 self._mean = mean
-                self._cov = cov
+                self._scale_tril = scale_tril
 
             def sample(self, dtype=None):  # pylint: disable=unused-argument
-                fn = np.random.default_rng().multivariate_normal
-                ret = fn(self._mean, self._cov)
-                return ret
+                # reuses the Cholesky factor, where ``multivariate_normal`` would decompose the cov
+                x = settings.rng.standard_normal(self._mean.shape[-1])
+                return self._mean + self._scale_tril @ x
 
             def prob(self, x):
-                return multivariate_normal.pdf(x, mean=self._mean, cov=self._cov)
+                cov = self._scale_tril @ np.transpose(self._scale_tril)
+                return multivariate_normal.pdf(x, mean=self._mean, cov=cov)
 
-        scale_tril = scale_tril @ np.transpose(scale_tril)
         return Generator(loc, scale_tril)
 
     @staticmethod
@@ -419,6 +449,10 @@ class BackendNumpy(BackendBase):  # pragma: no cover
     def eigh(tensor: np.ndarray) -> tuple:
         return np.linalg.eigh(tensor)
 
+    @staticmethod
+    def eigvalsh(tensor: np.ndarray) -> np.ndarray:
+        return np.linalg.eigvalsh(tensor)
+
     def sqrtm(self, tensor: np.ndarray, dtype, rtol=1e-05, atol=1e-08) -> np.ndarray:
         if np.allclose(tensor, 0, rtol=rtol, atol=atol):
             ret = self.zeros_like(tensor)
@@ -478,6 +512,14 @@ class BackendNumpy(BackendBase):  # pragma: no cover
         G = vanilla_batch(tuple(shape), A, B, C)
         return G
 
+    def hermite_renormalized_batched(
+        self, A: np.ndarray, B: np.ndarray, C: np.ndarray, shape: Tuple[int]
+    ) -> np.ndarray:
+        if settings.PRECISION_BITS_HERMITE_POLY != 128:  # julia
+            return np.array([self.hermite_renormalized(a, b, c, shape) for a, b, c in zip(A, B, C)])
+        A, B, C = (np.asarray(x, dtype=np.complex128) for x in (A, B, C))
+        return vanilla_batched(tuple(shape), A, B, C)
+
     def hermite_renormalized_binomial(
         self,
         A: np.ndarray,
@@ -626,3 +668,10 @@ class BackendNumpy(BackendBase):  # pragma: no cover
         _tensor[key] = value
 
         return _tensor
+
+
+@lru_cache()
+def _einsum_path(string: str, shapes: Tuple[Tuple[int, ...], ...]) -> list:
+    r"""The pairwise contraction path of ``np.einsum`` for operands of the given shapes."""
+    operands = [np.empty(shape) for shape in shapes]
+    return np.einsum_path(string, *operands, optimize="greedy")[0]
@@ -70,6 +70,12 @@ class BackendTensorflow(BackendBase):  # pragma: no cover
     def abs(self, array: tf.Tensor) -> tf.Tensor:
         return tf.abs(array)
 
+    def abs_square(self, array: tf.Tensor) -> tf.Tensor:
+        array = tf.convert_to_tensor(array)
+        if array.dtype.is_complex:
+            return tf.math.real(array * tf.math.conj(array))
+        return tf.math.square(array)
+
     def allclose(self, array1: np.array, array2: np.array, atol: float) -> bool:
         array1 = self.astensor(array1)
         array2 = self.astensor(array2)
@@ -96,20 +102,30 @@ class BackendTensorflow(BackendBase):  # pragma: no cover
         return tf.convert_to_tensor(array, dtype)
 
     def atleast_1d(self, array: tf.Tensor, dtype=None) -> tf.Tensor:
-        return tf.experimental.numpy.atleast_1d(self.cast(self.astensor(array), dtype))
+        # a reshape on the static rank, as tf.experimental.numpy.atleast_1d is ~8x slower
+        array = self.cast(self.astensor(array), dtype)
+        if len(array.shape) == 0:
+            array = tf.reshape(array, (1,))
+        return array
 
     def atleast_2d(self, array: tf.Tensor, dtype=None) -> tf.Tensor:
-        return tf.experimental.numpy.atleast_2d(self.cast(self.astensor(array), dtype))
+        array = self.atleast_1d(array, dtype)
+        if len(array.shape) == 1:
+            array = self.expand_dims(array, 0)
+        return array
 
     def atleast_3d(self, array: tf.Tensor, dtype=None) -> tf.Tensor:
-        array = self.atleast_2d(self.atleast_1d(self.cast(self.astensor(array), dtype)))
+        array = self.atleast_2d(array, dtype)
         if len(array.shape) == 2:
             array = self.expand_dims(array, 0)
         return array
 
     def block_diag(self, mat1: tf.Tensor, mat2: tf.Tensor) -> tf.Tensor:
-        Za = self.zeros((mat1.shape[-2], mat2.shape[-1]), dtype=mat1.dtype)
-        Zb = self.zeros((mat2.shape[-2], mat1.shape[-1]), dtype=mat1.dtype)
+        batch = tf.broadcast_static_shape(mat1.shape[:-2], mat2.shape[:-2])
+        mat1 = tf.broadcast_to(mat1, batch + mat1.shape[-2:])
+        mat2 = tf.broadcast_to(mat2, batch + mat2.shape[-2:])
+        Za = self.zeros(batch + (mat1.shape[-2], mat2.shape[-1]), dtype=mat1.dtype)
+        Zb = self.zeros(batch + (mat2.shape[-2], mat1.shape[-1]), dtype=mat1.dtype)
         return self.concat(
             [self.concat([mat1, Za], axis=-1), self.concat([Zb, mat2], axis=-1)],
             axis=-2,
@@ -122,6 +138,9 @@ class BackendTensorflow(BackendBase):  # pragma: no cover
     def boolean_mask(self, tensor: tf.Tensor, mask: tf.Tensor) -> Tensor:
         return tf.boolean_mask(tensor, mask)
 
+    def broadcast_to(self, array: tf.Tensor, shape: Sequence[int]) -> tf.Tensor:
+        return tf.broadcast_to(array, shape)
+
     def cast(self, array: tf.Tensor, dtype=None) -> tf.Tensor:
         if dtype is None:
             return array
@@ -131,7 +150,8 @@ class BackendTensorflow(BackendBase):  # pragma: no cover
         return tf.clip_by_value(array, a_min, a_max)
 
     def concat(self, values: Sequence[tf.Tensor], axis: int) -> tf.Tensor:
-        if any(tf.rank(v) == 0 for v in values):
+        # the static rank, as tf.rank would add an op per value
+        if any(tf.convert_to_tensor(v).shape.rank == 0 for v in values):
             return tf.stack(values, axis)
         return tf.concat(values, axis)
 
@@ -208,6 +228,11 @@ class BackendTensorflow(BackendBase):  # pragma: no cover
     def gather(self, array: tf.Tensor, indices: tf.Tensor, axis: int) -> tf.Tensor:
         return tf.gather(array, indices, axis=axis)
 
+    def gather2d(self, array: tf.Tensor, rows: np.ndarray, columns: np.ndarray) -> tf.Tensor:
+        # the (row, column) pairs are built with numpy so that the gather is a single op
+        grid = np.stack(np.meshgrid(rows, columns, indexing="ij"), axis=-1)
+        return tf.gather_nd(array, grid.astype(np.int32))
+
     def imag(self, array: tf.Tensor) -> tf.Tensor:
         return tf.math.imag(array)
 
@@ -275,7 +300,11 @@ class BackendTensorflow(BackendBase):  # pragma: no cover
 
     @Autocast()
     def outer(self, array1: tf.Tensor, array2: tf.Tensor) -> tf.Tensor:
-        return tf.tensordot(array1, array2, [[], []])
+        # broadcasting is several times faster than a tensordot over no axes
+        array1 = tf.convert_to_tensor(array1)
+        array2 = tf.convert_to_tensor(array2)
+        shape1 = tf.concat([tf.shape(array1), tf.ones_like(tf.shape(array2))], axis=0)
+        return tf.reshape(array1, shape1) * array2
 
     def pad(
         self,
@@ -318,6 +347,10 @@ class BackendTensorflow(BackendBase):  # pragma: no cover
     def sinh(self, array: tf.Tensor) -> tf.Tensor:
         return tf.math.sinh(array)
 
+    def slogdet(self, matrix: tf.Tensor) -> Tuple[tf.Tensor, tf.Tensor]:
+        sign, logdet = tf.linalg.slogdet(matrix)
+        return sign, tf.math.real(logdet)
+
     def solve(self, matrix: tf.Tensor, rhs: tf.Tensor) -> tf.Tensor:
         if len(rhs.shape) == len(matrix.shape) - 1:
             rhs = tf.expand_dims(rhs, -1)
@@ -333,6 +366,9 @@ class BackendTensorflow(BackendBase):  # pragma: no cover
     def sum(self, array: tf.Tensor, axes: Sequence[int] = None):
         return tf.reduce_sum(array, axes)
 
+    def tanh(self, array: tf.Tensor) -> tf.Tensor:
+        return tf.math.tanh(array)
+
     @Autocast()
     def tensordot(self, a: tf.Tensor, b: tf.Tensor, axes: List[int]) -> tf.Tensor:
         return tf.tensordot(a, b, axes)
@@ -378,7 +414,24 @@ class BackendTensorflow(BackendBase):  # pragma: no cover
         return tfp.distributions.Categorical(probs=probs, name=name)
 
     def MultivariateNormalTriL(self, loc: Tensor, scale_tril: Tensor):
-        return tfp.distributions.MultivariateNormalTriL(loc=loc, scale_tril=scale_tril)
+        # tfp.distributions.MultivariateNormalTriL takes ~10 ms to sample and to evaluate the pdf
+        class Generator:
+            def __init__(self, mean, scale_tril):
+                self._mean = mean
+                self._scale_tril = scale_tril
+
+            def sample(self, dtype=None):
+                x = tf.random.normal(tf.shape(self._mean), dtype=dtype or self._mean.dtype)
+                return self._mean + tf.linalg.matvec(self._scale_tril, x)
+
+            def prob(self, x):
+                y = tf.linalg.triangular_solve(self._scale_tril, (x - self._mean)[:, None])[:, 0]
+                norm = (2 * np.pi) ** (y.shape[-1] / 2) * tf.reduce_prod(
+                    tf.linalg.diag_part(self._scale_tril)
+                )
+                return tf.exp(-0.5 * tf.reduce_sum(y**2)) / norm
+
+        return Generator(loc, scale_tril)
 
     @staticmethod
     def eigh(tensor: tf.Tensor) -> Tensor:
@@ -388,6 +441,10 @@ class BackendTensorflow(BackendBase):  # pragma: no cover
     def eigvals(tensor: tf.Tensor) -> Tensor:
         return tf.linalg.eigvals(tensor)
 
+    @staticmethod
+    def eigvalsh(tensor: tf.Tensor) -> Tensor:
+        return tf.linalg.eigvalsh(tensor)
+
     @staticmethod
     def xlogy(x: tf.Tensor, y: tf.Tensor) -> Tensor:
         return tf.math.xlogy(x, y)
@@ -488,6 +545,14 @@ class BackendTensorflow(BackendBase):  # pragma: no cover
         G = strategies.vanilla_batch(tuple(shape), _A, _B, _C)
         return G
 
+    def hermite_renormalized_batched(
+        self, A: tf.Tensor, B: tf.Tensor, C: tf.Tensor, shape: Tuple[int]
+    ) -> tf.Tensor:
+        # one call per element of the batch, so that each one keeps its custom gradient
+        return self.astensor(
+            [self.hermite_renormalized(a, b, c, shape) for a, b, c in zip(A, B, C)]
+        )
+
     @tf.custom_gradient
     def hermite_renormalized_binomial(
         self,
@@ -591,7 +656,17 @@ class BackendTensorflow(BackendBase):  # pragma: no cover
             if precision_bits == 128:  # numba (complex128)
                 dpoly_dC, dpoly_dA, dpoly_dB = tf.numpy_function(
                     grad_hermite_multidimensional_diagonal,
-                    [A, B, C.item(), poly0, poly2, poly1010, poly1001, poly1],
+                    [
+                        A,
+                        B,
+                        C.item(),
+                        poly0,
+                        poly2,
+                        poly1010,
+                        poly1001,
+                        poly1,
+                        settings.HERMITE_GRAD_FP32,
+                    ],
                     [poly0.dtype] * 3,
                 )
             else:  # julia (higher precision than complex128)
@@ -697,7 +772,7 @@ class BackendTensorflow(BackendBase):  # pragma: no cover
             if precision_bits == 128:  # numba (complex128)
                 dpoly_dC, dpoly_dA, dpoly_dB = tf.numpy_function(
                     grad_hermite_multidimensional_1leftoverMode,
-                    [A, B, C, poly0, poly2, poly1010, poly1001, poly1],
+                    [A, B, C, poly0, poly2, poly1010, poly1001, poly1, settings.HERMITE_GRAD_FP32],
                     [poly0.dtype] * 3,
                 )
             else:  # julia (higher precision than complex128)
@@ -15,9 +15,13 @@
 """This module contains the logic for cachin tensor functions in Mr Mustard."""
 
 from functools import lru_cache, wraps
-from mrmustard.math.backend_manager import BackendManager
+from math import prod as mprod
+
 import numpy as np
 
+from mrmustard.math.backend_manager import BackendManager
+from mrmustard.utils.settings import settings
+
 math = BackendManager()
 
 
@@ -43,3 +47,44 @@ def tensor_int_cache(fn):
     wrapper.cache_clear = cached_wrapper.cache_clear
 
     return wrapper
+
+
+def triples_shape_cache(maxsize: int = 64, max_elements: int = 2**16):
+    """Decorator factory to cache functions with a batch of Bargmann triples and a shape as arguments,
+    that is, functions with signature ``func(A: Tensor, b: Tensor, c: Tensor, shape: tuple[int, ...])``
+    returning an array with ``len(c) * prod(shape)`` elements.
+
+    The triples are hashed by their content (dtype, shape and bytes), together with the ``shape``
+    and ``settings.PRECISION_BITS_HERMITE_POLY``. The cached results are read-only. Caching is
+    bypassed outside of the numpy backend (so that gradients can be tracked) and when the result
+    would have more than ``max_elements`` elements."""
+
+    def decorator(fn):
+        @lru_cache(maxsize=maxsize)
+        def cached_wrapper(hashable_triples, shape, _):
+            A, b, c = (
+                np.frombuffer(data, dtype=dtype).reshape(array_shape)
+                for dtype, array_shape, data in hashable_triples
+            )
+            result = np.asarray(fn(A, b, c, shape))
+            result.flags.writeable = False
+            return result
+
+        @wraps(fn)
+        def wrapper(A, b, c, shape):
+            shape = tuple(shape)
+            if math.backend_name != "numpy" or len(c) * mprod(shape) > max_elements:
+                return fn(A, b, c, shape)
+            hashable_triples = tuple(
+                (array.dtype.str, array.shape, array.tobytes())
+                for array in (np.ascontiguousarray(x) for x in (A, b, c))
+            )
+            return cached_wrapper(hashable_triples, shape, settings.PRECISION_BITS_HERMITE_POLY)
+
+        # copy lru_cache attributes over too
+        wrapper.cache_info = cached_wrapper.cache_info
+        wrapper.cache_clear = cached_wrapper.cache_clear
+
+        return wrapper
+
+    return decorator
@@ -20,42 +20,13 @@ from numba.cpython.unsafe.tuple import tuple_setitem
 BINOMIAL_PATHS_PYTHON = {}
 
 
-@njit
-def _binomial_subspace_basis(
-    cutoffs: tuple[int, ...],
-    weight: int,
-    mode: int,
-    basis_element: tuple[int, ...],
-    basis: typed.List[tuple[int, ...]],
-):
-    r"""Step of the recursive function to generate all indices
-    of a tensor with equal weight.
-    If cutoffs is an empty tuple, the the basis element is appended to the list.
-    Otherwise it loops over the values of the given mode, and it calls itself recursively
-    to construct the rest of the basis elements.
-
-    Arguments:
-        cutoffs (tuple[int, ...]): the cutoffs of the tensor
-        weight (int): the weight of the subspace
-        mode (int): the mode to loop over
-        basis_element (tuple[int, ...]): the current basis element to construct
-        basis (list[tuple[int, ...]]): the list of basis elements to eventually append to
-    """
-    if mode == len(cutoffs):
-        if weight == 0:  # ran out of photons to distribute
-            basis.append(basis_element)
-        return
-
-    for photons in range(cutoffs[mode]):  # could be prange?
-        if weight - photons >= 0:
-            basis_element = tuple_setitem(basis_element, mode, photons)
-            _binomial_subspace_basis(cutoffs, weight - photons, mode + 1, basis_element, basis)
-
-
 @njit
 def binomial_subspace_basis(cutoffs: tuple[int, ...], weight: int):
     r"""Returns all indices of a tensor with given weight.
 
+    The indices are generated iteratively in lexicographic order, like an odometer
+    running over all modes but the last one, which takes up the remaining photons.
+
     Arguments:
         cutoffs (tuple[int, ...]): the cutoffs of the tensor
         weight (int): the weight of the subspace
@@ -66,7 +37,29 @@ def binomial_subspace_basis(cutoffs: tuple[int, ...], weight: int):
     basis = typed.List(
         [cutoffs]
     )  # this is just so that numba can infer the type, then we remove it
-    _binomial_subspace_basis(cutoffs, weight, 0, cutoffs, basis)
+    last = len(cutoffs) - 1
+    basis_element = cutoffs
+    for mode in range(len(cutoffs)):
+        basis_element = tuple_setitem(basis_element, mode, 0)
+    remaining = weight  # photons left for the last mode
+
+    while True:
+        if remaining < cutoffs[last]:
+            basis.append(tuple_setitem(basis_element, last, remaining))
+
+        # move to the next basis element, carrying over to the previous modes if needed
+        mode = last - 1
+        while mode >= 0:
+            if remaining > 0 and basis_element[mode] + 1 < cutoffs[mode]:
+                basis_element = tuple_setitem(basis_element, mode, basis_element[mode] + 1)
+                remaining -= 1
+                break
+            remaining += basis_element[mode]
+            basis_element = tuple_setitem(basis_element, mode, 0)
+            mode -= 1
+        if mode < 0:
+            break
+
     return basis[1:]  # remove the dummy element
 
 
@@ -5,18 +5,33 @@ by applying the recursion relation in a selective manner.
 
 import numpy as np
 import numba
-from numba import njit, int64
-from numba.cpython.unsafe.tuple import tuple_setitem
+from numba import njit, int64, prange
 from mrmustard.math.lattice.strategies.compactFock.helperFunctions import (
     SQRT,
     repeat_twice,
     construct_dict_params,
+    num_offDiag_pivots,
 )
 
 
+@njit
+def flat_index(params, strides):  # pragma: no cover
+    """
+    Args:
+        params (tuple): (a,b,c,...)
+        strides (vector): number of elements between consecutive values of each element of params
+    Returns:
+        (int): the flat index of params in a C-ordered array
+    """
+    offset = 0
+    for k, val in enumerate(params):
+        offset += val * strides[k]
+    return offset
+
+
 @njit
 def use_offDiag_pivot(
-    A, B, M, cutoffs, params, d, arr0, arr2, arr1010, arr1001, arr1
+    A, B, M, cutoffs, params, d, arr0, arr2, arr1010, arr1001, arr1, strides, offset
 ):  # pragma: no cover
     """
     Apply recurrence relation for pivot of type [a+1,a,b,b,c,c,...] / [a,a,b+1,b,c,c,...] / [a,a,b,b,c+1,c,...]
@@ -27,7 +42,9 @@ def use_offDiag_pivot(
         params (tuple): (a,b,c,...)
         d (int): mode index in which the considered Fock amplitude is off diagonal
             e.g. [a,a,b+1,b,c,c,...] --> b is off diagonal --> d=1
-        arr0, arr2, arr1010, arr1001, arr1 (array, array, array, array, array): submatrices of the fock representation
+        arr0, arr2, arr1010, arr1001, arr1 (array, array, array, array, array): flattened submatrices of the fock representation
+        strides (vector): number of elements between consecutive values of each element of params
+        offset (int): flat index of params
     Returns:
         (array, array, array, array, array): updated versions of arr0, arr2, arr1010, arr1001, arr1
     """
@@ -39,24 +56,24 @@ def use_offDiag_pivot(
         G_in = np.zeros(2 * M, dtype=np.complex128)
     elif B.ndim == 2:
         G_in = np.zeros((2 * M, B.shape[1]), dtype=np.complex128)
+    size = len(arr0)  # number of Fock amplitudes in each submatrix
 
     ########## READ ##########
-    GB = arr1[(2 * d,) + params] * B
+    GB = arr1[2 * d * size + offset] * B
 
     # Array0
-    G_in[2 * d] = arr0[params]
+    G_in[2 * d] = arr0[offset]
 
     # read from Array2
     if params[d] > 0:
-        params_adapted = tuple_setitem(params, d, params[d] - 1)
-        G_in[2 * d + 1] = arr2[(d,) + params_adapted]
+        G_in[2 * d + 1] = arr2[d * size + offset - strides[d]]
 
     # read from Array11
     for i in range(d + 1, M):  # i>d
         if params[i] > 0:
-            params_adapted = tuple_setitem(params, i, params[i] - 1)
-            G_in[2 * i] = arr1001[(d, i - d - 1) + params_adapted]
-            G_in[2 * i + 1] = arr1010[(d, i - d - 1) + params_adapted]
+            read = (d * (M - 1) + i - d - 1) * size + offset - strides[i]
+            G_in[2 * i] = arr1001[read]
+            G_in[2 * i + 1] = arr1010[read]
 
     ########## WRITE ##########
     if B.ndim == 1:
@@ -65,26 +82,24 @@ def use_offDiag_pivot(
         G_in = np.multiply(np.expand_dims(K_l, 1), G_in)
 
     # Array0
-    params_adapted = tuple_setitem(params, d, params[d] + 1)
-    arr0[params_adapted] = (GB[2 * d + 1] + A[2 * d + 1] @ G_in) / K_i[2 * d + 1]
+    arr0[offset + strides[d]] = (GB[2 * d + 1] + A[2 * d + 1] @ G_in) / K_i[2 * d + 1]
 
     # Array2
     if params[d] + 2 < cutoffs[d]:
-        arr2[(d,) + params] = (GB[2 * d] + A[2 * d] @ G_in) / K_i[2 * d]
+        arr2[d * size + offset] = (GB[2 * d] + A[2 * d] @ G_in) / K_i[2 * d]
 
     # Array11
     for i in range(d + 1, M):
         if params[i] + 1 < cutoffs[i]:
-            arr1010[(d, i - d - 1) + params] = (GB[2 * i] + A[2 * i] @ G_in) / K_i[2 * i]
-            arr1001[(d, i - d - 1) + params] = (GB[2 * i + 1] + A[2 * i + 1] @ G_in) / K_i[
-                2 * i + 1
-            ]
+            write = (d * (M - 1) + i - d - 1) * size + offset
+            arr1010[write] = (GB[2 * i] + A[2 * i] @ G_in) / K_i[2 * i]
+            arr1001[write] = (GB[2 * i + 1] + A[2 * i + 1] @ G_in) / K_i[2 * i + 1]
 
     return arr0, arr2, arr1010, arr1001
 
 
 @njit
-def use_diag_pivot(A, B, M, cutoffs, params, arr0, arr1):  # pragma: no cover
+def use_diag_pivot(A, B, M, cutoffs, params, arr0, arr1, strides, offset):  # pragma: no cover
     """
     Apply recurrence relation for pivot of type [a,a,b,b,c,c...]
     Args:
@@ -92,7 +107,9 @@ def use_diag_pivot(A, B, M, cutoffs, params, arr0, arr1):  # pragma: no cover
         M (int): number of modes
         cutoffs (tuple): upper bounds for the number of photons in each mode
         params (tuple): (a,b,c,...)
-        arr0, arr1 (array, array): submatrices of the fock representation
+        arr0, arr1 (array, array): flattened submatrices of the fock representation
+        strides (vector): number of elements between consecutive values of each element of params
+        offset (int): flat index of params
     Returns:
         (array, array): updated versions of arr0, arr1
     """
@@ -103,17 +120,17 @@ def use_diag_pivot(A, B, M, cutoffs, params, arr0, arr1):  # pragma: no cover
         G_in = np.zeros(2 * M, dtype=np.complex128)
     elif B.ndim == 2:
         G_in = np.zeros((2 * M, B.shape[1]), dtype=np.complex128)
+    size = len(arr0)  # number of Fock amplitudes in each submatrix
 
     ########## READ ##########
-    GB = arr0[params] * B
+    GB = arr0[offset] * B
 
     # Array1
-    for i in range(2 * M):
-        if params[i // 2] > 0:
-            params_adapted = tuple_setitem(params, i // 2, params[i // 2] - 1)
-            G_in[i] = arr1[
-                (i + 1 - 2 * (i % 2),) + params_adapted
-            ]  # [i+1-2*(i%2) for i in range(6)] = [1,0,3,2,5,4]
+    for j in range(M):  # the bounds only depend on the mode, so check them once for both i=2j,2j+1
+        if params[j] > 0:
+            read = offset - strides[j]
+            G_in[2 * j] = arr1[(2 * j + 1) * size + read]
+            G_in[2 * j + 1] = arr1[2 * j * size + read]
 
     ########## WRITE ##########
     if B.ndim == 1:
@@ -122,22 +139,26 @@ def use_diag_pivot(A, B, M, cutoffs, params, arr0, arr1):  # pragma: no cover
         G_in = np.multiply(np.expand_dims(K_l, 1), G_in)
 
     # Array1
-    for i in range(2 * M):
-        if params[i // 2] + 1 < cutoffs[i // 2]:
-            # this prevents a few elements from being written that will never be read
-            if i != 1 or params[0] + 2 < cutoffs[0]:
-                arr1[(i,) + params] = (GB[i] + A[i] @ G_in) / K_i[i]
+    for j in range(M):
+        if params[j] + 1 < cutoffs[j]:
+            for i in range(2 * j, 2 * j + 2):
+                # this prevents a few elements from being written that will never be read
+                if i != 1 or params[0] + 2 < cutoffs[0]:
+                    arr1[i * size + offset] = (GB[i] + A[i] @ G_in) / K_i[i]
 
     return arr1
 
 
-@njit
+@njit(parallel=True)
 def fock_representation_diagonal_amps_NUMBA(
-    A, B, M, cutoffs, arr0, arr2, arr1010, arr1001, arr1, tuple_type, list_type
+    A, B, M, cutoffs, arr0, arr2, arr1010, arr1001, arr1, strides, tuple_type, list_type
 ):  # pragma: no cover
     """
     Returns the PNR probabilities of a mixed state according to algorithm 1 of:
     https://doi.org/10.22331/q-2023-08-29-1097
+
+    The submatrices are passed flattened over all their leading (i.e. non-batch) dimensions,
+    such that each Fock amplitude is addressed by a single offset rather than a multi-index.
     Args:
         A, B (array, vector): required input for recurrence relation (given by mrmustard.physics.fock.ABC)
         M (int): number of modes
@@ -148,21 +169,46 @@ def fock_representation_diagonal_amps_NUMBA(
         arr1010 (array): submatrix of the fock representation that contains Fock amplitudes of the types [a+1,a,b+1,b,c,c,...] / [a+1,a,b,b,c+1,c,...] / [a,a,b+1,b,c+1,c,...] / ...
         arr1001 (array): submatrix of the fock representation that contains Fock amplitudes of the types [a+1,a,b,b+1,c,c,...] / [a+1,a,b,b,c,c+1,...] / [a,a,b+1,b,c,c+1,...] / ...
         arr1 (array): submatrix of the fock representation that contains Fock amplitudes of the types [a+1,a,b,b,c,c...] / [a,a+1,b,b,c,c...] / [a,a,b+1,b,c,c...] / ...
+        strides (vector): number of elements between consecutive values of each element of params
         tuple_type, list_type (numba types): numba types that need to be defined outside of numba compiled functions
     Returns:
         array: the fock representation
     """
     dict_params = construct_dict_params(cutoffs, tuple_type, list_type)
     for sum_params in range(sum(cutoffs)):
-        for params in dict_params[sum_params]:
-            # diagonal pivots: aa,bb,cc,dd,...
+        level = dict_params[sum_params]
+        # Within a level, the pivots only write to the next level and read from the previous ones,
+        # except for the off-diagonal pivots which read the values of arr1 written by the
+        # diagonal pivots of the same level. So each level is computed in two parallel sweeps.
+
+        # diagonal pivots: aa,bb,cc,dd,...
+        for k in prange(len(level)):  # pylint: disable=not-an-iterable
+            params = level[np.int64(k)]
             if (cutoffs[0] == 1) or (params[0] < cutoffs[0] - 1):
-                arr1 = use_diag_pivot(A, B, M, cutoffs, params, arr0, arr1)
-            # off-diagonal pivots: d=0: (a+1)a,bb,cc,dd,... | d=1: 00,(b+1)b,cc,dd | 00,00,(c+1)c,dd | ...
-            for d in range(M):
-                if np.all(np.array(params)[:d] == 0) and (params[d] < cutoffs[d] - 1):
-                    arr0, arr2, arr1010, arr1001 = use_offDiag_pivot(
-                        A, B, M, cutoffs, params, d, arr0, arr2, arr1010, arr1001, arr1
+                use_diag_pivot(
+                    A, B, M, cutoffs, params, arr0, arr1, strides, flat_index(params, strides)
+                )
+
+        # off-diagonal pivots: d=0: (a+1)a,bb,cc,dd,... | d=1: 00,(b+1)b,cc,dd | 00,00,(c+1)c,dd | ...
+        for k in prange(len(level)):  # pylint: disable=not-an-iterable
+            params = level[np.int64(k)]
+            offset = flat_index(params, strides)
+            for d in range(num_offDiag_pivots(params)):
+                if params[d] < cutoffs[d] - 1:
+                    use_offDiag_pivot(
+                        A,
+                        B,
+                        M,
+                        cutoffs,
+                        params,
+                        d,
+                        arr0,
+                        arr2,
+                        arr1010,
+                        arr1001,
+                        arr1,
+                        strides,
+                        offset,
                     )
     return arr0, arr2, arr1010, arr1001, arr1
 
@@ -203,6 +249,20 @@ def fock_representation_diagonal_amps(A, B, G0, M, cutoffs):
             arr1001 = np.zeros((M, M - 1) + cutoffs + (batch_length,), dtype=np.complex128)
 
     arr0[(0,) * M] = G0
-    return fock_representation_diagonal_amps_NUMBA(
-        A, B, M, cutoffs, arr0, arr2, arr1010, arr1001, arr1, tuple_type, list_type
+    strides = np.array([np.prod(cutoffs[k + 1 :]) for k in range(M)], dtype=np.int64)
+    batch_shape = B.shape[1:]
+    fock_representation_diagonal_amps_NUMBA(
+        A,
+        B,
+        M,
+        cutoffs,
+        arr0.reshape((-1,) + batch_shape),
+        arr2.reshape((-1,) + batch_shape),
+        arr1010.reshape((-1,) + batch_shape),
+        arr1001.reshape((-1,) + batch_shape),
+        arr1.reshape((-1,) + batch_shape),
+        strides,
+        tuple_type,
+        list_type,
     )
+    return arr0, arr2, arr1010, arr1001, arr1
@@ -11,11 +11,15 @@ from mrmustard.math.lattice.strategies.compactFock.helperFunctions import (
     SQRT,
     repeat_twice,
     construct_dict_params,
+    num_offDiag_pivots,
+    zeros_grad_buffer,
 )
 
 
 @njit
-def calc_dA_dB(i, G_in_dA, G_in_dB, G_in, A, B, K_l, K_i, M, pivot_val, pivot_val_dA, pivot_val_dB):
+def calc_dA_dB(
+    i, G_in_dA, G_in_dB, G_in, A, B, K_l, K_i, support, pivot_val, pivot_val_dA, pivot_val_dB
+):
     """
     Calculate the derivatives of one Fock amplitude w.r.t A and B.
     Args:
@@ -23,13 +27,13 @@ def calc_dA_dB(i, G_in_dA, G_in_dB, G_in, A, B, K_l, K_i, M, pivot_val, pivot_va
         G_in, G_in_dA, G_in_dB (array, array, array): all Fock amplitudes from the 'read' group in the recurrence relation and their derivatives w.r.t. A and B
         A, B (array, vector): required input for recurrence relation (given by mrmustard.physics.fock.ABC)
         K_l, K_i (vector, vector): SQRT[pivot], SQRT[pivot + 1]
-        M (int): number of modes
+        support (vector): the indices l for which K_l[l] is nonzero (all other entries of G_in, G_in_dA and G_in_dB vanish)
         pivot_val, pivot_val_dA, pivot_val_dB (array, array, array): Fock amplitude at the position of the pivot and its derivatives w.r.t. A and B
     """
     dA = pivot_val_dA * B[i]
     dB = pivot_val_dB * B[i]
     dB[i] += pivot_val
-    for l in range(2 * M):
+    for l in support:
         dA += K_l[l] * A[i, l] * G_in_dA[l]
         dB += K_l[l] * A[i, l] * G_in_dB[l]
         dA[i, l] += G_in[l]
@@ -78,6 +82,7 @@ def use_offDiag_pivot_grad(
     pivot[2 * d] += 1
     K_l = SQRT[pivot]
     K_i = SQRT[pivot + 1]
+    support = np.nonzero(pivot)[0]  # indices of the nonzero elements of K_l and G_in
     G_in = np.zeros(2 * M, dtype=np.complex128)
     G_in_dA = np.zeros((2 * M,) + A.shape, dtype=np.complex128)
     G_in_dB = np.zeros((2 * M,) + B.shape, dtype=np.complex128)
@@ -115,13 +120,35 @@ def use_offDiag_pivot_grad(
     # Array0
     params_adapted = tuple_setitem(params, d, params[d] + 1)
     arr0_dA[params_adapted], arr0_dB[params_adapted] = calc_dA_dB(
-        2 * d + 1, G_in_dA, G_in_dB, G_in, A, B, K_l, K_i, M, pivot_val, pivot_val_dA, pivot_val_dB
+        2 * d + 1,
+        G_in_dA,
+        G_in_dB,
+        G_in,
+        A,
+        B,
+        K_l,
+        K_i,
+        support,
+        pivot_val,
+        pivot_val_dA,
+        pivot_val_dB,
     )
 
     # Array2
     if params[d] + 2 < cutoffs[d]:
         arr2_dA[d][params], arr2_dB[d][params] = calc_dA_dB(
-            2 * d, G_in_dA, G_in_dB, G_in, A, B, K_l, K_i, M, pivot_val, pivot_val_dA, pivot_val_dB
+            2 * d,
+            G_in_dA,
+            G_in_dB,
+            G_in,
+            A,
+            B,
+            K_l,
+            K_i,
+            support,
+            pivot_val,
+            pivot_val_dA,
+            pivot_val_dB,
         )
 
     # Array11
@@ -136,7 +163,7 @@ def use_offDiag_pivot_grad(
                 B,
                 K_l,
                 K_i,
-                M,
+                support,
                 pivot_val,
                 pivot_val_dA,
                 pivot_val_dB,
@@ -150,7 +177,7 @@ def use_offDiag_pivot_grad(
                 B,
                 K_l,
                 K_i,
-                M,
+                support,
                 pivot_val,
                 pivot_val_dA,
                 pivot_val_dB,
@@ -176,6 +203,7 @@ def use_diag_pivot_grad(A, B, M, cutoffs, params, arr0, arr1, arr0_dA, arr1_dA,
     pivot = repeat_twice(params)
     K_l = SQRT[pivot]
     K_i = SQRT[pivot + 1]
+    support = np.nonzero(pivot)[0]  # indices of the nonzero elements of K_l and G_in
     G_in = np.zeros(2 * M, dtype=np.complex128)
     G_in_dA = np.zeros((2 * M,) + A.shape, dtype=np.complex128)
     G_in_dB = np.zeros((2 * M,) + B.shape, dtype=np.complex128)
@@ -186,43 +214,47 @@ def use_diag_pivot_grad(A, B, M, cutoffs, params, arr0, arr1, arr0_dA, arr1_dA,
     pivot_val_dB = arr0_dB[params]
 
     # Array1
-    for i in range(2 * M):
-        if params[i // 2] > 0:
-            i_staggered = i + 1 - 2 * (i % 2)  # [i+1-2*(i%2) for i in range(6)] == [1,0,3,2,5,4]
-            params_adapted = tuple_setitem(params, i // 2, params[i // 2] - 1)
-            G_in[i] = arr1[i_staggered][params_adapted]
-            G_in_dA[i] = arr1_dA[i_staggered][params_adapted]
-            G_in_dB[i] = arr1_dB[i_staggered][params_adapted]
+    for j in range(M):  # the bounds only depend on the mode, so check them once for both i=2j,2j+1
+        if params[j] > 0:
+            params_adapted = tuple_setitem(params, j, params[j] - 1)
+            for i in range(2 * j, 2 * j + 2):
+                i_staggered = (
+                    i + 1 - 2 * (i % 2)
+                )  # [i+1-2*(i%2) for i in range(6)] == [1,0,3,2,5,4]
+                G_in[i] = arr1[i_staggered][params_adapted]
+                G_in_dA[i] = arr1_dA[i_staggered][params_adapted]
+                G_in_dB[i] = arr1_dB[i_staggered][params_adapted]
 
     ########## WRITE ##########
     G_in = np.multiply(K_l, G_in)
 
     # Array1
-    for i in range(2 * M):
-        if params[i // 2] + 1 < cutoffs[i // 2]:
-            # this if statement prevents a few elements from being written that will never be read
-            if i != 1 or params[0] + 2 < cutoffs[0]:
-                arr1_dA[i][params], arr1_dB[i][params] = calc_dA_dB(
-                    i,
-                    G_in_dA,
-                    G_in_dB,
-                    G_in,
-                    A,
-                    B,
-                    K_l,
-                    K_i,
-                    M,
-                    pivot_val,
-                    pivot_val_dA,
-                    pivot_val_dB,
-                )
+    for j in range(M):
+        if params[j] + 1 < cutoffs[j]:
+            for i in range(2 * j, 2 * j + 2):
+                # this if statement prevents a few elements from being written that will never be read
+                if i != 1 or params[0] + 2 < cutoffs[0]:
+                    arr1_dA[i][params], arr1_dB[i][params] = calc_dA_dB(
+                        i,
+                        G_in_dA,
+                        G_in_dB,
+                        G_in,
+                        A,
+                        B,
+                        K_l,
+                        K_i,
+                        support,
+                        pivot_val,
+                        pivot_val_dA,
+                        pivot_val_dB,
+                    )
 
     return arr1_dA, arr1_dB
 
 
 @njit
 def fock_representation_diagonal_grad_NUMBA(
-    A, B, M, cutoffs, arr0, arr2, arr1010, arr1001, arr1, tuple_type, list_type
+    A, B, M, cutoffs, arr0, arr2, arr1010, arr1001, arr1, tuple_type, list_type, dtype
 ):
     """
     Returns the gradients of the PNR probabilities of a mixed state according to algorithm 1 of
@@ -237,19 +269,22 @@ def fock_representation_diagonal_grad_NUMBA(
         arr1001 (array): submatrix of the fock representation that contains Fock amplitudes of the types [a+1,a,b,b+1,c,c,...] / [a+1,a,b,b,c,c+1,...] / [a,a,b+1,b,c,c+1,...] / ...
         arr1 (array): submatrix of the fock representation that contains Fock amplitudes of the types [a+1,a,b,b,c,c...] / [a,a+1,b,b,c,c...] / [a,a,b+1,b,c,c...] / ...
         tuple_type, list_type (Numba types): numba types that need to be defined outside of Numba compiled functions
+        dtype (numpy dtype): storage type of the derivatives
     Returns:
         array: the derivatives of the fock representation w.r.t. A and B
     """
-    arr0_dA = np.zeros(arr0.shape + A.shape, dtype=np.complex128)
-    arr2_dA = np.zeros(arr2.shape + A.shape, dtype=np.complex128)
-    arr1010_dA = np.zeros(arr1010.shape + A.shape, dtype=np.complex128)
-    arr1001_dA = np.zeros(arr1001.shape + A.shape, dtype=np.complex128)
-    arr1_dA = np.zeros(arr1.shape + A.shape, dtype=np.complex128)
-    arr0_dB = np.zeros(arr0.shape + B.shape, dtype=np.complex128)
-    arr2_dB = np.zeros(arr2.shape + B.shape, dtype=np.complex128)
-    arr1010_dB = np.zeros(arr1010.shape + B.shape, dtype=np.complex128)
-    arr1001_dB = np.zeros(arr1001.shape + B.shape, dtype=np.complex128)
-    arr1_dB = np.zeros(arr1.shape + B.shape, dtype=np.complex128)
+    (
+        arr0_dA,
+        arr2_dA,
+        arr1010_dA,
+        arr1001_dA,
+        arr1_dA,
+        arr0_dB,
+        arr2_dB,
+        arr1010_dB,
+        arr1001_dB,
+        arr1_dB,
+    ) = zeros_grad_buffer(arr0, arr2, arr1010, arr1001, arr1, A, B, dtype)
 
     dict_params = construct_dict_params(cutoffs, tuple_type, list_type)
     for sum_params in range(sum(cutoffs)):
@@ -260,8 +295,8 @@ def fock_representation_diagonal_grad_NUMBA(
                     A, B, M, cutoffs, params, arr0, arr1, arr0_dA, arr1_dA, arr0_dB, arr1_dB
                 )
             # off-diagonal pivots: d=0: (a+1)a,bb,cc,dd,... | d=1: 00,(b+1)b,cc,dd | 00,00,(c+1)c,dd | ...
-            for d in range(M):
-                if np.all(np.array(params)[:d] == 0) and (params[d] < cutoffs[d] - 1):
+            for d in range(num_offDiag_pivots(params)):
+                if params[d] < cutoffs[d] - 1:
                     (
                         arr0_dA,
                         arr2_dA,
@@ -297,15 +332,20 @@ def fock_representation_diagonal_grad_NUMBA(
     return arr0_dA, arr0_dB
 
 
-def fock_representation_diagonal_grad(A, B, M, arr0, arr2, arr1010, arr1001, arr1):
+def fock_representation_diagonal_grad(
+    A, B, M, arr0, arr2, arr1010, arr1001, arr1, dtype=np.complex128
+):
     """
     First initialise some Numba types (needs to be done outside of Numba compiled function)
     Then calculate the fock representation.
+    The derivatives are stored with the given ``dtype`` (the recurrence itself is always evaluated
+    in complex128) and returned as complex128.
     """
 
     cutoffs = arr0.shape
     tuple_type = numba.types.UniTuple(int64, M)
     list_type = numba.types.ListType(tuple_type)
-    return fock_representation_diagonal_grad_NUMBA(
-        A, B, M, cutoffs, arr0, arr2, arr1010, arr1001, arr1, tuple_type, list_type
+    arr0_dA, arr0_dB = fock_representation_diagonal_grad_NUMBA(
+        A, B, M, cutoffs, arr0, arr2, arr1010, arr1001, arr1, tuple_type, list_type, dtype
     )
+    return arr0_dA.astype(np.complex128, copy=False), arr0_dB.astype(np.complex128, copy=False)
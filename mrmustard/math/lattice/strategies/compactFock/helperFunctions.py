@@ -27,6 +27,25 @@ def repeat_twice(params):
     return pivot
 
 
+@njit
+def num_offDiag_pivots(params):
+    """
+    Returns the number of off-diagonal pivots that start from ``params``, i.e. the number of mode
+    indices ``d`` for which ``params[:d]`` only contains zeros. This is the index of the first
+    nonzero element of ``params`` plus one (or ``len(params)`` if all elements are zero), so that
+    the drivers can loop over ``range(num_offDiag_pivots(params))`` instead of testing
+    ``np.all(np.array(params)[:d] == 0)`` for every ``d``.
+    Args:
+        params (tuple): (a,b,c,...)
+    Returns:
+        (int): the number of off-diagonal pivots
+    """
+    for i, val in enumerate(params):
+        if val > 0:
+            return i + 1
+    return len(params)
+
+
 @njit
 def construct_dict_params(cutoffs, tuple_type, list_type):
     """
@@ -43,3 +62,53 @@ def construct_dict_params(cutoffs, tuple_type, list_type):
     for params in np.ndindex(cutoffs):
         indices[sum(params)].append(params)
     return indices
+
+
+@njit
+def zeros_grad_buffer(arr0, arr2, arr1010, arr1001, arr1, A, B, dtype):
+    """
+    Allocates the derivatives w.r.t. A and B of all submatrices of the fock representation
+    as views into a single zero-initialised buffer (one allocation and one memset instead of ten).
+    Args:
+        arr0, arr2, arr1010, arr1001, arr1 (array, array, array, array, array): submatrices of the fock representation
+        A, B (array, vector): required input for recurrence relation (given by mrmustard.physics.fock.ABC)
+        dtype (numpy dtype): storage type of the derivatives (complex128, or complex64 to halve the memory traffic)
+    Returns:
+        (array, ..., array): arr0_dA, arr2_dA, arr1010_dA, arr1001_dA, arr1_dA, arr0_dB, arr2_dB, arr1010_dB, arr1001_dB, arr1_dB
+    """
+    size = arr0.size + arr2.size + arr1010.size + arr1001.size + arr1.size
+    buffer = np.zeros(size * (A.size + B.size), dtype=dtype)
+    arr0_dA, offset = _view(buffer, 0, arr0.shape + A.shape)
+    arr2_dA, offset = _view(buffer, offset, arr2.shape + A.shape)
+    arr1010_dA, offset = _view(buffer, offset, arr1010.shape + A.shape)
+    arr1001_dA, offset = _view(buffer, offset, arr1001.shape + A.shape)
+    arr1_dA, offset = _view(buffer, offset, arr1.shape + A.shape)
+    arr0_dB, offset = _view(buffer, offset, arr0.shape + B.shape)
+    arr2_dB, offset = _view(buffer, offset, arr2.shape + B.shape)
+    arr1010_dB, offset = _view(buffer, offset, arr1010.shape + B.shape)
+    arr1001_dB, offset = _view(buffer, offset, arr1001.shape + B.shape)
+    arr1_dB, offset = _view(buffer, offset, arr1.shape + B.shape)
+    return (
+        arr0_dA,
+        arr2_dA,
+        arr1010_dA,
+        arr1001_dA,
+        arr1_dA,
+        arr0_dB,
+        arr2_dB,
+        arr1010_dB,
+        arr1001_dB,
+        arr1_dB,
+    )
+
+
+@njit
+def _view(buffer, offset, shape):
+    """
+    Returns the contiguous view of ``buffer`` of the given shape that starts at ``offset``,
+    together with the offset of the first element after it.
+    """
+    size = 1
+    for s in shape:
+        size *= s
+    return buffer[offset : offset + size].reshape(shape), offset + size
@@ -73,15 +73,19 @@ def hermite_multidimensional_diagonal(A, B, G0, cutoffs, rtol=1e-05, atol=1e-08)
     return fock_representation_diagonal_amps(A, B, G0, M, cutoffs)
 
 
-def grad_hermite_multidimensional_diagonal(A, B, G0, arr0, arr2, arr1010, arr1001, arr1):
+def grad_hermite_multidimensional_diagonal(
+    A, B, G0, arr0, arr2, arr1010, arr1001, arr1, fp32_grads=False
+):
     """
     Validation of user input for gradients of mrmustard.math.backend_tensorflow.hermite_renormalized_diagonal
+    If ``fp32_grads`` is ``True``, the intermediate derivatives are stored as complex64.
     """
     if A.shape[0] != B.shape[0]:
         raise ValueError("The matrix A and vector B have incompatible dimensions")
     M = A.shape[0] // 2
+    dtype = np.complex64 if fp32_grads else np.complex128
     arr0_dA, arr0_dB = fock_representation_diagonal_grad(
-        A, B, M, arr0, arr2, arr1010, arr1001, arr1
+        A, B, M, arr0, arr2, arr1010, arr1001, arr1, dtype
     )
     arr0_dG0 = np.array(arr0 / G0).astype(np.complex128)
     return arr0_dG0, arr0_dA, arr0_dB
@@ -106,17 +110,21 @@ def hermite_multidimensional_1leftoverMode(A, B, G0, cutoffs, rtol=1e-05, atol=1
     return fock_representation_1leftoverMode_amps(A, B, G0, M, cutoffs)
 
 
-def grad_hermite_multidimensional_1leftoverMode(A, B, G0, arr0, arr2, arr1010, arr1001, arr1):
+def grad_hermite_multidimensional_1leftoverMode(
+    A, B, G0, arr0, arr2, arr1010, arr1001, arr1, fp32_grads=False
+):
     """
     Validation of user input for gradients of mrmustard.math.backend_tensorflow.hermite_renormalized_1leftoverMode
+    If ``fp32_grads`` is ``True``, the intermediate derivatives are stored as complex64.
     """
     if A.shape[0] != B.shape[0]:
         raise ValueError("The matrix A and vector B have incompatible dimensions")
     M = A.shape[0] // 2
     if M <= 1:
         raise ValueError("The number of modes should be greater than 1.")
+    dtype = np.complex64 if fp32_grads else np.complex128
     arr0_dA, arr0_dB = fock_representation_1leftoverMode_grad(
-        A, B, M, arr0, arr2, arr1010, arr1001, arr1
+        A, B, M, arr0, arr2, arr1010, arr1001, arr1, dtype
     )
     arr0_dG0 = np.array(arr0 / G0).astype(np.complex128)
     return arr0_dG0, arr0_dA, arr0_dB
@@ -11,6 +11,7 @@ from numba.cpython.unsafe.tuple import tuple_setitem
 from mrmustard.math.lattice.strategies.compactFock.helperFunctions import (
     SQRT,
     construct_dict_params,
+    num_offDiag_pivots,
     repeat_twice,
 )
 
@@ -186,12 +187,13 @@ def use_diag_pivot(A, B, M, cutoff_leftoverMode, cutoffs_tail, params, arr0, arr
             GB[m, n] = arr0[(m, n) + read_GB] * B
 
     # Array1
-    for i in range(2 * M):
-        if params[i // 2] > 0:
-            params_adapted = tuple_setitem(params, i // 2, params[i // 2] - 1)
-            G_in = read_block(
-                G_in, i, arr1, (i + 1 - 2 * (i % 2),) + params_adapted, cutoff_leftoverMode
-            )  # [i+1-2*(i%2) for i in range(6)] == [1,0,3,2,5,4]
+    for j in range(M):  # the bounds only depend on the mode, so check them once for both i=2j,2j+1
+        if params[j] > 0:
+            params_adapted = tuple_setitem(params, j, params[j] - 1)
+            for i in range(2 * j, 2 * j + 2):
+                G_in = read_block(
+                    G_in, i, arr1, (i + 1 - 2 * (i % 2),) + params_adapted, cutoff_leftoverMode
+                )  # [i+1-2*(i%2) for i in range(6)] == [1,0,3,2,5,4]
 
     ########## WRITE ##########
     for m in range(cutoff_leftoverMode):
@@ -199,14 +201,15 @@ def use_diag_pivot(A, B, M, cutoff_leftoverMode, cutoffs_tail, params, arr0, arr
             G_in[m, n] = np.multiply(K_l, G_in[m, n])
 
     # Array1
-    for i in range(2 * M):
-        if params[i // 2] + 1 < cutoffs_tail[i // 2]:
-            # this if statement prevents a few elements from being written that will never be read
-            if i != 1 or params[0] + 2 < cutoffs_tail[0]:
-                write = (i,) + params
-                arr1 = write_block(
-                    i + 2, arr1, write, arr0, read_GB, G_in, GB, A, K_i, cutoff_leftoverMode
-                )
+    for j in range(M):
+        if params[j] + 1 < cutoffs_tail[j]:
+            for i in range(2 * j, 2 * j + 2):
+                # this if statement prevents a few elements from being written that will never be read
+                if i != 1 or params[0] + 2 < cutoffs_tail[0]:
+                    write = (i,) + params
+                    arr1 = write_block(
+                        i + 2, arr1, write, arr0, read_GB, G_in, GB, A, K_i, cutoff_leftoverMode
+                    )
 
     return arr1
 
@@ -267,8 +270,8 @@ def fock_representation_1leftoverMode_amps_NUMBA(
                     A, B, M - 1, cutoff_leftoverMode, cutoffs_tail, params, arr0, arr1
                 )
             # off-diagonal pivots: d=0: (a+1)a,bb,cc,dd,... | d=1: 00,(b+1)b,cc,dd | 00,00,(c+1)c,dd | ...
-            for d in range(M - 1):
-                if np.all(np.array(params)[:d] == 0) and (params[d] < cutoffs_tail[d] - 1):
+            for d in range(num_offDiag_pivots(params)):
+                if params[d] < cutoffs_tail[d] - 1:
                     arr0, arr2, arr1010, arr1001 = use_offDiag_pivot(
                         A,
                         B,
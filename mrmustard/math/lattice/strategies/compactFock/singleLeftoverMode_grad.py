@@ -11,6 +11,8 @@ from mrmustard.math.lattice.strategies.compactFock.helperFunctions import (
     SQRT,
     repeat_twice,
     construct_dict_params,
+    num_offDiag_pivots,
+    zeros_grad_buffer,
 )
 
 
@@ -34,11 +36,14 @@ def calc_dA_dB(
 ):
     """
     Apply the derivated recurrence relation.
+    Terms for which K_l_adapted vanishes are skipped, as the corresponding entries of G_in_adapted vanish as well.
     """
     dA = arr_read_pivot_dA[(m, n) + read_GB] * B[i]
     dB = arr_read_pivot_dB[(m, n) + read_GB] * B[i]
     dB[i] += arr_read_pivot[(m, n) + read_GB]
     for l_prime, l in enumerate(l_range):
+        if K_l_adapted[l_prime] == 0:
+            continue
         dA += K_l_adapted[l_prime] * A_adapted[l_prime] * G_in_dA_adapted[l_prime]
         dB += K_l_adapted[l_prime] * A_adapted[l_prime] * G_in_dB_adapted[l_prime]
         dA[i, l] += G_in_adapted[l_prime]
@@ -523,23 +528,24 @@ def use_diag_pivot_grad(
             GB[m, n] = arr0[(m, n) + read_GB] * B
 
     # Array1
-    for i in range(2 * M):
-        if params[i // 2] > 0:
-            params_adapted = tuple_setitem(params, i // 2, params[i // 2] - 1)
-            read = (
-                i + 1 - 2 * (i % 2),
-            ) + params_adapted  # [i+1-2*(i%2) for i in range(6)] == [1,0,3,2,5,4]
-            G_in, G_in_dA, G_in_dB = read_block(
-                G_in,
-                G_in_dA,
-                G_in_dB,
-                i,
-                arr1,
-                arr1_dA,
-                arr1_dB,
-                read,
-                cutoff_leftoverMode,
-            )
+    for j in range(M):  # the bounds only depend on the mode, so check them once for both i=2j,2j+1
+        if params[j] > 0:
+            params_adapted = tuple_setitem(params, j, params[j] - 1)
+            for i in range(2 * j, 2 * j + 2):
+                read = (
+                    i + 1 - 2 * (i % 2),
+                ) + params_adapted  # [i+1-2*(i%2) for i in range(6)] == [1,0,3,2,5,4]
+                G_in, G_in_dA, G_in_dB = read_block(
+                    G_in,
+                    G_in_dA,
+                    G_in_dB,
+                    i,
+                    arr1,
+                    arr1_dA,
+                    arr1_dB,
+                    read,
+                    cutoff_leftoverMode,
+                )
 
     ########## WRITE ##########
     for m in range(cutoff_leftoverMode):
@@ -547,29 +553,30 @@ def use_diag_pivot_grad(
             G_in[m, n] = np.multiply(K_l, G_in[m, n])
 
     # Array1
-    for i in range(2 * M):
-        if params[i // 2] + 1 < cutoffs_tail[i // 2]:
-            # this prevents a few elements from being written that will never be read
-            if i != 1 or params[0] + 2 < cutoffs_tail[0]:
-                write = (i,) + params
-                arr1_dA, arr1_dB = write_block_grad(
-                    i + 2,
-                    write,
-                    arr0,
-                    read_GB,
-                    G_in,
-                    A,
-                    B,
-                    K_i,
-                    K_l,
-                    cutoff_leftoverMode,
-                    arr1_dA,
-                    arr0_dA,
-                    G_in_dA,
-                    arr1_dB,
-                    arr0_dB,
-                    G_in_dB,
-                )
+    for j in range(M):
+        if params[j] + 1 < cutoffs_tail[j]:
+            for i in range(2 * j, 2 * j + 2):
+                # this prevents a few elements from being written that will never be read
+                if i != 1 or params[0] + 2 < cutoffs_tail[0]:
+                    write = (i,) + params
+                    arr1_dA, arr1_dB = write_block_grad(
+                        i + 2,
+                        write,
+                        arr0,
+                        read_GB,
+                        G_in,
+                        A,
+                        B,
+                        K_i,
+                        K_l,
+                        cutoff_leftoverMode,
+                        arr1_dA,
+                        arr0_dA,
+                        G_in_dA,
+                        arr1_dB,
+                        arr0_dB,
+                        G_in_dB,
+                    )
 
     return arr1_dA, arr1_dB
 
@@ -589,6 +596,7 @@ def fock_representation_1leftoverMode_grad_NUMBA(
     tuple_type,
     list_type,
     zero_tuple,
+    dtype,
 ):
     """
     Returns the gradients of the density matrices in the upper, undetected mode of a circuit when all other modes
@@ -603,19 +611,22 @@ def fock_representation_1leftoverMode_grad_NUMBA(
         arr1001 (array): submatrix of the fock representation that contains Fock amplitudes of the types [a+1,a,b,b+1,c,c,...] / [a+1,a,b,b,c,c+1,...] / [a,a,b+1,b,c,c+1,...] / ...
         arr1 (array): submatrix of the fock representation that contains Fock amplitudes of the types [a+1,a,b,b,c,c...] / [a,a+1,b,b,c,c...] / [a,a,b+1,b,c,c...] / ...
         tuple_type, list_type (numba types): numba types that need to be defined outside of numba compiled functions
+        dtype (numpy dtype): storage type of the derivatives
     Returns:
         Tensor: the fock representation
     """
-    arr0_dA = np.zeros(arr0.shape + A.shape, dtype=np.complex128)
-    arr2_dA = np.zeros(arr2.shape + A.shape, dtype=np.complex128)
-    arr1010_dA = np.zeros(arr1010.shape + A.shape, dtype=np.complex128)
-    arr1001_dA = np.zeros(arr1001.shape + A.shape, dtype=np.complex128)
-    arr1_dA = np.zeros(arr1.shape + A.shape, dtype=np.complex128)
-    arr0_dB = np.zeros(arr0.shape + B.shape, dtype=np.complex128)
-    arr2_dB = np.zeros(arr2.shape + B.shape, dtype=np.complex128)
-    arr1010_dB = np.zeros(arr1010.shape + B.shape, dtype=np.complex128)
-    arr1001_dB = np.zeros(arr1001.shape + B.shape, dtype=np.complex128)
-    arr1_dB = np.zeros(arr1.shape + B.shape, dtype=np.complex128)
+    (
+        arr0_dA,
+        arr2_dA,
+        arr1010_dA,
+        arr1001_dA,
+        arr1_dA,
+        arr0_dB,
+        arr2_dB,
+        arr1010_dB,
+        arr1001_dB,
+        arr1_dB,
+    ) = zeros_grad_buffer(arr0, arr2, arr1010, arr1001, arr1, A, B, dtype)
 
     # fill first mode for all PNR detections equal to zero
     for m in range(cutoff_leftoverMode - 1):
@@ -672,8 +683,8 @@ def fock_representation_1leftoverMode_grad_NUMBA(
                     arr1_dB,
                 )
             # off-diagonal pivots: d=0: (a+1)a,bb,cc,dd,... | d=1: 00,(b+1)b,cc,dd | 00,00,(c+1)c,dd | ...
-            for d in range(M - 1):
-                if np.all(np.array(params)[:d] == 0) and (params[d] < cutoffs_tail[d] - 1):
+            for d in range(num_offDiag_pivots(params)):
+                if params[d] < cutoffs_tail[d] - 1:
                     (
                         arr0_dA,
                         arr2_dA,
@@ -710,12 +721,16 @@ def fock_representation_1leftoverMode_grad_NUMBA(
     return arr0_dA, arr0_dB
 
 
-def fock_representation_1leftoverMode_grad(A, B, M, arr0, arr2, arr1010, arr1001, arr1):
+def fock_representation_1leftoverMode_grad(
+    A, B, M, arr0, arr2, arr1010, arr1001, arr1, dtype=np.complex128
+):
     """
     First initialise the submatrices of G (of which the shape depends on cutoff and M)
     and some other constants
     (These initialisations currently cannot be done using Numba.)
     Then calculate the fock representation.
+    The derivatives are stored with the given ``dtype`` (the recurrence itself is always evaluated
+    in complex128) and returned as complex128.
     """
 
     cutoffs = tuple(arr0.shape[1:])
@@ -725,7 +740,7 @@ def fock_representation_1leftoverMode_grad(A, B, M, arr0, arr2, arr1010, arr1001
     list_type = numba.types.ListType(tuple_type)
     zero_tuple = (0,) * (M - 1)
 
-    return fock_representation_1leftoverMode_grad_NUMBA(
+    arr0_dA, arr0_dB = fock_representation_1leftoverMode_grad_NUMBA(
         A,
         B,
         M,
@@ -739,4 +754,6 @@ def fock_representation_1leftoverMode_grad(A, B, M, arr0, arr2, arr1010, arr1001
         tuple_type,
         list_type,
         zero_tuple,
+        dtype,
     )
+    return arr0_dA.astype(np.complex128, copy=False), arr0_dB.astype(np.complex128, copy=False)
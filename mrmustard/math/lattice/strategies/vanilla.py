@@ -13,13 +13,20 @@
 # limitations under the License.
 
 import numpy as np
-from numba import njit
+from numba import njit, prange
 
 from mrmustard.math.lattice import paths, steps
 from mrmustard.utils.typing import ComplexMatrix, ComplexTensor, ComplexVector
 from .flat_indices import first_available_pivot, lower_neighbors, shape_to_strides
 
-__all__ = ["vanilla", "vanilla_batch", "vanilla_jacobian", "vanilla_vjp"]
+__all__ = [
+    "vanilla",
+    "vanilla_batch",
+    "vanilla_batched",
+    "vanilla_diagonal_batched",
+    "vanilla_jacobian",
+    "vanilla_vjp",
+]
 
 
 @njit
@@ -108,6 +115,64 @@ def vanilla_batch(shape: tuple[int, ...], A, b, c) -> ComplexTensor:  # pragma:
     return G
 
 
+@njit(parallel=True)
+def vanilla_batched(shape: tuple[int, ...], A, b, c) -> ComplexTensor:  # pragma: no cover
+    r"""Vanilla Fock-Bargmann strategy for a batch of triples ``(A[k], b[k], c[k])``, with
+    batch dimension on the first index.
+
+    Runs the vanilla strategy for every element of the batch in a single compiled call,
+    distributing the batch over the available threads.
+
+    Args:
+        shape (tuple[int, ...]): shape of the output tensor of each element of the batch
+        A (np.ndarray): batched A matrices of the Fock-Bargmann representation
+        b (np.ndarray): batched B vectors of the Fock-Bargmann representation
+        c (np.ndarray): batched vacuum amplitudes
+
+    Returns:
+        np.ndarray: Fock representation of the Gaussian tensors with shape ``(len(c),) + shape``
+    """
+    G = np.empty((len(c),) + shape, dtype=np.complex128)
+    for k in prange(len(c)):  # pylint: disable=not-an-iterable
+        G[k] = vanilla(shape, A[k], b[k], c[k])
+    return G
+
+
+@njit
+def vanilla_diagonal_batched(cutoff: int, A, b, c) -> ComplexMatrix:  # pragma: no cover
+    r"""Vanilla Fock-Bargmann strategy for the diagonal of a batch of single-mode density
+    matrices ``(A[k], b[k], c[k])``, with batch dimension on the first index.
+
+    The diagonal ``G[n, n]`` only depends on the bands ``G[n, n+1]``, ``G[n+1, n]`` and
+    ``G[n, n+2]`` of the vanilla recurrence, so each element of the batch costs
+    ``O(cutoff)`` rather than ``O(cutoff**2)``.
+
+    Args:
+        cutoff (int): number of diagonal elements to compute
+        A (np.ndarray): batched ``2x2`` A matrices of the Fock-Bargmann representation
+        b (np.ndarray): batched B vectors of the Fock-Bargmann representation
+        c (np.ndarray): batched vacuum amplitudes
+
+    Returns:
+        np.ndarray: the diagonals, with shape ``(len(c), cutoff)``
+    """
+    diag = np.zeros((len(c), cutoff), dtype=np.complex128)
+    sqrt = np.sqrt(np.arange(cutoff + 2))
+    for k, ck in enumerate(c):
+        A00, A01, A10, A11 = A[k, 0, 0], A[k, 0, 1], A[k, 1, 0], A[k, 1, 1]
+        b0, b1 = b[k, 0], b[k, 1]
+        d = ck  # G[n, n]
+        u1 = l1 = u2 = 0j  # G[n-1, n], G[n, n-1], G[n-1, n+1]
+        for n in range(cutoff):
+            diag[k, n] = d
+            new_u1 = (b1 * d + A10 * sqrt[n] * u1 + A11 * sqrt[n] * l1) / sqrt[n + 1]
+            new_l1 = (b0 * d + A00 * sqrt[n] * u1 + A01 * sqrt[n] * l1) / sqrt[n + 1]
+            new_u2 = (b1 * new_u1 + A10 * sqrt[n] * u2 + A11 * sqrt[n + 1] * d) / sqrt[n + 2]
+            d = (b0 * new_u1 + A00 * sqrt[n] * u2 + A01 * sqrt[n + 1] * d) / sqrt[n + 1]
+            u1, l1, u2 = new_u1, new_l1, new_u2
+    return diag
+
+
 @njit
 def vanilla_jacobian(
     G, A, b, c
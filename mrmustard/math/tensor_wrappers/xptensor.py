@@ -19,19 +19,320 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from functools import lru_cache
 from typing import (
+    Dict,
     List,
     Optional,
+    Sequence,
     Tuple,
     Union,
 )
 
+import numpy as np
+
 from mrmustard.utils.typing import Matrix, Scalar, Tensor, Vector
 from mrmustard.math.backend_manager import BackendManager
 
 math = BackendManager()
 
 
+def _contract(
+    matrix: Tensor,
+    other: Tensor,
+    other_is_matrix: bool,
+    transpose_matrix: bool = False,
+    transpose_other: bool = False,
+) -> Tensor:
+    r"""Contracts a matrix in ``(n,m,2,2)`` order with a matrix in ``(m,k,2,2)`` order or with a
+    vector in ``(m,2)`` order, returning the result in ``(n,k,2,2)`` or ``(n,2)`` order.
+
+    If ``transpose_matrix`` (``transpose_other``) is set, ``matrix`` (``other``) is given in
+    ``(m,n,2,2)`` (``(k,m,2,2)``) order and its transpose is folded into the contraction.
+    """
+    if math.backend_name != "numpy":
+        # a single einsum saves the transpose after the tensordot, which is a separate op in tf
+        lhs = "jiba" if transpose_matrix else "ijab"
+        if not other_is_matrix:
+            return math.einsum(f"{lhs},jb->ia", matrix, other)
+        return math.einsum(f"{lhs},{'kjcb' if transpose_other else 'jkbc'}->ikac", matrix, other)
+    # numpy's einsum does not call BLAS for this contraction: view both operands as xpxp
+    # matrices instead and do a single matmul (a transposed operand is a transposed view)
+    lhs = _xpxp_view(matrix, transpose_matrix)
+    if not other_is_matrix:
+        return (lhs @ other.reshape(-1)).reshape(-1, 2)
+    result = lhs @ _xpxp_view(other, transpose_other)
+    return result.reshape(lhs.shape[0] // 2, 2, -1, 2).transpose(0, 2, 1, 3)
+
+
+def _xpxp_view(matrix: np.ndarray, transpose: bool = False) -> np.ndarray:
+    r"""A numpy matrix in ``(n,m,2,2)`` order as a ``(2n,2m)`` xpxp matrix, or its transpose."""
+    n, m = matrix.shape[:2]
+    xpxp = matrix.transpose(0, 2, 1, 3).reshape(2 * n, 2 * m)
+    return xpxp.T if transpose else xpxp
+
+
+def _conjugate(matrix: Tensor, other: Tensor) -> Tensor:
+    r"""Computes ``matrix @ other @ matrix.T`` for a matrix in ``(n,m,2,2)`` order and a matrix in
+    ``(m,m,2,2)`` order, without materializing the transpose of ``matrix``.
+    """
+    if math.backend_name != "numpy":
+        # the transpose is folded into the subscripts of the second einsum
+        return math.einsum("ikac,lkdc->ilad", math.einsum("ijab,jkbc->ikac", matrix, other), matrix)
+    n = matrix.shape[0]
+    lhs = _xpxp_view(matrix)
+    result = lhs @ _xpxp_view(other) @ lhs.T
+    return result.reshape(n, 2, n, 2).transpose(0, 2, 1, 3)
+
+
+@lru_cache()
+def _identity_blocks(num_modes: int) -> Tuple[np.ndarray, np.ndarray]:
+    r"""The (read-only) scatter indices and updates that add the identity to the diagonal
+    ``(2, 2)`` blocks of a ``(num_modes, num_modes, 2, 2)`` tensor."""
+    diagonal = np.arange(num_modes, dtype=np.int32)
+    indices = np.stack([diagonal, diagonal], axis=-1)
+    updates = np.tile(np.eye(2), (num_modes, 1, 1))
+    indices.flags.writeable = False
+    updates.flags.writeable = False
+    return indices, updates
+
+
+def _argsort_modes(modes: List[int]) -> Optional[List[int]]:
+    r"""The positions that sort ``modes``, or ``None`` if they are already sorted."""
+    if all(a < b for a, b in zip(modes, modes[1:])):
+        return None
+    return sorted(range(len(modes)), key=modes.__getitem__)
+
+
+def _positions(positions: List[int], size: int) -> Optional[np.ndarray]:
+    r"""The ``positions`` along an axis of length ``size`` as a read-only ``int32`` array, or
+    ``None`` if selecting them would leave the axis unchanged."""
+    if positions == list(range(size)):
+        return None
+    positions = np.asarray(positions, dtype=np.int32)
+    positions.flags.writeable = False
+    return positions
+
+
+def _paddings(before: int = 0, after: int = 0) -> np.ndarray:
+    r"""The ``int32`` paddings that add ``before`` and ``after`` zero blocks along the second axis
+    of a matrix in ``(n,m,2,2)`` order."""
+    return np.array([[0, 0], [before, after], [0, 0], [0, 0]], dtype=np.int32)
+
+
+def _take(
+    tensor: Tensor, rows: Optional[np.ndarray] = None, columns: Optional[np.ndarray] = None
+) -> Tensor:
+    r"""Gathers ``rows`` along the first axis and ``columns`` along the second axis of ``tensor``,
+    skipping the axes whose positions are ``None``. A row and column selection is done with a
+    single gather.
+    """
+    if rows is not None and columns is not None:
+        return math.gather2d(tensor, rows, columns)
+    if rows is not None:
+        tensor = math.gather(tensor, rows, axis=0)
+    if columns is not None:
+        tensor = math.gather(tensor, columns, axis=1)
+    return tensor
+
+
+def _take_transposed(
+    tensor: Tensor, rows: Optional[np.ndarray], columns: Optional[np.ndarray], transposed: bool
+) -> Tensor:
+    r"""Like ``_take`` on the transpose of ``tensor`` if ``transposed`` is set, but returns the
+    selection untransposed (i.e. it takes ``rows`` as columns and ``columns`` as rows)."""
+    if transposed:
+        return _take(tensor, rows=columns, columns=rows)
+    return _take(tensor, rows=rows, columns=columns)
+
+
+def _gather_modes(
+    tensor: Tensor, rows: Optional[List[int]] = None, columns: Optional[List[int]] = None
+) -> Tensor:
+    r"""Gathers ``rows`` along the first axis and ``columns`` along the second axis of ``tensor``.
+
+    Index lists that would leave an axis unchanged are skipped, and a row and column selection
+    is done with a single gather. The indices are handed to the backend as ``int32`` numpy
+    arrays, which tensorflow takes in directly rather than converting element by element.
+    """
+    if rows is not None:
+        rows = _positions(rows, tensor.shape[0])
+    if columns is not None:
+        columns = _positions(columns, tensor.shape[1])
+    return _take(tensor, rows, columns)
+
+
+class _MatmulLayout:
+    r"""The mode bookkeeping of ``A @ B`` in ``_mode_aware_matmul``: which blocks of the
+    operands are contracted or copied, and how the result is reordered.
+
+    It only depends on the modes of the operands and on whether they are like_0, so it is built
+    once per combination (see ``_matmul_layout``) and the index arrays it holds are read-only.
+
+    Args:
+        modes_a: the ``(outmodes, inmodes)`` of ``A`` as tuples
+        modes_b: the ``(outmodes, inmodes)`` of ``B`` as tuples (the inmodes are empty for a vector)
+        like_0_a: whether ``A`` is like_0
+        like_0_b: whether ``B`` is like_0
+    """
+
+    # pylint: disable=too-many-instance-attributes,too-few-public-methods
+    def __init__(
+        self,
+        modes_a: Tuple[Tuple[int, ...], Tuple[int, ...]],
+        modes_b: Tuple[Tuple[int, ...], Tuple[int, ...]],
+        like_0_a: bool,
+        like_0_b: bool,
+    ):
+        (outmodes_a, inmodes_a), (outmodes_b, inmodes_b) = modes_a, modes_b
+        index_a = {m: i for i, m in enumerate(inmodes_a)}
+        index_b = {m: i for i, m in enumerate(outmodes_b)}
+        contracted = [m for m in inmodes_a if m in index_b]
+
+        # nothing is contracted and there is nothing to copy: the product is a null tensor
+        self.is_null = not contracted and like_0_a and like_0_b
+        if self.is_null:
+            self.outmodes = sorted(set(outmodes_a).intersection(outmodes_b))
+            self.inmodes = sorted(set(inmodes_a).intersection(inmodes_b))
+            return
+
+        uncontracted_a = [m for m in inmodes_a if m not in index_b]
+        uncontracted_b = [m for m in outmodes_b if m not in index_a]
+        if not (
+            set(outmodes_a).isdisjoint(uncontracted_b) and set(inmodes_b).isdisjoint(uncontracted_a)
+        ):
+            raise ValueError("Invalid modes")
+
+        # positions of the contracted columns of A and rows of B
+        self.contract = len(contracted) > 0
+        self.contracted_a = _positions([index_a[m] for m in contracted], len(inmodes_a))
+        self.contracted_b = _positions([index_b[m] for m in contracted], len(outmodes_b))
+        # positions of the rows of B copied through a like_1 A, and of the columns of A
+        # copied through a like_1 B
+        self.copy_rows = not like_0_a and len(uncontracted_b) > 0
+        self.copied_rows = _positions([index_b[m] for m in uncontracted_b], len(outmodes_b))
+        self.copy_cols = not like_0_b and len(uncontracted_a) > 0
+        self.copied_cols = _positions([index_a[m] for m in uncontracted_a], len(inmodes_a))
+
+        outmodes = list(outmodes_a) + uncontracted_b
+        if like_0_b and len(contracted) == 0:
+            outmodes = uncontracted_b
+        if like_0_a:
+            outmodes = [m for m in outmodes if m in outmodes_a]
+
+        inmodes = uncontracted_a + list(inmodes_b)
+        if like_0_a and len(contracted) == 0:
+            inmodes = uncontracted_a
+        if like_0_b:
+            inmodes = [m for m in inmodes if m in inmodes_b]
+
+        # the modes are usually already sorted, in which case no reordering gather is needed
+        row_order = _argsort_modes(outmodes)
+        column_order = _argsort_modes(inmodes)
+        self.row_order = None if row_order is None else _positions(row_order, len(outmodes))
+        self.column_order = None if column_order is None else _positions(column_order, len(inmodes))
+        self.outmodes = outmodes if row_order is None else [outmodes[i] for i in row_order]
+        self.inmodes = inmodes if column_order is None else [inmodes[i] for i in column_order]
+
+
+@lru_cache()
+def _matmul_layout(
+    modes_a: Tuple[Tuple[int, ...], Tuple[int, ...]],
+    modes_b: Tuple[Tuple[int, ...], Tuple[int, ...]],
+    like_0_a: bool,
+    like_0_b: bool,
+) -> _MatmulLayout:
+    r"""The (cached) ``_MatmulLayout`` of two operands with the given modes and like_0 flags."""
+    return _MatmulLayout(modes_a, modes_b, like_0_a, like_0_b)
+
+
+# pylint: disable=too-many-statements
+def _mode_aware_matmul(
+    left: Union[XPMatrix, XPVector],
+    right: Union[XPMatrix, XPVector],
+    transpose_left: bool = False,
+    transpose_right: bool = False,
+) -> Tuple[Tensor, Tuple[List[int], List[int]]]:
+    r"""Performs the matrix multiplication ``left @ right`` only on the necessary modes and
+    takes care of keeping only the modes that are needed, in case of mismatch.
+
+    With ``transpose_left`` (``transpose_right``) the product is taken with the transpose of
+    ``left`` (of the matrix ``right``), which is never materialized: its modes are swapped,
+    its gathers act on the other axis and the transpose is folded into the contraction.
+
+    See documentation for a visual explanation with blocks.
+    """
+    left_modes = (left.inmodes, left.outmodes) if transpose_left else left.modes
+    right_modes = (right.inmodes, right.outmodes) if transpose_right else right.modes
+    if list(left_modes[1]) == list(right_modes[0]):  # NOTE: they match including the ordering
+        return _contract(
+            left.tensor, right.tensor, right.isMatrix, transpose_left, transpose_right
+        ), (list(left_modes[0]), list(right_modes[1]))
+    layout = _matmul_layout(
+        (tuple(left_modes[0]), tuple(left_modes[1])),
+        (tuple(right_modes[0]), tuple(right_modes[1])),
+        left.like_0,
+        right.like_0,
+    )
+    if layout.is_null:
+        return None, (list(layout.outmodes), list(layout.inmodes))
+    bulk = None
+    copied_rows = None
+    copied_cols = None
+    if layout.contract:
+        subtensor1 = _take_transposed(left.tensor, None, layout.contracted_a, transpose_left)
+        subtensor2 = _take_transposed(right.tensor, layout.contracted_b, None, transpose_right)
+        bulk = _contract(subtensor1, subtensor2, right.isMatrix, transpose_left, transpose_right)
+    if layout.copy_rows:
+        copied_rows = _take_transposed(right.tensor, layout.copied_rows, None, transpose_right)
+        if transpose_right:  # only the copied block is actually transposed
+            copied_rows = math.transpose(copied_rows, (1, 0, 3, 2))
+    if layout.copy_cols:
+        copied_cols = _take_transposed(left.tensor, None, layout.copied_cols, transpose_left)
+        if transpose_left:
+            copied_cols = math.transpose(copied_cols, (1, 0, 3, 2))
+    if copied_rows is not None and copied_cols is not None and math.backend_name == "numpy":
+        # write the three blocks into a single preallocated output (the bottom-left block
+        # stays zero) rather than concatenating them with an explicit zero block
+        n_cols, n_rows = copied_cols.shape[1], copied_rows.shape[0]
+        final = np.zeros(
+            (copied_cols.shape[0] + n_rows, n_cols + copied_rows.shape[1], 2, 2),
+            dtype=np.result_type(*(t for t in (copied_cols, bulk, copied_rows) if t is not None)),
+        )
+        final[:-n_rows, :n_cols] = copied_cols
+        final[-n_rows:, n_cols:] = copied_rows
+        if bulk is not None:
+            final[:-n_rows, n_cols:] = bulk
+    elif copied_rows is not None and copied_cols is not None:
+        # pad the blocks with the zero corners rather than allocating them separately
+        if bulk is None:
+            top = math.pad(copied_cols, _paddings(after=copied_rows.shape[1]))
+        else:
+            top = math.concat([copied_cols, bulk], axis=1)
+        bottom = math.pad(copied_rows, _paddings(before=copied_cols.shape[1]))
+        final = math.concat([top, bottom], axis=0)
+    elif copied_cols is None and copied_rows is not None:
+        if bulk is None:
+            final = copied_rows
+        else:
+            final = math.concat([bulk, copied_rows], axis=0)
+    elif copied_rows is None and copied_cols is not None:
+        if bulk is None:
+            final = copied_cols
+        else:
+            final = math.concat([copied_cols, bulk], axis=1)
+    else:  # copied_rows and copied_cols are both None
+        final = bulk  # NOTE: could be None
+
+    if final is not None and (layout.row_order is not None or layout.column_order is not None):
+        final = _take(
+            final,
+            rows=layout.row_order,
+            columns=layout.column_order if right.isMatrix else None,
+        )
+    return final, (list(layout.outmodes), list(layout.inmodes))
+
+
 class XPTensor(ABC):
     r"""A representation of Matrices and Vectors in phase space.
 
@@ -90,12 +391,47 @@ class XPTensor(ABC):
         if self.is_vector and self.like_1:
             raise ValueError("vectors should be like_0")
         self.tensor = tensor
-        if not (set(modes[0]) == set(modes[1]) or set(modes[0]).isdisjoint(modes[1])):
+        if modes[0] != modes[1] and not (
+            set(modes[0]) == set(modes[1]) or set(modes[0]).isdisjoint(modes[1])
+        ):
             raise ValueError(
                 "The inmodes and outmodes should either contain the same modes or be disjoint"
             )
         self.modes = modes
 
+    @property
+    def tensor(self) -> Optional[Tensor]:
+        return self._tensor
+
+    @tensor.setter
+    def tensor(self, tensor: Optional[Tensor]):
+        self._tensor = tensor
+        self._xxpp = None  # the cached ``to_xxpp`` of the previous tensor
+
+    @property
+    def modes(self) -> Tuple[List[int], List[int]]:
+        return self._modes
+
+    @modes.setter
+    def modes(self, modes: Tuple[List[int], List[int]]):
+        self._modes = modes
+        self._outmode_positions = None
+        self._inmode_positions = None
+
+    @property
+    def outmode_index(self) -> Dict[int, int]:
+        r"""The position of each outmode along the first axis of the tensor (built on first use)."""
+        if self._outmode_positions is None:
+            self._outmode_positions = {m: i for i, m in enumerate(self._modes[0])}
+        return self._outmode_positions
+
+    @property
+    def inmode_index(self) -> Dict[int, int]:
+        r"""The position of each inmode along the second axis of the tensor (built on first use)."""
+        if self._inmode_positions is None:
+            self._inmode_positions = {m: i for i, m in enumerate(self._modes[1])}
+        return self._inmode_positions
+
     @property
     def dtype(self):
         return None if self.tensor is None else self.tensor.dtype
@@ -140,18 +476,24 @@ class XPTensor(ABC):
     def to_xpxp(self) -> Optional[Union[Matrix, Vector]]:
         if self.tensor is None:
             return None
-        tensor = math.transpose(
-            self.tensor, (0, 2, 1, 3) if self.isMatrix else (0, 1)
-        )  # from NN22 to N2N2 or from N2 to N2
+        if self.is_vector:  # N2 is already in xpxp order
+            return math.reshape(self.tensor, [2 * self.shape[0]])
+        tensor = math.transpose(self.tensor, (0, 2, 1, 3))  # from NN22 to N2N2
         return math.reshape(tensor, [2 * s for s in self.shape])
 
     def to_xxpp(self) -> Optional[Union[Matrix, Vector]]:
+        r"""The tensor in ``xxpp`` order. It is computed once per tensor (and is read-only on numpy)."""
         if self.tensor is None:
             return None
-        tensor = math.transpose(
-            self.tensor, (2, 0, 3, 1) if self.isMatrix else (1, 0)
-        )  # from NN22 to 2N2N or from N2 to 2N
-        return math.reshape(tensor, [2 * s for s in self.shape])
+        if self._xxpp is None:
+            tensor = math.transpose(
+                self.tensor, (2, 0, 3, 1) if self.isMatrix else (1, 0)
+            )  # from NN22 to 2N2N or from N2 to 2N
+            tensor = math.reshape(tensor, [2 * s for s in self.shape])
+            if isinstance(tensor, np.ndarray):
+                tensor.flags.writeable = False
+            self._xxpp = tensor
+        return self._xxpp
 
     def __array__(self):
         return self.to_xxpp()
@@ -172,23 +514,22 @@ class XPTensor(ABC):
             return self
         if times == 1:
             return self
+        N = self.tensor.shape[0]
         if self.isMatrix:
-            tensor = math.expand_dims(self.modes_last(), axis=4)  # shape = [2,2,N,N,1]
-            tensor = math.tile(tensor, (1, 1, 1, 1, times))  # shape = [2,2,N,N,T]
-            tensor = math.diag(tensor)  # shape = [2,2,N,N,T,T]
-            tensor = math.transpose(tensor, (0, 1, 2, 4, 3, 5))  # shape = [2,2,N,T,N,T]
-            tensor = math.reshape(
-                tensor, (2, 2, tensor.shape[2] * times, tensor.shape[4] * times)
-            )  # shape = [2,2,NT,NT] = [2,2,O,O]
-            tensor = math.transpose(tensor, (2, 3, 0, 1))  # shape = [NT,NT,2,2]
+            M = self.tensor.shape[1]
+            # the kronecker product with the identity, without going through a diagonal tensor
+            tensor = math.einsum(
+                "nmij,ts->ntmsij", self.tensor, math.eye(times, dtype=self.tensor.dtype)
+            )  # shape = [N,T,M,T,2,2]
+            tensor = math.reshape(tensor, (N * times, M * times, 2, 2))  # shape = [NT,MT,2,2]
             return XPMatrix(tensor, self.like_0, self.like_1, ([], []) if modes is None else modes)
 
-        tensor = math.tile(
-            self.expand_dims(self.modes_last(), axis=2), (1, 1, times)
-        )  # shape = [2,N,T]
-        tensor = math.reshape(tensor, (2, -1))  # shape = [2,NT] = [2,O]
-        tensor = math.transpose(tensor, (1, 0))  # shape = [NT,2] = [O,2]
-        return XPVector(tensor, [] if modes is None else modes)
+        # broadcasting rather than tiling, so that the copies are only written by the reshape
+        tensor = math.broadcast_to(
+            math.expand_dims(self.tensor, axis=1), (N, times, 2)
+        )  # shape = [N,T,2]
+        tensor = math.reshape(tensor, (N * times, 2))  # shape = [NT,2]
+        return XPVector(tensor, modes)
 
     def clone_like(self, other: XPTensor):
         r"""Create a new XPTensor with the same shape and modes as other.
@@ -254,114 +595,118 @@ class XPTensor(ABC):
             return other if other.like_0 else self
         # Now neither self nor other is None
         if self.isMatrix and other.isMatrix:
-            tensor, modes = self._mode_aware_matmul(other)
+            tensor, modes = _mode_aware_matmul(self, other)
             return XPMatrix(tensor, like_1=self.like_1 and other.like_1, modes=modes)
         if self.isMatrix and other.is_vector:
-            tensor, modes = self._mode_aware_matmul(other)
+            tensor, modes = _mode_aware_matmul(self, other)
             return XPVector(
                 tensor, modes[0]
             )  # TODO: check if we can output modes as a list in _mode_aware_matmul
         if self.is_vector and other.isMatrix:
-            tensor, modes = other.T._mode_aware_matmul(self)
+            tensor, modes = _mode_aware_matmul(other, self, transpose_left=True)
             return XPVector(tensor, modes[0])
         # self.is_vector and other.is_vector:
         return self._mode_aware_vecvec(other)  # NOTE: this is a scalar, not an XPTensor
 
-    # pylint: disable=too-many-statements
-    def _mode_aware_matmul(
-        self, other: Union[XPMatrix, XPVector]
-    ) -> Tuple[Tensor, Tuple[List[int], List[int]]]:
-        r"""Performs matrix multiplication only on the necessary modes and
-        takes care of keeping only the modes that are needed, in case of mismatch.
+    def conjugate(self, other: XPMatrix) -> XPMatrix:
+        r"""The product ``self @ other @ self.T``, e.g. a covariance matrix transformed by a
+        symplectic matrix.
+
+        The transpose of ``self`` is folded into the contraction rather than materialized, in a
+        single contraction when ``other`` is defined on the inmodes of ``self`` (in the same order).
+
+        Args:
+            other: the matrix to conjugate
 
-        See documentation for a visual explanation with blocks.
+        Returns:
+            XPMatrix: the conjugated matrix
         """
-        if list(self.inmodes) == list(other.outmodes):  # NOTE: they match including the ordering
-            prod = math.tensordot(
-                self.tensor, other.tensor, ((1, 3), (0, 2)) if other.isMatrix else ((1, 3), (0, 1))
-            )
-            return math.transpose(prod, (0, 2, 1, 3) if other.isMatrix else (0, 1)), (
-                self.outmodes,
-                other.inmodes,
-            )
-        contracted = [i for i in self.inmodes if i in other.outmodes]
-        uncontracted_self = [i for i in self.inmodes if i not in contracted]
-        uncontracted_other = [o for o in other.outmodes if o not in contracted]
-        if not (
-            set(self.outmodes).isdisjoint(uncontracted_other)
-            and set(other.inmodes).isdisjoint(uncontracted_self)
-        ):
-            raise ValueError("Invalid modes")
-        bulk = None
-        copied_rows = None
-        copied_cols = None
-        if len(contracted) > 0:
-            subtensor1 = math.gather(
-                self.tensor, [self.inmodes.index(m) for m in contracted], axis=1
-            )
-            subtensor2 = math.gather(
-                other.tensor, [other.outmodes.index(m) for m in contracted], axis=0
-            )
-            if other.isMatrix:
-                bulk = math.tensordot(subtensor1, subtensor2, ((1, 3), (0, 2)))
-                bulk = math.transpose(bulk, (0, 2, 1, 3))
-            else:
-                bulk = math.tensordot(subtensor1, subtensor2, ((1, 3), (0, 1)))
-        if self.like_1 and len(uncontracted_other) > 0:
-            copied_rows = math.gather(
-                other.tensor, [other.outmodes.index(m) for m in uncontracted_other], axis=0
-            )
-        if other.like_1 and len(uncontracted_self) > 0:
-            copied_cols = math.gather(
-                self.tensor, [self.inmodes.index(m) for m in uncontracted_self], axis=1
-            )
-        if copied_rows is not None and copied_cols is not None:
-            if bulk is None:
-                bulk = math.zeros(
-                    (copied_cols.shape[0], copied_rows.shape[1], 2, 2), dtype=copied_cols.dtype
-                )
-            empty = math.zeros(
-                (copied_rows.shape[0], copied_cols.shape[1], 2, 2), dtype=copied_cols.dtype
+        if self._conjugates_in_place(other):
+            return XPMatrix(
+                _conjugate(self.tensor, other.tensor),
+                like_1=self.like_1 and other.like_1,
+                modes=(self.outmodes, self.outmodes),
             )
-            final = math.block([[copied_cols, bulk], [empty, copied_rows]], axes=[0, 1])
-        elif copied_cols is None and copied_rows is not None:
-            if bulk is None:
-                final = copied_rows
-            else:
-                final = math.block([[bulk], [copied_rows]], axes=[0, 1])
-        elif copied_rows is None and copied_cols is not None:
-            if bulk is None:
-                final = copied_cols
-            else:
-                final = math.block([[copied_cols, bulk]], axes=[0, 1])
-        else:  # copied_rows and copied_cols are both None
-            final = bulk  # NOTE: could be None
-
-        outmodes = self.outmodes + uncontracted_other
-        if other.like_0 and len(contracted) == 0:
-            outmodes = uncontracted_other
-        if self.like_0:
-            outmodes = [m for m in outmodes if m in self.outmodes]
-
-        inmodes = uncontracted_self + other.inmodes
-        if self.like_0 and len(contracted) == 0:
-            inmodes = uncontracted_self
-        if other.like_0:
-            inmodes = [m for m in inmodes if m in other.inmodes]
-
-        if final is not None:
-            final = math.gather(final, [outmodes.index(o) for o in sorted(outmodes)], axis=0)
-            if other.isMatrix:
-                final = math.gather(final, [inmodes.index(i) for i in sorted(inmodes)], axis=1)
-        return final, (sorted(outmodes), sorted(inmodes))
+        product = self @ other
+        if product.tensor is None or self.tensor is None or product.is_vector:
+            return product @ self.T
+        tensor, modes = _mode_aware_matmul(product, self, transpose_right=True)
+        return XPMatrix(tensor, like_1=product.like_1 and self.like_1, modes=modes)
+
+    def _conjugates_in_place(self, other: XPMatrix) -> bool:
+        r"""Whether ``self @ other @ self.T`` is a single contraction, i.e. both are non-null
+        matrices and ``other`` is defined on the inmodes of ``self`` (in the same order)."""
+        if not (self.isMatrix and other.isMatrix):
+            return False
+        if self.tensor is None or other.tensor is None:
+            return False
+        return list(other.outmodes) == list(self.inmodes) == list(other.inmodes)
+
+    @staticmethod
+    def chain_matmul(
+        operands: Sequence[Union[XPMatrix, XPVector]]
+    ) -> Union[XPMatrix, XPVector, Scalar]:
+        r"""The product ``operands[0] @ operands[1] @ ... @ operands[-1]``, evaluated in the order
+        that minimizes the number of contracted blocks.
+
+        The order is found with the textbook matrix-chain dynamic programme, estimating the size
+        of each partial product as the number of modes its operands act on (vectors count as a
+        single column). For instance, a chain ending with a vector is evaluated as a sequence of
+        matrix-vector products.
+
+        Args:
+            operands: the matrices (and possibly a leading or trailing vector) to multiply
+
+        Returns:
+            The product of the operands.
+
+        Raises:
+            ValueError: if ``operands`` is empty
+        """
+        if not operands:
+            raise ValueError("chain_matmul needs at least one operand")
+        n = len(operands)
+        modes = [set(op.outmodes).union(op.inmodes) for op in operands]
+        # number of rows of the leftmost factor and of columns of the rightmost factor
+        rows = 1 if operands[0].is_vector else None
+        cols = 1 if operands[-1].is_vector else None
+
+        union = [[set()] * n for _ in range(n)]
+        cost = [[0] * n for _ in range(n)]
+        split = [[None] * n for _ in range(n)]
+        for i in range(n):
+            union[i][i] = modes[i]
+        for length in range(2, n + 1):
+            for i in range(n - length + 1):
+                j = i + length - 1
+                union[i][j] = union[i][j - 1] | modes[j]
+                for k in range(i, j):
+                    left, right = union[i][k], union[k + 1][j]
+                    size = (
+                        (rows if i == 0 and rows else len(left))
+                        * len(left & right)
+                        * (cols if j == n - 1 and cols else len(right))
+                    )
+                    if split[i][j] is None or cost[i][k] + cost[k + 1][j] + size < cost[i][j]:
+                        cost[i][j] = cost[i][k] + cost[k + 1][j] + size
+                        split[i][j] = k
+
+        def product(i, j):
+            if i == j:
+                return operands[i]
+            return product(i, split[i][j]) @ product(split[i][j] + 1, j)
+
+        return product(0, n - 1)
 
     def _mode_aware_vecvec(self, other: XPVector) -> Scalar:
         if list(self.outmodes) == list(other.outmodes):
             return math.sum(self.tensor * other.tensor)
-        common = list(
-            set(self.outmodes) & set(other.outmodes)
-        )  # only the common modes (the others are like 0)
-        return math.sum(self.tensor[common] * other.tensor[common])
+        common = [m for m in self.outmodes if m in other.outmode_index]  # the others are like 0
+        if not common:
+            return math.cast(0, self.tensor.dtype)
+        self_rows = _gather_modes(self.tensor, [self.outmode_index[m] for m in common])
+        other_rows = _gather_modes(other.tensor, [other.outmode_index[m] for m in common])
+        return math.sum(self_rows * other_rows)
 
     def __add__(self, other: Union[XPMatrix, XPVector]) -> Union[XPMatrix, XPVector]:
         if not isinstance(other, (XPMatrix, XPVector)):
@@ -384,13 +729,11 @@ class XPTensor(ABC):
 
             # other must be a matrix because self is like_1, so it must be a matrix and we can't add a vector to a matrix
             if self.like_1:
-                indices = [
-                    [i, i] for i in range(other.num_modes)
-                ]  # TODO: check if this is always correct
-                updates = math.tile(
-                    math.expand_dims(math.eye(2, dtype=other.dtype), 0), (other.num_modes, 1, 1)
+                # TODO: check if this is always correct
+                indices, updates = _identity_blocks(other.num_modes)
+                other.tensor = math.update_add_tensor(
+                    other.tensor, indices, math.cast(updates, other.dtype)
                 )
-                other.tensor = math.update_add_tensor(other.tensor, indices, updates)
                 return other
         if other.tensor is None:  # only other is None
             return other + self
@@ -411,27 +754,31 @@ class XPTensor(ABC):
         other_contains_self = set(other.outmodes).issuperset(self.outmodes) and set(
             other.inmodes
         ).issuperset(self.inmodes)
-        if self_contains_other:
-            to_update = self.tensor
-            to_add = [other]
-        elif other_contains_self:
-            to_update = other.tensor
-            to_add = [self]
+        if self_contains_other or other_contains_self:
+            to_update, to_add = (
+                (self.tensor, [other]) if self_contains_other else (other.tensor, [self])
+            )
+            if math.backend_name == "numpy":
+                to_update = to_update.copy()  # the numpy scatter-add is in place
         else:  # need to add both to a new empty tensor
             to_update = math.zeros(
                 (len(outmodes), len(inmodes), 2, 2) if self.isMatrix else (len(outmodes), 2),
                 dtype=self.tensor.dtype,
             )
             to_add = [self, other]
+        outmode_index = {m: i for i, m in enumerate(outmodes)}
+        inmode_index = {m: i for i, m in enumerate(inmodes)}
         for t in to_add:
-            outmodes_indices = [outmodes.index(o) for o in t.outmodes]
-            inmodes_indices = [inmodes.index(i) for i in t.inmodes]
+            outmodes_indices = np.array([outmode_index[o] for o in t.outmodes], dtype=np.int32)
+            inmodes_indices = np.array([inmode_index[i] for i in t.inmodes], dtype=np.int32)
             if (
                 t.isMatrix
             ):  # e.g. outmodes of to_update are [self]+[other_new] = (e.g.) [9,1,2]+[0,20]
-                indices = [[o, i] for o in outmodes_indices for i in inmodes_indices]
+                indices = np.stack(
+                    np.meshgrid(outmodes_indices, inmodes_indices, indexing="ij"), axis=-1
+                ).reshape(-1, 2)
             else:
-                indices = [[o] for o in outmodes_indices]
+                indices = outmodes_indices[:, None]
             to_update = math.update_add_tensor(
                 to_update,
                 indices,
@@ -478,8 +825,8 @@ class XPTensor(ABC):
                 _modes = self.outmodes
             else:
                 raise ValueError("Usage: V[1], V[[1,2,3]] or V[:]")
-            rows = [self.outmodes.index(m) for m in modes]
-            return XPVector(math.gather(self.tensor, rows, axis=0), modes)
+            rows = [self.outmode_index[m] for m in _modes]
+            return XPVector(_gather_modes(self.tensor, rows), _modes)
 
         _modes = [None, None]
         if isinstance(modes, int):
@@ -502,10 +849,9 @@ class XPTensor(ABC):
                     )
         else:
             raise ValueError(f"Invalid modes: {modes} (tensor has modes {self.modes})")
-        rows = [self.outmodes.index(m) for m in _modes[0]]
-        columns = [self.inmodes.index(m) for m in _modes[1]]
-        subtensor = math.gather(self.tensor, rows, axis=0)
-        subtensor = math.gather(subtensor, columns, axis=1)
+        rows = [self.outmode_index[m] for m in _modes[0]]
+        columns = [self.inmode_index[m] for m in _modes[1]]
+        subtensor = _gather_modes(self.tensor, rows, columns)
         return XPMatrix(
             subtensor,
             like_1=_modes[0] == _modes[1] if self.like_1 else False,
@@ -535,7 +881,10 @@ class XPMatrix(XPTensor):
         if like_0 == like_1:
             raise ValueError(f"like_0 and like_1 can't both be {like_0}")
         if not (
-            isinstance(modes, tuple) and len(modes) == 2 and all(isinstance(m, list) for m in modes)
+            isinstance(modes, tuple)
+            and len(modes) == 2
+            and isinstance(modes[0], list)
+            and isinstance(modes[1], list)
         ):
             raise ValueError("modes should be a tuple containing two lists (outmodes and inmodes)")
         if len(modes[0]) == 0 and len(modes[1]) == 0 and tensor is not None:
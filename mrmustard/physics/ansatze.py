@@ -20,7 +20,8 @@ from __future__ import annotations
 
 import itertools
 from abc import ABC, abstractmethod
-from typing import Any, Union, Optional
+from copy import copy
+from typing import Any, Callable, Union, Optional
 
 import numpy as np
 
@@ -139,15 +140,28 @@ class PolyExpBase(Ansatz):
     """
 
     def __init__(self, mat: Batch[Matrix], vec: Batch[Vector], array: Batch[Tensor]):
-        self.mat = math.atleast_3d(math.astensor(mat))
-        self.vec = math.atleast_2d(math.astensor(vec))
-        self.array = math.atleast_1d(math.astensor(array))
+        self.mat = math.atleast_3d(mat)
+        self.vec = math.atleast_2d(vec)
+        self.array = math.atleast_1d(array)
         self.batch_size = self.mat.shape[0]
         self.num_vars = self.mat.shape[-1]
         self._simplified = False
 
     def __neg__(self) -> PolyExpBase:
-        return self.__class__(self.mat, self.vec, -self.array)
+        return self._with_array(-self.array)
+
+    def _with_array(self, array: Batch[Tensor]) -> PolyExpBase:
+        r"""
+        Returns a shallow copy of this ansatz with the given array, which shares the matrix and
+        vector rather than validating them again in ``__init__``. They are never modified in
+        place, so sharing them is safe.
+
+        Args:
+            array: the new array, with the same batch size
+        """
+        new = copy(self)
+        new.array = array
+        return new
 
     def __eq__(self, other: PolyExpBase) -> bool:
         return self._equal_no_array(other) and np.allclose(self.array, other.array, atol=1e-10)
@@ -353,7 +367,7 @@ class PolyExpAnsatz(PolyExpBase):
             return self.__class__(A=new_a, b=new_b, c=new_c)
         else:
             try:
-                return self.__class__(self.A, self.b, self.c * other)
+                return self._with_array(self.c * other)
             except Exception as e:
                 raise TypeError(f"Cannot multiply {self.__class__} and {other.__class__}.") from e
 
@@ -377,7 +391,7 @@ class PolyExpAnsatz(PolyExpBase):
             return self.__class__(A=new_a, b=new_b, c=new_c)
         else:
             try:
-                return self.__class__(self.A, self.b, self.c / other)
+                return self._with_array(self.c / other)
             except Exception as e:
                 raise TypeError(f"Cannot divide {self.__class__} and {other.__class__}.") from e
 
@@ -395,10 +409,27 @@ class PolyExpAnsatz(PolyExpBase):
         Returns:
             The tensor product of this ansatz and other.
         """
-        As = [math.block_diag(a1, a2) for a1 in self.A for a2 in other.A]
-        bs = [math.concat([b1, b2], axis=-1) for b1 in self.b for b2 in other.b]
-        cs = [math.outer(c1, c2) for c1 in self.c for c2 in other.c]
-        return self.__class__(As, bs, cs)
+        # all the pairs of batch elements at once, on a (self.batch_size, other.batch_size) grid
+        batch = (self.batch_size, other.batch_size)
+        n1, n2 = self.num_vars, other.num_vars
+        As = math.block_diag(self.A[:, None], other.A[None, :])
+        bs = math.concat(
+            [
+                math.broadcast_to(self.b[:, None], batch + (n1,)),
+                math.broadcast_to(other.b[None, :], batch + (n2,)),
+            ],
+            axis=-1,
+        )
+        shape1, shape2 = tuple(self.c.shape[1:]), tuple(other.c.shape[1:])
+        cs = math.reshape(self.c, batch[:1] + (1,) + shape1 + (1,) * len(shape2)) * math.reshape(
+            other.c, (1,) + batch[1:] + (1,) * len(shape1) + shape2
+        )
+        size = batch[0] * batch[1]
+        return self.__class__(
+            math.reshape(As, (size, n1 + n2, n1 + n2)),
+            math.reshape(bs, (size, n1 + n2)),
+            math.reshape(cs, (size,) + shape1 + shape2),
+        )
 
 
 class ArrayAnsatz(Ansatz):
@@ -435,6 +466,20 @@ class ArrayAnsatz(Ansatz):
         """
         return self.__class__(array=-self.array)
 
+    def _batch_pairs(self, other: ArrayAnsatz, op: Callable) -> ArrayAnsatz:
+        r"""
+        Applies the broadcasting binary ``op`` to all the pairs of batch elements of this ansatz
+        and another one in a single call. The pairs are in row-major order in the batch of the
+        result.
+        """
+        shape1, shape2 = tuple(self.array.shape[1:]), tuple(other.array.shape[1:])
+        # the batch elements broadcast against each other from the right, as in ``op(a, b)``
+        rank = max(len(shape1), len(shape2))
+        array1 = math.reshape(self.array, (-1, 1) + (1,) * (rank - len(shape1)) + shape1)
+        array2 = math.reshape(other.array, (1, -1) + (1,) * (rank - len(shape2)) + shape2)
+        array = op(array1, array2)
+        return self.__class__(array=math.reshape(array, (-1,) + tuple(array.shape[2:])))
+
     def __eq__(self, other: Ansatz) -> bool:
         r"""
         Whether this ansatz's array is equal to another ansatz's array.
@@ -463,8 +508,7 @@ class ArrayAnsatz(Ansatz):
             ArrayAnsatz: The addition of this ansatz and other.
         """
         try:
-            new_array = [a + b for a in self.array for b in other.array]
-            return self.__class__(array=math.astensor(new_array))
+            return self._batch_pairs(other, lambda a, b: a + b)
         except Exception as e:
             raise TypeError(f"Cannot add {self.__class__} and {other.__class__}.") from e
 
@@ -489,8 +533,7 @@ class ArrayAnsatz(Ansatz):
         """
         if isinstance(other, ArrayAnsatz):
             try:
-                new_array = [a / b for a in self.array for b in other.array]
-                return self.__class__(array=math.astensor(new_array))
+                return self._batch_pairs(other, lambda a, b: a / b)
             except Exception as e:
                 raise TypeError(f"Cannot divide {self.__class__} and {other.__class__}.") from e
         else:
@@ -511,8 +554,7 @@ class ArrayAnsatz(Ansatz):
         """
         if isinstance(other, ArrayAnsatz):
             try:
-                new_array = [a * b for a in self.array for b in other.array]
-                return self.__class__(array=math.astensor(new_array))
+                return self._batch_pairs(other, lambda a, b: a * b)
             except Exception as e:
                 raise TypeError(f"Cannot multiply {self.__class__} and {other.__class__}.") from e
         else:
@@ -529,8 +571,11 @@ class ArrayAnsatz(Ansatz):
             The tensor product of this ansatz and other.
             Batch size is the product of two batches.
         """
-        new_array = [math.outer(a, b) for a in self.array for b in other.array]
-        return self.__class__(array=math.astensor(new_array))
+        # an outer product of the arrays on the grid of pairs of batch elements
+        shape1, shape2 = tuple(self.array.shape[1:]), tuple(other.array.shape[1:])
+        array1 = math.reshape(self.array, (-1, 1) + shape1 + (1,) * len(shape2))
+        array2 = math.reshape(other.array, (1, -1) + (1,) * len(shape1) + shape2)
+        return self.__class__(array=math.reshape(array1 * array2, (-1,) + shape1 + shape2))
 
     @property
     def conj(self):
@@ -568,12 +613,12 @@ def bargmann_Abc_to_phasespace_cov_means(
     num_modes = A.shape[-1] // 2
     Omega = math.cast(math.transpose(math.J(num_modes)), dtype=math.complex128)
     W = math.transpose(math.conj(math.rotmat(num_modes)))
+    OmegaW = Omega @ W  # shared by all the elements of the batch
+    OmegaW_T = math.transpose(OmegaW)
     coeff = c
-    cov = [
-        -Omega @ W @ Amat @ math.transpose(W) @ math.transpose(Omega) * settings.HBAR for Amat in A
-    ]
+    cov = [-OmegaW @ Amat @ OmegaW_T * settings.HBAR for Amat in A]
     mean = [
-        1j * math.matvec(Omega @ W, bvec) * math.sqrt(settings.HBAR, dtype=math.complex128)
+        1j * math.matvec(OmegaW, bvec) * math.sqrt(settings.HBAR, dtype=math.complex128)
         for bvec in b
     ]
     return math.astensor(cov), math.astensor(mean), coeff
@@ -15,10 +15,13 @@
 """
 This module contains functions for performing calculations on objects in the Bargmann representations.
 """
+from functools import lru_cache
+
 import numpy as np
+from numba import njit
 
 from mrmustard import math, settings
-from mrmustard.physics.husimi import pq_to_aadag, wigner_to_husimi
+from mrmustard.physics.husimi import wigner_to_husimi
 
 
 def cayley(X, c):
@@ -43,18 +46,64 @@ def wigner_to_bargmann_rho(cov, means):
 
     Note that here A and B are defined with respect to the literature.
     """
+    if math.backend_name == "numpy":
+        A, B, C = _wigner_to_bargmann_rho(
+            np.asarray(cov, dtype=np.complex128),
+            np.asarray(means, dtype=np.complex128),
+            settings.HBAR,
+        )
+        return A, B, np.complex128(C)
+
     N = cov.shape[-1] // 2
-    A = math.matmul(math.Xmat(N), cayley(pq_to_aadag(cov), c=0.5))
     Q, beta = wigner_to_husimi(cov, means)
+    A = math.matmul(math.Xmat(N), cayley(Q - 0.5 * math.eye(2 * N, dtype=Q.dtype), c=0.5))
     b = math.solve(Q, beta)
     B = math.conj(b)
-    num_C = math.exp(-0.5 * math.sum(math.conj(beta) * b))
-    detQ = math.det(Q)
-    den_C = math.sqrt(detQ, dtype=num_C.dtype)
-    C = num_C / den_C
+    sign, logdetQ = math.slogdet(Q)
+    log_C = -0.5 * math.sum(math.conj(beta) * b) - 0.5 * math.cast(logdetQ, beta.dtype)
+    C = math.exp(log_C) / math.sqrt(sign, dtype=beta.dtype)
     return A, B, C
 
 
+@njit
+def _wigner_to_bargmann_rho(cov, means, hbar):  # pragma: no cover
+    r"""Numba version of ``wigner_to_bargmann_rho``, which fuses the Husimi and Cayley transforms.
+
+    Since the Husimi covariance matrix is :math:`Q = \sigma + I/2`, the Cayley transform of
+    :math:`\sigma` is :math:`(\sigma + I/2)^{-1}(\sigma - I/2) = I - Q^{-1}`, so a single
+    inverse of :math:`Q` yields both ``A`` and ``B``.
+    """
+    N = cov.shape[-1] // 2
+    # Q = rotmat(N) @ cov @ rotmat(N)^dagger / hbar + I/2, written out blockwise
+    Q = np.empty((2 * N, 2 * N), dtype=np.complex128)
+    for i in range(N):
+        for j in range(N):
+            xx, xp = cov[i, j] / hbar, cov[i, j + N] / hbar
+            px, pp = cov[i + N, j] / hbar, cov[i + N, j + N] / hbar
+            Q[i, j] = 0.5 * (xx + pp + 1j * (px - xp))
+            Q[i, j + N] = 0.5 * (xx - pp + 1j * (px + xp))
+            Q[i + N, j] = 0.5 * (xx - pp - 1j * (px + xp))
+            Q[i + N, j + N] = 0.5 * (xx + pp - 1j * (px - xp))
+        Q[i, i] += 0.5
+        Q[i + N, i + N] += 0.5
+    Q_inv = np.linalg.inv(Q)
+    beta = np.empty(2 * N, dtype=np.complex128)  # rotmat(N) @ means / sqrt(hbar)
+    for i in range(N):
+        beta[i] = (means[i] + 1j * means[i + N]) / np.sqrt(2 * hbar)
+        beta[i + N] = (means[i] - 1j * means[i + N]) / np.sqrt(2 * hbar)
+    b = Q_inv @ beta
+
+    A = np.empty_like(Q_inv)  # Xmat(N) @ (I - Q_inv)
+    A[:N] = -Q_inv[N:]
+    A[N:] = -Q_inv[:N]
+    for i in range(N):
+        A[i, i + N] += 1
+        A[i + N, i] += 1
+    sign, logdetQ = np.linalg.slogdet(Q)
+    C = np.exp(-0.5 * np.sum(np.conj(beta) * b) - 0.5 * logdetQ) / np.sqrt(sign)
+    return A, np.conj(b), C
+
+
 def wigner_to_bargmann_psi(cov, means):
     r"""Converts the wigner representation in terms of covariance matrix and mean vector into the Bargmann A,B,C triple
     for a Hilbert vector (i.e. for M modes, A has shape M x M and B has shape M).
@@ -65,6 +114,18 @@ def wigner_to_bargmann_psi(cov, means):
     # NOTE: c for th psi is to calculated from the global phase formula.
 
 
+@lru_cache()
+def _choi_rotmat(num_modes: int) -> np.ndarray:
+    r"""The (read-only) rotation from the quadratures of a Choi matrix to its complex amplitudes."""
+    I = np.identity(num_modes, dtype=np.complex128)
+    o = np.zeros_like(I)
+    R = np.block(
+        [[I, 1j * I, o, o], [o, o, I, -1j * I], [I, -1j * I, o, o], [o, o, I, 1j * I]]
+    ) / np.sqrt(2)
+    R.flags.writeable = False
+    return R
+
+
 def wigner_to_bargmann_Choi(X, Y, d):
     r"""Converts the wigner representation in terms of covariance matrix and mean vector into the Bargmann `A,B,C` triple
     for a channel (i.e. for M modes, A has shape 4M x 4M and B has shape 4M)."""
@@ -72,7 +133,7 @@ def wigner_to_bargmann_Choi(X, Y, d):
     I2 = math.eye(2 * N, dtype=X.dtype)
     XT = math.transpose(X)
     xi = 0.5 * (I2 + math.matmul(X, XT) + 2 * Y / settings.HBAR)
-    detxi = math.det(xi)
+    sign, logdetxi = math.slogdet(xi)
     xi_inv = math.inv(xi)
     A = math.block(
         [
@@ -80,18 +141,15 @@ def wigner_to_bargmann_Choi(X, Y, d):
             [math.matmul(XT, xi_inv), I2 - math.matmul(math.matmul(XT, xi_inv), X)],
         ]
     )
-    I = math.eye(N, dtype="complex128")
-    o = math.zeros_like(I)
-    R = math.block(
-        [[I, 1j * I, o, o], [o, o, I, -1j * I], [I, -1j * I, o, o], [o, o, I, 1j * I]]
-    ) / np.sqrt(2)
+    R = _choi_rotmat(N)
     A = math.matmul(math.matmul(R, A), math.dagger(R))
     A = math.matmul(math.Xmat(2 * N), A)
     b = math.matvec(xi_inv, d)
     B = math.matvec(math.conj(R), math.concat([b, -math.matvec(XT, b)], axis=-1)) / math.sqrt(
         settings.HBAR, dtype=R.dtype
     )
-    C = math.exp(-0.5 * math.sum(d * b) / settings.HBAR) / math.sqrt(detxi, dtype=b.dtype)
+    log_C = -0.5 * math.sum(d * b) / settings.HBAR - 0.5 * math.cast(logdetxi, b.dtype)
+    C = math.exp(log_C) / math.sqrt(sign, dtype=b.dtype)
     # now A and B have order [out_r, in_r out_l, in_l].
     return A, B, math.cast(C, "complex128")
 
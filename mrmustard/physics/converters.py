@@ -19,6 +19,7 @@ This module contains the functions to convert between different representations.
 from typing import Iterable, Union, Optional
 from mrmustard.physics.representations import Representation, Bargmann, Fock
 from mrmustard import math, settings
+from mrmustard.math.caching import triples_shape_cache
 
 
 def to_fock(rep: Representation, shape: Optional[Union[int, Iterable[int]]] = None) -> Fock:
@@ -60,8 +61,17 @@ def to_fock(rep: Representation, shape: Optional[Union[int, Iterable[int]]] = No
             msg += f"the number of variables of this ansatz ({rep.ansatz.num_vars})."
             raise ValueError(msg)
 
-        array = [math.hermite_renormalized(A, b, c, shape) for A, b, c in zip(rep.A, rep.b, rep.c)]
-        fock = Fock(math.astensor(array), batched=True)
+        array = _hermite_renormalized_batched(rep.A, rep.b, rep.c, tuple(shape))
+        fock = Fock(array, batched=True)
         fock._original_bargmann_data = rep.data
         return fock
     return rep
+
+
+@triples_shape_cache(maxsize=64)
+def _hermite_renormalized_batched(A, b, c, shape):
+    r"""
+    The Fock arrays of a batch of Bargmann triples. Cached, as the same triples are often
+    converted repeatedly with the same shape (e.g. when sweeping or optimizing circuits).
+    """
+    return math.hermite_renormalized_batched(A, b, c, shape)
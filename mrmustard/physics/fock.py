@@ -18,7 +18,9 @@
 This module contains functions for performing calculations on objects in the Fock representations.
 """
 
+import string
 from functools import lru_cache
+from math import prod as mprod
 from typing import List, Optional, Sequence, Tuple, Union
 
 import numpy as np
@@ -91,18 +93,22 @@ def autocutoffs(cov: Matrix, means: Vector, probability: float):
         Tuple[int, ...]: the suggested cutoffs
     """
     M = len(means) // 2
-    cutoffs = []
+    cov, means = math.asnumpy(cov), math.asnumpy(means)
+    triples = []
     for i in range(M):
         cov_i = np.array([[cov[i, i], cov[i, i + M]], [cov[i + M, i], cov[i + M, i + M]]])
         means_i = np.array([means[i], means[i + M]])
-        # apply 1-d recursion until probability is less than 0.99
-        A, B, C = [math.asnumpy(x) for x in wigner_to_bargmann_rho(cov_i, means_i)]
-        diag = math.hermite_renormalized_diagonal(A, B, C, cutoffs=[100])
+        triples.append([math.asnumpy(x) for x in wigner_to_bargmann_rho(cov_i, means_i)])
+    A, B, C = (np.array([triple[j] for triple in triples], dtype=np.complex128) for j in range(3))
+    # apply the 1-d recursion to all the 1-mode marginals at once
+    diags = np.real(strategies.vanilla_diagonal_batched(100, A, B, C))
+
+    cutoffs = []
+    for diag in diags:
         # find at what index in the cumsum the probability is more than 0.99
-        for i, val in enumerate(np.cumsum(diag)):
-            if val > probability:
-                cutoffs.append(max(i + 1, settings.AUTOCUTOFF_MIN_CUTOFF))
-                break
+        (above,) = np.nonzero(np.cumsum(diag) > probability)
+        if len(above) > 0:
+            cutoffs.append(max(int(above[0]) + 1, settings.AUTOCUTOFF_MIN_CUTOFF))
         else:
             cutoffs.append(settings.AUTOCUTOFF_MAX_CUTOFF)
     return cutoffs
@@ -156,6 +162,43 @@ def wigner_to_fock_state(
         return math.hermite_renormalized(A, B, C, shape=tuple(shape))
 
 
+def wigner_to_fock_diagonal(
+    cov: Matrix, means: Vector, cutoffs: Sequence[int], leftover: Optional[int] = None
+) -> Tensor:
+    r"""Returns the diagonal of the Fock density matrix of a Gaussian state (i.e. its photon number
+    probabilities) without computing the rest of the density matrix.
+
+    If ``leftover`` is given, the density matrix of that mode is kept in full: the first two
+    indices of the result are its left and right indices, followed by the diagonal indices of the
+    other modes.
+
+    Args:
+        cov: the Wigner covariance matrix
+        means: the Wigner means vector
+        cutoffs: the cutoff of each mode
+        leftover: the index of the mode whose density matrix is kept
+
+    Returns:
+        Tensor: the diagonal of the density matrix
+    """
+    num_modes = len(cutoffs)
+    A, B, C = wigner_to_bargmann_rho(cov, means)
+    # same index order as in ``wigner_to_fock_state``
+    Xmat = math.Xmat(num_modes)
+    A = math.matmul(math.matmul(Xmat, A), Xmat)
+    B = math.matvec(Xmat, B)
+    if leftover is None:
+        return math.hermite_renormalized_diagonal(A, B, C, cutoffs=tuple(cutoffs))
+    # move the leftover mode first, which is the one the strategy keeps
+    order = [leftover] + [m for m in range(num_modes) if m != leftover]
+    indices = np.array(order + [num_modes + m for m in order], dtype=np.int32)
+    A = math.gather2d(A, indices, indices)
+    B = math.gather(B, indices)
+    return math.hermite_renormalized_1leftoverMode(
+        A, B, C, cutoffs=tuple(cutoffs[m] for m in order)
+    )
+
+
 def wigner_to_fock_U(X, d, shape):
     r"""Returns the Fock representation of a Gaussian unitary transformation.
     The index order is out_l, in_l, where in_l is to be contracted with the indices of a ket,
@@ -212,7 +255,7 @@ def dm_to_ket(dm: Tensor) -> Tensor:
     r"""Maps a density matrix to a ket if the state is pure.
 
     If the state is pure :math:`\hat \rho= |\psi\rangle\langle \psi|` then the
-    ket is the eigenvector of :math:`\rho` corresponding to the eigenvalue 1.
+    ket is proportional to any non-vanishing column of :math:`\rho`.
 
     Args:
         dm (Tensor): the density matrix
@@ -229,13 +272,16 @@ def dm_to_ket(dm: Tensor) -> Tensor:
         raise ValueError("Cannot calculate ket for mixed states.")
 
     cutoffs = dm.shape[: len(dm.shape) // 2]
-    d = int(np.prod(cutoffs))
+    d = mprod(cutoffs)
     dm = math.reshape(dm, (d, d))
 
-    eigvals, eigvecs = math.eigh(dm)
-    # eigenvalues and related eigenvectors are sorted in non-decreasing order,
-    # meaning the associated eigvec to largest eigval is stored last.
-    ket = eigvecs[:, -1] * math.sqrt(eigvals[-1])
+    # for a pure state every column of the dm is the ket up to a factor, i.e.
+    # dm[:, k] / sqrt(dm[k, k]) = ket * conj(ket[k]) / |ket[k]|, so no eigendecomposition
+    # is needed. We pick the first column with a non-negligible diagonal entry, which
+    # fixes the global phase such that the first non-vanishing amplitude is real positive.
+    diag = math.asnumpy(math.real(math.diag_part(dm)))
+    k = int(np.argmax(diag > 1e-6 * np.max(diag)))
+    ket = dm[:, k] / math.sqrt(math.cast(dm[k, k], dm.dtype))
     ket = math.reshape(ket, cutoffs)
 
     return ket
@@ -250,7 +296,7 @@ def ket_to_probs(ket: Tensor) -> Tensor:
     Returns:
         Tensor: the probabilities vector
     """
-    return math.abs(ket) ** 2
+    return math.abs_square(ket)
 
 
 def dm_to_probs(dm: Tensor) -> Tensor:
@@ -285,7 +331,7 @@ def fidelity(state_a, state_b, a_ket: bool, b_ket: bool) -> Scalar:
         min_cutoffs = [slice(min(a, b)) for a, b in zip(state_a.shape, state_b.shape)]
         state_a = state_a[tuple(min_cutoffs)]
         state_b = state_b[tuple(min_cutoffs)]
-        return math.abs(math.sum(math.conj(state_a) * state_b)) ** 2
+        return math.abs_square(math.sum(math.conj(state_a) * state_b))
 
     if a_ket:
         min_cutoffs = [
@@ -324,23 +370,38 @@ def fidelity(state_a, state_b, a_ket: bool, b_ket: bool) -> Scalar:
     ]
     state_a = state_a[tuple(min_cutoffs * 2)]
     state_b = state_b[tuple(min_cutoffs * 2)]
-    return math.abs(
-        (
-            math.trace(
-                math.sqrtm(
-                    math.matmul(math.matmul(math.sqrtm(state_a), state_b), math.sqrtm(state_a))
-                )
-            )
-            ** 2
-        )
-    )
+    d = mprod(state_a.shape[: len(state_a.shape) // 2])
+    state_a = math.reshape(state_a, (d, d))
+    state_b = math.reshape(state_b, (d, d))
+
+    # tr(sqrt(M)) is the sum of the square roots of the eigenvalues of the PSD matrix M,
+    # so only the inner square root needs to be computed explicitly
+    sqrt_a = math.sqrtm(state_a)
+    eigvals = math.eigvalsh(math.matmul(math.matmul(sqrt_a, state_b), sqrt_a))
+    eigvals = math.clip(math.real(eigvals), 0, np.inf)
+    return math.sum(math.sqrt(eigvals)) ** 2
+
+
+def _marginals(probs: Tensor) -> List[Tensor]:
+    r"""Returns the one-mode marginals of a joint probability tensor.
+
+    The sums over the trailing modes are shared between the marginals, so that ``probs`` is
+    traversed about twice rather than once per mode.
+    """
+    num_modes = len(probs.shape)
+    # partial_sums[k] is the sum of probs over the modes k+1, k+2, ...
+    partial_sums = [probs]
+    for _ in range(num_modes - 1):
+        partial_sums.insert(0, math.sum(partial_sums[0], axes=[-1]))
+    return [partial_sums[0]] + [
+        math.sum(partial_sums[k], axes=list(range(k))) for k in range(1, num_modes)
+    ]
 
 
 def number_means(tensor, is_dm: bool):
     r"""Returns the mean of the number operator in each mode."""
-    probs = math.all_diagonals(tensor, real=True) if is_dm else math.abs(tensor) ** 2
-    modes = list(range(len(probs.shape)))
-    marginals = [math.sum(probs, axes=modes[:k] + modes[k + 1 :]) for k in range(len(modes))]
+    probs = math.all_diagonals(tensor, real=True) if is_dm else math.abs_square(tensor)
+    marginals = _marginals(probs)
     return math.astensor(
         [
             math.sum(marginal * math.arange(len(marginal), dtype=math.float64))
@@ -351,9 +412,8 @@ def number_means(tensor, is_dm: bool):
 
 def number_variances(tensor, is_dm: bool):
     r"""Returns the variance of the number operator in each mode."""
-    probs = math.all_diagonals(tensor, real=True) if is_dm else math.abs(tensor) ** 2
-    modes = list(range(len(probs.shape)))
-    marginals = [math.sum(probs, axes=modes[:k] + modes[k + 1 :]) for k in range(len(modes))]
+    probs = math.all_diagonals(tensor, real=True) if is_dm else math.abs_square(tensor)
+    marginals = _marginals(probs)
     return math.astensor(
         [
             (
@@ -368,10 +428,11 @@ def number_variances(tensor, is_dm: bool):
 def purity(dm: Tensor) -> Scalar:
     r"""Returns the purity of a density matrix."""
     cutoffs = dm.shape[: len(dm.shape) // 2]
-    d = int(np.prod(cutoffs))  # combined cutoffs in all modes
+    d = mprod(cutoffs)  # combined cutoffs in all modes
     dm = math.reshape(dm, (d, d))
-    dm = dm / math.trace(dm)  # assumes all nonzero values are included in the density matrix
-    return math.abs(math.sum(math.transpose(dm) * dm))  # tr(rho^2)
+    # tr(rho^2) normalized by tr(rho)^2, which avoids rescaling the whole matrix
+    # (assumes all nonzero values are included in the density matrix)
+    return math.abs(math.einsum("ij,ji->", dm, dm) / math.trace(dm) ** 2)
 
 
 def validate_contraction_indices(in_idx, out_idx, M, name):
@@ -387,6 +448,43 @@ def validate_contraction_indices(in_idx, out_idx, M, name):
         )
 
 
+@lru_cache
+def _sandwich_einsum_str(
+    num_modes: int, in_modes: Tuple[int, ...], out_modes: Tuple[int, ...], operands: str
+) -> str:
+    r"""Returns the einsum string that applies a kraus operator to a density matrix (with operands
+    ``kraus, dm, conj(kraus)``), a choi operator to a ket (with operands ``choi, ket, conj(ket)``)
+    or a choi operator to a density matrix (with operands ``choi, dm``), with the output indices
+    sorted like in ``apply_kraus_to_dm``, ``apply_choi_to_ket`` and ``apply_choi_to_dm``.
+
+    Args:
+        num_modes: the number of modes of the state
+        in_modes: the modes of the operator that contract with the state
+        out_modes: the modes of the operator that are leftover
+        operands: one of ``"kraus_dm"``, ``"choi_ket"`` or ``"choi_dm"``
+
+    Returns:
+        str: the einsum string
+    """
+    letters = iter(string.ascii_letters)
+    left = [next(letters) for _ in range(num_modes)]
+    right = [next(letters) for _ in range(num_modes)]
+    out_left = {m: next(letters) for m in out_modes}
+    out_right = {m: next(letters) for m in out_modes}
+
+    op_left = "".join(out_left[m] for m in out_modes) + "".join(left[m] for m in in_modes)
+    op_right = "".join(out_right[m] for m in out_modes) + "".join(right[m] for m in in_modes)
+    modes = sorted(set(range(num_modes)).difference(in_modes).union(out_modes))
+    result = "".join(out_left.get(m) or left[m] for m in modes) + "".join(
+        out_right.get(m) or right[m] for m in modes
+    )
+    if operands == "choi_ket":
+        return f"{op_left}{op_right},{''.join(left)},{''.join(right)}->{result}"
+    if operands == "choi_dm":
+        return f"{op_left}{op_right},{''.join(left)}{''.join(right)}->{result}"
+    return f"{op_left},{''.join(left)}{''.join(right)},{op_right}->{result}"
+
+
 def apply_kraus_to_ket(kraus, ket, kraus_in_modes, kraus_out_modes=None):
     r"""Applies a kraus operator to a ket.
     It assumes that the ket is indexed as left_1, ..., left_n.
@@ -455,6 +553,14 @@ def apply_kraus_to_dm(kraus, dm, kraus_in_modes, kraus_out_modes=None):
     # check that there are no repeated indices in kraus_in_modes and kraus_out_modes (separately)
     validate_contraction_indices(kraus_in_modes, kraus_out_modes, dm.ndim // 2, "kraus")
 
+    if math.backend_name != "numpy":
+        # a single einsum lets the backend pick the contraction order and skips the final
+        # transpose (with numpy, ``np.einsum`` is slower than the two tensordots below)
+        einsum_str = _sandwich_einsum_str(
+            dm.ndim // 2, tuple(kraus_in_modes), tuple(kraus_out_modes), operands="kraus_dm"
+        )
+        return math.einsum(einsum_str, kraus, dm, math.conj(kraus))
+
     dm = MMTensor(
         dm,
         axis_labels=[f"left_{i}" for i in range(dm.ndim // 2)]
@@ -513,30 +619,12 @@ def apply_choi_to_dm(
     # check that there are no repeated indices in kraus_in_modes and kraus_out_modes (separately)
     validate_contraction_indices(choi_in_modes, choi_out_modes, dm.ndim // 2, "choi")
 
-    dm = MMTensor(
-        dm,
-        axis_labels=[f"in_left_{i}" for i in range(dm.ndim // 2)]
-        + [f"in_right_{i}" for i in range(dm.ndim // 2)],
-    )
-    choi = MMTensor(
-        choi,
-        axis_labels=[f"out_left_{i}" for i in choi_out_modes]
-        + [f"in_left_{i}" for i in choi_in_modes]
-        + [f"out_right_{i}" for i in choi_out_modes]
-        + [f"in_right_{i}" for i in choi_in_modes],
+    # a single einsum contracts the choi matrix with the density matrix and sorts the leftover
+    # indices (first left, then right) in one go
+    einsum_str = _sandwich_einsum_str(
+        dm.ndim // 2, tuple(choi_in_modes), tuple(choi_out_modes), operands="choi_dm"
     )
-
-    # contract the choi matrix with the density matrix.
-    # now the leftover indices are in the order out_left_modes + out_right_modes + uncontracted left indices + uncontracted right indices
-    choi_dm = choi @ dm
-
-    # sort choi_dm.axis_labels by the int at the end of each label, first left, then right
-    left_labels = [label for label in choi_dm.axis_labels if "left" in label]
-    left = sorted(left_labels, key=lambda x: int(x.split("_")[-1]))
-    right_labels = [label for label in choi_dm.axis_labels if "right" in label]
-    right = sorted(right_labels, key=lambda x: int(x.split("_")[-1]))
-
-    return choi_dm.transpose(left + right).tensor
+    return math.einsum(einsum_str, choi, dm)
 
 
 def apply_choi_to_ket(choi, ket, choi_in_modes, choi_out_modes=None):
@@ -564,6 +652,13 @@ def apply_choi_to_ket(choi, ket, choi_in_modes, choi_out_modes=None):
     # check that there are no repeated indices in kraus_in_modes and kraus_out_modes (separately)
     validate_contraction_indices(choi_in_modes, choi_out_modes, ket.ndim, "choi")
 
+    if math.backend_name != "numpy":
+        # see ``apply_kraus_to_dm``
+        einsum_str = _sandwich_einsum_str(
+            ket.ndim, tuple(choi_in_modes), tuple(choi_out_modes), operands="choi_ket"
+        )
+        return math.einsum(einsum_str, choi, ket, math.conj(ket))
+
     ket = MMTensor(ket, axis_labels=[f"left_{i}" for i in range(ket.ndim)])
     ket_dual = MMTensor(math.conj(ket.tensor), axis_labels=[f"right_{i}" for i in range(ket.ndim)])
     choi = MMTensor(
@@ -650,7 +745,7 @@ def normalize(fock: Tensor, is_dm: bool):
     if is_dm:
         return fock / math.sum(math.all_diagonals(fock, real=False))
 
-    return fock / math.sum(math.norm(fock))
+    return fock / math.norm(fock)
 
 
 def norm(state: Tensor, is_dm: bool):
@@ -669,10 +764,29 @@ def norm(state: Tensor, is_dm: bool):
 def is_mixed_dm(dm):
     r"""Evaluates if a density matrix represents a mixed state."""
     cutoffs = dm.shape[: len(dm.shape) // 2]
-    square = math.reshape(dm, (int(np.prod(cutoffs)), -1))
+    square = math.reshape(dm, (mprod(cutoffs), -1))
     return not np.isclose(math.sum(square * math.transpose(square)), 1.0)
 
 
+@lru_cache
+def _trace_einsum_str(N: int, keep: Tuple[int, ...]) -> str:
+    r"""Returns the einsum string of the partial trace of an ``N``-mode density matrix.
+
+    Args:
+        N: the number of modes of the density matrix
+        keep: the modes to keep
+
+    Returns:
+        str: the einsum string, e.g. ``"abcdbf->acdf"`` for ``N=3`` and ``keep=(0, 2)``
+    """
+    out = string.ascii_letters[:N]
+    inp = "".join(string.ascii_letters[N + i] if i in keep else out[i] for i in range(N))
+    result = "".join(out[i] for i in range(N) if i in keep) + "".join(
+        inp[i] for i in range(N) if i in keep
+    )
+    return f"{out}{inp}->{result}"
+
+
 def trace(dm, keep: List[int]):
     r"""Computes the partial trace of a density matrix.
     The indices of the density matrix are in the order (out0, ..., outN-1, in0, ..., inN-1).
@@ -683,14 +797,7 @@ def trace(dm, keep: List[int]):
         dm: the density matrix
         keep: the modes to keep (0-based)
     """
-    dm = MMTensor(
-        dm,
-        axis_labels=[
-            f"out_{i}" if i in keep else f"contract_{i}" for i in range(len(dm.shape) // 2)
-        ]
-        + [f"in_{i}" if i in keep else f"contract_{i}" for i in range(len(dm.shape) // 2)],
-    )
-    return dm.contract().tensor
+    return math.einsum(_trace_einsum_str(len(dm.shape) // 2, tuple(keep)), dm)
 
 
 @tensor_int_cache
@@ -728,16 +835,15 @@ def oscillator_eigenstate(q: Vector, cutoff: int) -> Tensor:
         math.complex128,
     )
 
-    # Renormalized physicist hermite polys: Hn / sqrt(n!)
+    # Renormalized physicist hermite polys: Hn / sqrt(n!), for all the points of x at once
+    # (batched on the last index)
     R = -np.array([[2 + 0j]])  # to get the physicist polys
-
-    def f_hermite_polys(xi):
-        return math.hermite_renormalized(R, math.astensor([2 * xi]), 1 + 0j, [cutoff])
-
-    hermite_polys = math.map_fn(f_hermite_polys, x)
+    hermite_polys = math.hermite_renormalized_batch(
+        R, math.astensor([2 * x]), 1 + 0j, shape=(cutoff, len(x))
+    )
 
     # (real) wavefunction
-    psi = math.exp(-(x**2 / 2)) * math.transpose(prefactor * hermite_polys)
+    psi = math.exp(-(x**2 / 2)) * math.expand_dims(prefactor, 1) * math.astensor(hermite_polys)
     return psi
 
 
@@ -860,22 +966,26 @@ def quadrature_distribution(
     pdf = (
         math.einsum("nm,nj,mj->j", state, psi_x, psi_x)
         if is_dm
-        else math.abs(math.einsum("n,nj->j", state, psi_x)) ** 2
+        else math.abs_square(math.einsum("n,nj->j", state, psi_x))
     )
 
     return x, math.real(pdf)
 
 
-def sample_homodyne(state: Tensor, quadrature_angle: float = 0.0) -> Tuple[float, float]:
+def sample_homodyne(
+    state: Tensor, quadrature_angle: float = 0.0, shots: Optional[int] = None
+) -> Tuple[float, float]:
     r"""Given a single-mode state, it generates the pdf of :math:`\tr [ \rho |x_\phi><x_\phi| ]`
     where `\rho` is the reduced density matrix of the state.
 
     Args:
         state (Tensor): ket or density matrix of the state being measured
         quadrature_angle (float): angle of the quadrature distribution
+        shots (optional int): if given, the number of outcomes to draw at once from the same pdf
 
     Returns:
-        tuple(float, float): outcome and probability of the outcome
+        tuple(float, float): outcome and probability of the outcome (vectors of length ``shots``
+        if ``shots`` is given)
     """
     dims = len(state.shape)
     if dims > 2:
@@ -888,7 +998,7 @@ def sample_homodyne(state: Tensor, quadrature_angle: float = 0.0) -> Tuple[float
 
     # draw a sample from the distribution
     pdf = math.Categorical(probs=probs, name="homodyne_dist")
-    sample_idx = pdf.sample()
+    sample_idx = pdf.sample() if shots is None else pdf.sample(shots)
     homodyne_sample = math.gather(x, sample_idx)
     probability_sample = math.gather(probs, sample_idx)
 
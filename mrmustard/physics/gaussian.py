@@ -16,11 +16,14 @@
 This module contains functions for performing calculations on objects in the Gaussian representations.
 """
 
+from functools import lru_cache
 from typing import Any, Optional, Sequence, Tuple, Union
 
+import numpy as np
+from numba import njit
+
 from mrmustard import math, settings
-from mrmustard.math.tensor_wrappers.xptensor import XPMatrix, XPVector
-from mrmustard.utils.typing import Matrix, Scalar, Vector
+from mrmustard.utils.typing import Matrix, Scalar, Tensor, Vector
 
 #  ~~~~~~
 #  States
@@ -36,7 +39,7 @@ def vacuum_cov(num_modes: int) -> Matrix:
     Returns:
         Matrix: vacuum covariance matrix
     """
-    return math.eye(num_modes * 2, dtype=math.float64) * settings.HBAR / 2
+    return math.astensor(np.eye(num_modes * 2) * (settings.HBAR / 2), dtype=math.float64)
 
 
 def vacuum_means(num_modes: int) -> Tuple[Matrix, Vector]:
@@ -48,10 +51,7 @@ def vacuum_means(num_modes: int) -> Tuple[Matrix, Vector]:
     Returns:
         Matrix, Vector: thermal state covariance matrix or means vector
     """
-    return displacement(
-        math.zeros(num_modes, dtype="float64"),
-        math.zeros(num_modes, dtype="float64"),
-    )
+    return math.zeros(num_modes * 2, dtype=math.float64)
 
 
 def squeezed_vacuum_cov(r: Vector, phi: Vector) -> Matrix:
@@ -66,8 +66,24 @@ def squeezed_vacuum_cov(r: Vector, phi: Vector) -> Matrix:
     Returns:
         Matrix, Vector: thermal state covariance matrix or means vector
     """
-    S = squeezing_symplectic(r, phi)
-    return math.matmul(S, math.transpose(S)) * settings.HBAR / 2
+    r = math.atleast_1d(r, math.float64)
+    phi = math.atleast_1d(phi, math.float64)
+    if r.shape[-1] == 1:
+        r = math.tile(r, phi.shape)
+    if phi.shape[-1] == 1:
+        phi = math.tile(phi, r.shape)
+    # S @ S.T for the squeezing symplectic S, computed only on the diagonals of its blocks
+    ch = math.cosh(r)
+    sh = math.sinh(r)
+    cpsh = math.cos(phi) * sh
+    spsh = math.sin(phi) * sh
+    s_xx = ch - cpsh
+    s_pp = ch + cpsh
+    spsh2 = spsh * spsh
+    xp = -2 * ch * spsh
+    return _xxpp_from_diagonals(s_xx * s_xx + spsh2, xp, xp, s_pp * s_pp + spsh2) * (
+        settings.HBAR / 2
+    )
 
 
 def thermal_cov(nbar: Vector) -> Tuple[Matrix, Vector]:
@@ -81,8 +97,8 @@ def thermal_cov(nbar: Vector) -> Tuple[Matrix, Vector]:
     Returns:
         Matrix, Vector: thermal state covariance matrix or means vector
     """
-    g = (2 * math.atleast_1d(nbar) + 1) * settings.HBAR / 2
-    return math.diag(math.concat([g, g], axis=-1))
+    g = math.atleast_1d(nbar) * settings.HBAR + settings.HBAR / 2
+    return math.diag(math.tile(g, [2]))
 
 
 def two_mode_squeezed_vacuum_cov(r: Vector, phi: Vector) -> Matrix:
@@ -98,8 +114,9 @@ def two_mode_squeezed_vacuum_cov(r: Vector, phi: Vector) -> Matrix:
         Matrix: two-mode squeezed state covariance matrix
         Vector: two-mode squeezed state means vector
     """
-    S = two_mode_squeezing_symplectic(r, phi)
-    return math.matmul(S, math.transpose(S)) * settings.HBAR / 2
+    # the two-mode squeezing symplectic S(r, phi) is symmetric and S(r, phi) @ S(r, phi) is
+    # S(2r, phi), so S @ S.T is built directly instead of through a matrix product
+    return two_mode_squeezing_symplectic(2 * r, phi) * settings.HBAR / 2
 
 
 def gaussian_cov(symplectic: Matrix, eigenvalues: Vector = None) -> Matrix:
@@ -126,10 +143,73 @@ def gaussian_cov(symplectic: Matrix, eigenvalues: Vector = None) -> Matrix:
 # ~~~~~~~~~~~~~~~~~~~~~~~~
 
 
+@lru_cache()
+def _xxpp_diagonal_indices(num_modes: int) -> np.ndarray:
+    r"""The indices of the diagonals of the ``xx``, ``xp``, ``px`` and ``pp`` blocks of a
+    :math:`2N\times 2N` matrix, with shape ``(4, N, 2)``."""
+    i = np.arange(num_modes)
+    j = i + num_modes
+    indices = np.stack([np.stack(pair, axis=-1) for pair in ((i, i), (i, j), (j, i), (j, j))])
+    indices.flags.writeable = False
+    return indices
+
+
+def _xxpp_from_diagonals(xx: Vector, xp: Vector, px: Vector, pp: Vector) -> Matrix:
+    r"""Returns the :math:`2N\times 2N` matrix whose ``xx``, ``xp``, ``px`` and ``pp`` blocks are
+    diagonal, with the given diagonals. The diagonals are written into a single zero matrix.
+    Leading batch dimensions of the diagonals are kept in front of the matrix dimensions.
+    """
+    num_modes = xx.shape[-1]
+    batch_shape = tuple(xx.shape[:-1])
+    indices = _xxpp_diagonal_indices(num_modes)
+    diagonals = math.astensor([xx, xp, px, pp], dtype=xx.dtype)
+    if math.backend_name == "numpy":
+        matrix = np.zeros(batch_shape + (2 * num_modes, 2 * num_modes), dtype=diagonals.dtype)
+        matrix[..., indices[..., 0], indices[..., 1]] = np.moveaxis(diagonals, 0, -2)
+        return matrix
+    if not batch_shape:
+        return math.update_tensor(
+            math.zeros((2 * num_modes, 2 * num_modes), dtype=diagonals.dtype), indices, diagonals
+        )
+    # the scatter indexes the leading axes, so the batch axes are moved last while scattering
+    nb = len(batch_shape)
+    diagonals = math.transpose(diagonals, [0, nb + 1] + list(range(1, nb + 1)))
+    matrix = math.update_tensor(
+        math.zeros((2 * num_modes, 2 * num_modes) + batch_shape, dtype=diagonals.dtype),
+        indices,
+        diagonals,
+    )
+    return math.transpose(matrix, list(range(2, nb + 2)) + [0, 1])
+
+
+def _batch_first(matrix: Tensor) -> Tensor:
+    r"""Moves the trailing batch axes of a matrix built from a nested list of batched entries,
+    i.e. with shape ``(n, m, ...)``, in front of the matrix axes."""
+    ndim = len(matrix.shape)
+    if ndim == 2:
+        return matrix
+    return math.transpose(matrix, list(range(2, ndim)) + [0, 1])
+
+
+@njit
+def _rotation_symplectic_numba(angle: np.ndarray) -> np.ndarray:  # pragma: no cover
+    r"""Numba kernel for :func:`rotation_symplectic` with a vector of angles."""
+    N = angle.shape[0]
+    S = np.zeros((2 * N, 2 * N))
+    for i in range(N):
+        c = np.cos(angle[i])
+        s = np.sin(angle[i])
+        S[i, i] = S[i + N, i + N] = c
+        S[i, i + N] = -s
+        S[i + N, i] = s
+    return S
+
+
 def rotation_symplectic(angle: Union[Scalar, Vector]) -> Matrix:
     r"""Symplectic matrix of a rotation gate.
 
-    The dimension depends on the dimension of the angle.
+    The dimension depends on the dimension of the angle. Leading batch dimensions of
+    ``angle`` (shape ``(..., N)``) are kept in front of the ``(2N, 2N)`` matrix dimensions.
 
     Args:
         angle (scalar or vector): rotation angles
@@ -137,21 +217,42 @@ def rotation_symplectic(angle: Union[Scalar, Vector]) -> Matrix:
     Returns:
         Tensor: symplectic matrix of a rotation gate
     """
+    if math.backend_name == "numpy" and np.ndim(angle) < 2:
+        return _rotation_symplectic_numba(np.atleast_1d(np.asarray(angle, dtype=np.float64)))
+
     angle = math.atleast_1d(angle)
-    num_modes = angle.shape[-1]
     x = math.cos(angle)
     y = math.sin(angle)
-    return (
-        math.diag(math.concat([x, x], axis=0))
-        + math.diag(-y, k=num_modes)
-        + math.diag(y, k=-num_modes)
-    )
+    return _xxpp_from_diagonals(x, -y, y, x)
+
+
+@njit
+def _squeezing_symplectic_numba(r: np.ndarray, phi: np.ndarray) -> np.ndarray:  # pragma: no cover
+    r"""Numba kernel for :func:`squeezing_symplectic` with vectors of parameters. A vector of
+    length one is broadcast against the other."""
+    if r.shape[0] != phi.shape[0] and r.shape[0] != 1 and phi.shape[0] != 1:
+        raise ValueError("r and phi must have the same length or length one")
+    N = max(r.shape[0], phi.shape[0])
+    S = np.zeros((2 * N, 2 * N))
+    for i in range(N):
+        ri = r[i if r.shape[0] > 1 else 0]
+        phii = phi[i if phi.shape[0] > 1 else 0]
+        ch = np.cosh(ri)
+        sh = np.sinh(ri)
+        cpsh = np.cos(phii) * sh
+        spsh = np.sin(phii) * sh
+        S[i, i] = ch - cpsh
+        S[i, i + N] = S[i + N, i] = -spsh
+        S[i + N, i + N] = ch + cpsh
+    return S
 
 
 def squeezing_symplectic(r: Union[Scalar, Vector], phi: Union[Scalar, Vector]) -> Matrix:
     r"""Symplectic matrix of a squeezing gate.
 
-    The dimension depends on the dimension of ``r`` and ``phi``.
+    The dimension depends on the dimension of ``r`` and ``phi``, which are broadcast against
+    each other. Leading batch dimensions (shape ``(..., N)``) are kept in front of the
+    ``(2N, 2N)`` matrix dimensions.
 
     Args:
         r (scalar or vector): squeezing magnitude
@@ -160,29 +261,26 @@ def squeezing_symplectic(r: Union[Scalar, Vector], phi: Union[Scalar, Vector]) -
     Returns:
         Tensor: symplectic matrix of a squeezing gate
     """
+    if math.backend_name == "numpy" and np.ndim(r) < 2 and np.ndim(phi) < 2:
+        return _squeezing_symplectic_numba(
+            np.atleast_1d(np.asarray(r, dtype=np.float64)),
+            np.atleast_1d(np.asarray(phi, dtype=np.float64)),
+        )
+
     r = math.atleast_1d(r, math.float64)
     phi = math.atleast_1d(phi, math.float64)
-    if r.shape[-1] == 1:
-        r = math.tile(r, phi.shape)
-    if phi.shape[-1] == 1:
-        phi = math.tile(phi, r.shape)
-    num_modes = phi.shape[-1]
-    cp = math.cos(phi)
-    sp = math.sin(phi)
     ch = math.cosh(r)
     sh = math.sinh(r)
-    cpsh = cp * sh
-    spsh = sp * sh
-    return (
-        math.diag(math.concat([ch - cpsh, ch + cpsh], axis=0))
-        + math.diag(-spsh, k=num_modes)
-        + math.diag(-spsh, k=-num_modes)
-    )
+    # every diagonal depends on both r and phi, so broadcasting replaces tiling
+    cpsh = math.cos(phi) * sh
+    spsh = math.sin(phi) * sh
+    return _xxpp_from_diagonals(ch - cpsh, -spsh, -spsh, ch + cpsh)
 
 
 def displacement(x: Union[Scalar, Vector], y: Union[Scalar, Vector]) -> Vector:
     r"""Returns the displacement vector for a displacement by :math:`alpha = x + iy`.
-    The dimension depends on the dimensions of ``x`` and ``y``.
+    The dimension depends on the dimensions of ``x`` and ``y``. Leading batch dimensions
+    (shape ``(..., N)``) are kept in front of the ``2N`` vector dimension.
 
     Args:
         x (scalar or vector): real part of displacement (in units of :math:`\sqrt{\hbar}`)
@@ -194,16 +292,65 @@ def displacement(x: Union[Scalar, Vector], y: Union[Scalar, Vector]) -> Vector:
     x = math.atleast_1d(x, math.float64)
     y = math.atleast_1d(y, math.float64)
     if x.shape[-1] == 1:
-        x = math.tile(x, y.shape)
+        x = math.tile(x, (1,) * (len(x.shape) - 1) + (y.shape[-1],))
     if y.shape[-1] == 1:
-        y = math.tile(y, x.shape)
-    return math.sqrt(2 * settings.HBAR, dtype=x.dtype) * math.concat([x, y], axis=0)
+        y = math.tile(y, (1,) * (len(y.shape) - 1) + (x.shape[-1],))
+    return np.sqrt(2 * settings.HBAR) * math.concat([x, y], axis=-1)
+
+
+@njit
+def _beam_splitter_symplectic_numba(theta: float, phi: float) -> np.ndarray:  # pragma: no cover
+    r"""Numba kernel for :func:`beam_splitter_symplectic` with scalar parameters."""
+    ct = np.cos(theta)
+    st = np.sin(theta)
+    cpst = np.cos(phi) * st
+    spst = np.sin(phi) * st
+    S = np.zeros((4, 4))
+    S[0, 0] = S[1, 1] = S[2, 2] = S[3, 3] = ct
+    S[0, 1] = S[2, 3] = -cpst
+    S[1, 0] = S[3, 2] = cpst
+    S[0, 3] = S[1, 2] = -spst
+    S[2, 1] = S[3, 0] = spst
+    return S
+
+
+@njit
+def _mz_symplectic_numba(
+    phi_a: float, phi_b: float, internal: bool
+) -> np.ndarray:  # pragma: no cover
+    r"""Numba kernel for :func:`mz_symplectic` with scalar parameters."""
+    ca = np.cos(phi_a)
+    sa = np.sin(phi_a)
+    cb = np.cos(phi_b)
+    sb = np.sin(phi_b)
+    if internal:
+        S = np.array(
+            [
+                [ca - cb, -sa - sb, sb - sa, -ca - cb],
+                [-sa - sb, cb - ca, -ca - cb, sa - sb],
+                [sa - sb, ca + cb, ca - cb, -sa - sb],
+                [ca + cb, sb - sa, -sa - sb, cb - ca],
+            ]
+        )
+    else:
+        cp = np.cos(phi_a + phi_b)
+        sp = np.sin(phi_a + phi_b)
+        S = np.array(
+            [
+                [cp - ca, -sb, sa - sp, -1 - cb],
+                [-sa - sp, 1 - cb, -ca - cp, sb],
+                [sp - sa, 1 + cb, cp - ca, -sb],
+                [cp + ca, -sb, -sa - sp, 1 - cb],
+            ]
+        )
+    return 0.5 * S
 
 
 def beam_splitter_symplectic(theta: Scalar, phi: Scalar) -> Matrix:
     r"""Symplectic matrix of a Beam-splitter gate.
 
-    The dimension is :math:`4\times 4`.
+    The dimension is :math:`4\times 4`. If ``theta`` and ``phi`` have a (common) batch shape,
+    it is kept in front of the matrix dimensions.
 
     Args:
         theta: transmissivity parameter
@@ -212,18 +359,23 @@ def beam_splitter_symplectic(theta: Scalar, phi: Scalar) -> Matrix:
     Returns:
         Matrix: symplectic (orthogonal) matrix of a beam-splitter gate
     """
+    if math.backend_name == "numpy" and np.ndim(theta) == 0 and np.ndim(phi) == 0:
+        return _beam_splitter_symplectic_numba(float(theta), float(phi))
+
     ct = math.cos(theta)
     st = math.sin(theta)
     cp = math.cos(phi)
     sp = math.sin(phi)
     zero = math.zeros_like(theta)
-    return math.astensor(
-        [
-            [ct, -cp * st, zero, -sp * st],
-            [cp * st, ct, -sp * st, zero],
-            [zero, sp * st, ct, -cp * st],
-            [sp * st, zero, cp * st, ct],
-        ]
+    return _batch_first(
+        math.astensor(
+            [
+                [ct, -cp * st, zero, -sp * st],
+                [cp * st, ct, -sp * st, zero],
+                [zero, sp * st, ct, -cp * st],
+                [sp * st, zero, cp * st, ct],
+            ]
+        )
     )
 
 
@@ -237,6 +389,9 @@ def mz_symplectic(phi_a: Scalar, phi_b: Scalar, internal: bool = False) -> Matri
         * if `internal = False` (default), both phases act on the upper arm:
             ``phi_a`` before the first BS, ``phi_b`` after the first BS.
 
+    If ``phi_a`` and ``phi_b`` have a (common) batch shape, it is kept in front of the
+    matrix dimensions.
+
     Args:
         phi_a (float): first phase
         phi_b (float): second phase
@@ -245,6 +400,9 @@ def mz_symplectic(phi_a: Scalar, phi_b: Scalar, internal: bool = False) -> Matri
     Returns:
         Matrix: symplectic (orthogonal) matrix of a Mach-Zehnder interferometer
     """
+    if math.backend_name == "numpy" and np.ndim(phi_a) == 0 and np.ndim(phi_b) == 0:
+        return _mz_symplectic_numba(float(phi_a), float(phi_b), internal)
+
     ca = math.cos(phi_a)
     sa = math.sin(phi_a)
     cb = math.cos(phi_b)
@@ -253,29 +411,49 @@ def mz_symplectic(phi_a: Scalar, phi_b: Scalar, internal: bool = False) -> Matri
     sp = math.sin(phi_a + phi_b)
 
     if internal:
-        return 0.5 * math.astensor(
+        return 0.5 * _batch_first(
+            math.astensor(
+                [
+                    [ca - cb, -sa - sb, sb - sa, -ca - cb],
+                    [-sa - sb, cb - ca, -ca - cb, sa - sb],
+                    [sa - sb, ca + cb, ca - cb, -sa - sb],
+                    [ca + cb, sb - sa, -sa - sb, cb - ca],
+                ]
+            )
+        )
+
+    return 0.5 * _batch_first(
+        math.astensor(
             [
-                [ca - cb, -sa - sb, sb - sa, -ca - cb],
-                [-sa - sb, cb - ca, -ca - cb, sa - sb],
-                [sa - sb, ca + cb, ca - cb, -sa - sb],
-                [ca + cb, sb - sa, -sa - sb, cb - ca],
+                [cp - ca, -sb, sa - sp, -1 - cb],
+                [-sa - sp, 1 - cb, -ca - cp, sb],
+                [sp - sa, 1 + cb, cp - ca, -sb],
+                [cp + ca, -sb, -sa - sp, 1 - cb],
             ]
         )
-
-    return 0.5 * math.astensor(
-        [
-            [cp - ca, -sb, sa - sp, -1 - cb],
-            [-sa - sp, 1 - cb, -ca - cp, sb],
-            [sp - sa, 1 + cb, cp - ca, -sb],
-            [cp + ca, -sb, -sa - sp, 1 - cb],
-        ]
     )
 
 
+@njit
+def _two_mode_squeezing_symplectic_numba(r: float, phi: float) -> np.ndarray:  # pragma: no cover
+    r"""Numba kernel for :func:`two_mode_squeezing_symplectic` with scalar parameters."""
+    ch = np.cosh(r)
+    sh = np.sinh(r)
+    cpsh = np.cos(phi) * sh
+    spsh = np.sin(phi) * sh
+    S = np.zeros((4, 4))
+    S[0, 0] = S[1, 1] = S[2, 2] = S[3, 3] = ch
+    S[0, 1] = S[1, 0] = cpsh
+    S[2, 3] = S[3, 2] = -cpsh
+    S[0, 3] = S[1, 2] = S[2, 1] = S[3, 0] = spsh
+    return S
+
+
 def two_mode_squeezing_symplectic(r: Scalar, phi: Scalar) -> Matrix:
     r"""Symplectic matrix of a two-mode squeezing gate.
 
-    The dimension is :math:`4\times 4`.
+    The dimension is :math:`4\times 4`. If ``r`` and ``phi`` have a (common) batch shape,
+    it is kept in front of the matrix dimensions.
 
     Args:
         r (float): squeezing magnitude
@@ -284,18 +462,23 @@ def two_mode_squeezing_symplectic(r: Scalar, phi: Scalar) -> Matrix:
     Returns:
         Matrix: symplectic matrix of a two-mode squeezing gate
     """
+    if math.backend_name == "numpy" and np.ndim(r) == 0 and np.ndim(phi) == 0:
+        return _two_mode_squeezing_symplectic_numba(float(r), float(phi))
+
     cp = math.cast(math.cos(phi), math.float64)
     sp = math.cast(math.sin(phi), math.float64)
     ch = math.cast(math.cosh(r), math.float64)
     sh = math.cast(math.sinh(r), math.float64)
     zero = math.cast(math.zeros_like(math.asnumpy(r)), math.float64)
-    return math.astensor(
-        [
-            [ch, cp * sh, zero, sp * sh],
-            [cp * sh, ch, sp * sh, zero],
-            [zero, sp * sh, ch, -cp * sh],
-            [sp * sh, zero, -cp * sh, ch],
-        ]
+    return _batch_first(
+        math.astensor(
+            [
+                [ch, cp * sh, zero, sp * sh],
+                [cp * sh, ch, sp * sh, zero],
+                [zero, sp * sh, ch, -cp * sh],
+                [sp * sh, zero, -cp * sh, ch],
+            ]
+        )
     )
 
 
@@ -382,6 +565,33 @@ def controlled_X(g: Scalar):
 # ~~~~~~~~~~~~~
 
 
+def _CPTP_numpy(
+    cov: np.ndarray,
+    means: np.ndarray,
+    X: Optional[np.ndarray],
+    Y: Optional[np.ndarray],
+    d: Optional[np.ndarray],
+    indices: Sequence[int],
+) -> Tuple[np.ndarray, np.ndarray]:
+    r"""Numpy implementation of :func:`CPTP` once the channel matrices are on ``indices``.
+    The rows and columns of the channel modes are updated in place on copies of ``cov`` and
+    ``means``, without building the full index lists of the backend helpers.
+    """
+    N = cov.shape[-1] // 2
+    idx = np.array(indices + [i + N for i in indices])
+    cov = np.array(cov)
+    means = np.array(means)
+    if X is not None:
+        cov[idx] = X @ cov[idx]
+        cov[:, idx] = cov[:, idx] @ X.T
+        means[idx] = X @ means[idx]
+    if Y is not None:
+        cov[idx[:, None], idx] += Y
+    if d is not None:
+        means[idx] += d
+    return cov, means
+
+
 def CPTP(
     cov: Matrix,
     means: Vector,
@@ -422,8 +632,16 @@ def CPTP(
     if d is not None and d.shape[-1] == 2:
         d = math.single_mode_to_multimode_vec(d, len(transf_modes))
     indices = [state_modes.index(i) for i in transf_modes]
+    if math.backend_name == "numpy":
+        return _CPTP_numpy(cov, means, X, Y, d, indices)
+    if X is not None and indices == list(range(cov.shape[-1] // 2)):
+        # the channel acts on all the modes in order: no gathers or scatters are needed
+        cov = math.matmul(math.matmul(X, cov), math.transpose(X))
+        means = math.matvec(X, means)
+        return math.add_at_modes(cov, Y, indices), math.add_at_modes(means, d, indices)
     cov = math.left_matmul_at_modes(X, cov, indices)
-    cov = math.right_matmul_at_modes(cov, math.transpose(X), indices)
+    # same as ``math.right_matmul_at_modes(cov, math.transpose(X), indices)`` without transposing X twice
+    cov = math.transpose(math.left_matmul_at_modes(X, math.transpose(cov), indices))
     cov = math.add_at_modes(cov, Y, indices)
     means = math.matvec_at_modes(X, means, indices)
     means = math.add_at_modes(means, d, indices)
@@ -573,43 +791,67 @@ def general_dyne(
     N, M = cov.shape[-1] // 2, proj_cov.shape[-1] // 2
     # Bmodes are the modes being measured and Amodes are the leftover modes
     Bmodes = modes or list(range(M))
-    Amodes = list(set(list(range(N))) - set(Bmodes))
-
-    A, B, AB = partition_cov(cov, Amodes)
-    a, b = partition_means(means, Amodes)
-    reduced_cov = B + proj_cov
+    Amodes = tuple(sorted(set(range(N)) - set(Bmodes)))
 
     # covariances are divided by 2 to match tensorflow and MrMustard conventions
     # (MrMustard uses Serafini convention where `sigma_MM = 2 sigma_TF`)
     if proj_means is None:
-        pdf = math.MultivariateNormalTriL(loc=b, scale_tril=math.cholesky(reduced_cov / 2))
-        outcome = (
-            pdf.sample(dtype=cov.dtype) if proj_means is None else math.cast(proj_means, cov.dtype)
+        _, Bindices = _partition_indices(N, Amodes)
+        reduced_cov = math.gather2d(cov, Bindices, Bindices) + proj_cov
+        pdf = math.MultivariateNormalTriL(
+            loc=math.gather(means, Bindices), scale_tril=math.cholesky(reduced_cov / 2)
+        )
+        outcome = pdf.sample(dtype=cov.dtype)
+        _, new_cov, new_means = _general_dyne_update(
+            cov, means, proj_cov, outcome, Amodes, settings.HBAR
         )
         prob = pdf.prob(outcome)
     else:
-        # If the projector is already given: proj_means
-        # use the formula 5.139 in Serafini - Quantum Continuous Variables
-        # fixed by -0.5 on the exponential, added hbar and removed pi due to different convention
         outcome = proj_means
-        prob = (
-            settings.HBAR**M
-            * math.exp(
-                -0.5 * math.sum(math.solve(reduced_cov, (proj_means - b)) * (proj_means - b))
-            )
-            / math.sqrt(math.det(reduced_cov))
+        prob, new_cov, new_means = _general_dyne_update(
+            cov, means, proj_cov, math.cast(proj_means, cov.dtype), Amodes, settings.HBAR
         )
 
-    # calculate conditional output state of unmeasured modes
-    num_remaining_modes = N - M
-    if num_remaining_modes == 0:
-        return outcome, prob, None, None
+    return outcome, prob, new_cov, new_means
 
-    AB_inv = math.matmul(AB, math.inv(reduced_cov))
-    new_cov = A - math.matmul(AB_inv, math.transpose(AB))
-    new_means = a + math.matvec(AB_inv, outcome - b)
 
-    return outcome, prob, new_cov, new_means
+@math.jit
+def _general_dyne_update(
+    cov: Matrix,
+    means: Vector,
+    proj_cov: Matrix,
+    outcome: Vector,
+    Amodes: Tuple[int, ...],
+    hbar: float,
+) -> Tuple[Scalar, Optional[Matrix], Optional[Vector]]:
+    r"""The outcome probability and the conditional state of the unmeasured modes ``Amodes``
+    of a general-dyne measurement with the given outcome. Compiled into a single graph on the
+    tensorflow backend (see :meth:`~.BackendManager.jit`).
+    """
+    M = proj_cov.shape[-1] // 2
+    A, B, AB = partition_cov(cov, Amodes)
+    a, b = partition_means(means, Amodes)
+    reduced_cov = B + proj_cov
+    diff = outcome - b
+
+    # use the formula 5.139 in Serafini - Quantum Continuous Variables
+    # fixed by -0.5 on the exponential, added hbar and removed pi due to different convention
+    prob = (
+        hbar**M
+        * math.exp(-0.5 * math.sum(math.solve(reduced_cov, diff) * diff))
+        / math.sqrt(math.det(reduced_cov))
+    )
+
+    # calculate conditional output state of unmeasured modes
+    if not Amodes:
+        return prob, None, None
+
+    # reduced_cov is symmetric, so solving against AB^T gives (AB reduced_cov^-1)^T
+    # without forming the inverse
+    X = math.solve(reduced_cov, math.transpose(AB))
+    new_cov = A - math.matmul(AB, X)
+    new_means = a + math.matvec(math.transpose(X), diff)
+    return prob, new_cov, new_means
 
 
 # ~~~~~~~~~
@@ -656,6 +898,21 @@ def number_cov(cov: Matrix, means: Vector) -> Matrix:
     )
 
 
+@lru_cache()
+def _partition_indices(num_modes: int, Amodes: Tuple[int, ...]) -> Tuple[np.ndarray, np.ndarray]:
+    r"""The (read-only) phase space indices, in ``xxpp`` ordering, of the modes in ``Amodes`` and
+    of the remaining modes."""
+    Amodes = np.array(Amodes, dtype=np.int32)
+    mask = np.ones(num_modes, dtype=bool)
+    mask[Amodes] = False
+    Bmodes = np.flatnonzero(mask).astype(np.int32)
+    Aindices = np.concatenate([Amodes, Amodes + num_modes])
+    Bindices = np.concatenate([Bmodes, Bmodes + num_modes])
+    Aindices.flags.writeable = False
+    Bindices.flags.writeable = False
+    return Aindices, Bindices
+
+
 def trace(cov: Matrix, means: Vector, Bmodes: Sequence[int]) -> Tuple[Matrix, Vector]:
     r"""Returns the covariances and means after discarding the specified modes.
 
@@ -667,14 +924,8 @@ def trace(cov: Matrix, means: Vector, Bmodes: Sequence[int]) -> Tuple[Matrix, Ve
     Returns:
         Tuple[Matrix, Vector]: the covariance matrix and the means vector after discarding the specified modes
     """
-    N = len(cov) // 2
-    Aindices = math.astensor(
-        [i for i in range(N) if i not in Bmodes] + [i + N for i in range(N) if i not in Bmodes],
-        dtype=math.int32,
-    )
-    A_cov_block = math.gather(math.gather(cov, Aindices, axis=0), Aindices, axis=1)
-    A_means_vec = math.gather(means, Aindices)
-    return A_cov_block, A_means_vec
+    _, Aindices = _partition_indices(cov.shape[-1] // 2, tuple(Bmodes))
+    return math.gather2d(cov, Aindices, Aindices), math.gather(means, Aindices)
 
 
 def partition_cov(cov: Matrix, Amodes: Sequence[int]) -> Tuple[Matrix, Matrix, Matrix]:
@@ -687,15 +938,10 @@ def partition_cov(cov: Matrix, Amodes: Sequence[int]) -> Tuple[Matrix, Matrix, M
     Returns:
         Tuple[Matrix, Matrix, Matrix]: the cov of ``A``, the cov of ``B`` and the AB block
     """
-    N = cov.shape[-1] // 2
-    Bindices = math.cast(
-        [i for i in range(N) if i not in Amodes] + [i + N for i in range(N) if i not in Amodes],
-        "int32",
-    )
-    Aindices = math.cast(Amodes + [i + N for i in Amodes], "int32")
-    A_block = math.gather(math.gather(cov, Aindices, axis=1), Aindices, axis=0)
-    B_block = math.gather(math.gather(cov, Bindices, axis=1), Bindices, axis=0)
-    AB_block = math.gather(math.gather(cov, Bindices, axis=1), Aindices, axis=0)
+    Aindices, Bindices = _partition_indices(cov.shape[-1] // 2, tuple(Amodes))
+    A_block = math.gather2d(cov, Aindices, Aindices)
+    B_block = math.gather2d(cov, Bindices, Bindices)
+    AB_block = math.gather2d(cov, Aindices, Bindices)
     return A_block, B_block, AB_block
 
 
@@ -709,12 +955,7 @@ def partition_means(means: Vector, Amodes: Sequence[int]) -> Tuple[Vector, Vecto
     Returns:
         Tuple[Vector, Vector]: the means of ``A`` and the means of ``B``
     """
-    N = len(means) // 2
-    Bindices = math.cast(
-        [i for i in range(N) if i not in Amodes] + [i + N for i in range(N) if i not in Amodes],
-        "int32",
-    )
-    Aindices = math.cast(Amodes + [i + N for i in Amodes], "int32")
+    Aindices, Bindices = _partition_indices(means.shape[-1] // 2, tuple(Amodes))
     return math.gather(means, Aindices), math.gather(means, Bindices)
 
 
@@ -727,7 +968,9 @@ def purity(cov: Matrix) -> Scalar:
     Returns:
         float: the purity
     """
-    return 1 / math.sqrt(math.det((2 / settings.HBAR) * cov))
+    # det((2/hbar) cov) overflows for many modes, so we work with the log-determinant
+    _, logdet = math.slogdet(cov)
+    return math.exp(-0.5 * (logdet + cov.shape[-1] * np.log(2 / settings.HBAR)))
 
 
 def symplectic_eigenvals(cov: Matrix) -> Any:
@@ -876,12 +1119,24 @@ def join_covs(covs: Sequence[Matrix]) -> Tuple[Matrix, Vector]:
     Returns:
         Matrix: the joined covariance matrix
     """
-    modes = list(range(len(covs[0]) // 2))
-    cov = XPMatrix.from_xxpp(covs[0], modes=(modes, modes), like_1=True)
-    for _, c in enumerate(covs[1:]):
-        modes = list(range(cov.num_modes, cov.num_modes + c.shape[-1] // 2))
-        cov = cov @ XPMatrix.from_xxpp(c, modes=(modes, modes), like_1=True)
-    return cov.to_xxpp()
+    sizes = [c.shape[-1] // 2 for c in covs]
+    N = sum(sizes)
+    start = 0
+    if math.backend_name == "numpy":
+        cov = np.zeros((2, N, 2, N), dtype=np.result_type(*covs))
+        for c, n in zip(covs, sizes):
+            cov[:, start : start + n, :, start : start + n] = np.reshape(c, (2, n, 2, n))
+            start += n
+        return np.reshape(cov, (2 * N, 2 * N))
+
+    # each covariance is padded into its own modes of the joint (2,N,2,N) tensor
+    cov = None
+    for c, n in zip(covs, sizes):
+        pad = (start, N - start - n)
+        block = math.pad(math.reshape(c, (2, n, 2, n)), [(0, 0), pad, (0, 0), pad])
+        cov = block if cov is None else cov + block
+        start += n
+    return math.reshape(cov, (2 * N, 2 * N))
 
 
 def join_means(means: Sequence[Vector]) -> Vector:
@@ -893,12 +1148,8 @@ def join_means(means: Sequence[Vector]) -> Vector:
     Returns:
         Vector: the joined means vector
     """
-    mean = XPVector.from_xxpp(means[0], modes=list(range(len(means[0]) // 2)))
-    for _, m in enumerate(means[1:]):
-        mean = mean + XPVector.from_xxpp(
-            m, modes=list(range(mean.num_modes, mean.num_modes + len(m) // 2))
-        )
-    return mean.to_xxpp()
+    mean = math.concat([math.reshape(m, (2, -1)) for m in means], axis=1)
+    return math.reshape(mean, (-1,))
 
 
 def symplectic_inverse(S: Matrix) -> Matrix:
@@ -571,8 +571,15 @@ class Fock(Representation):
     def from_ansatz(cls, ansatz: ArrayAnsatz) -> Fock:  # pylint: disable=arguments-differ
         r"""
         Returns a Fock object from an ansatz object.
+
+        The ansatz is shared rather than copied, as ``ArrayAnsatz`` objects are never modified
+        in place. This avoids copying the whole array in methods like ``conj`` and ``__getitem__``.
         """
-        return cls(ansatz.array, batched=True)
+        ret = cls.__new__(cls)
+        ret._contract_idxs = ()
+        ret._original_bargmann_data = None
+        ret._ansatz = ansatz
+        return ret
 
     @property
     def array(self) -> Batch[Tensor]:
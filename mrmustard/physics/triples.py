@@ -17,11 +17,14 @@ This module contains the ``(A, b, c)`` triples for the Fock-Bargmann representat
 various states and transformations.
 """
 
+import cmath
 from typing import Generator, Iterable, Union
-from mrmustard import math, settings
-from mrmustard.utils.typing import Matrix, Vector, Scalar
 
 import numpy as np
+from numba import njit
+
+from mrmustard import math, settings
+from mrmustard.utils.typing import Matrix, Vector, Scalar
 
 
 #  ~~~~~~~~~
@@ -62,7 +65,8 @@ def _reshape(**kwargs) -> Generator:
 
     for i, var in enumerate(vars):
         if len(var) == 1:
-            var = math.tile(var, (n_modes,))
+            # a broadcast view rather than a tiled copy
+            var = math.broadcast_to(var, (n_modes,))
         else:
             if len(var) != n_modes:
                 msg = f"Parameter {names[i]} has an incompatible shape."
@@ -70,6 +74,38 @@ def _reshape(**kwargs) -> Generator:
         yield var
 
 
+@njit
+def _displaced_squeezed_vacuum_state_Abc_numba(
+    x: np.ndarray, y: np.ndarray, r: np.ndarray, phi: np.ndarray
+):  # pragma: no cover
+    r"""Numba kernel for :func:`displaced_squeezed_vacuum_state_Abc` with parameters of equal length."""
+    n_modes = x.shape[0]
+    A = np.zeros((n_modes, n_modes), dtype=np.complex128)
+    b = np.empty(n_modes, dtype=np.complex128)
+    c = 1.0 + 0.0j
+    for i in range(n_modes):
+        tanhr_phase = cmath.tanh(r[i]) * cmath.exp(1j * phi[i])
+        alpha_conj = x[i] - 1j * y[i]
+        A[i, i] = -tanhr_phase
+        b[i] = x[i] + 1j * y[i] + alpha_conj * tanhr_phase
+        c *= cmath.exp(
+            -0.5 * (x[i] * x[i] + y[i] * y[i]) - 0.5 * alpha_conj * alpha_conj * tanhr_phase
+        ) / cmath.sqrt(cmath.cosh(r[i]))
+    return A, b, c
+
+
+@njit
+def _thermal_state_Abc_numba(nbar: np.ndarray):  # pragma: no cover
+    r"""Numba kernel for :func:`thermal_state_Abc`."""
+    n_modes = nbar.shape[0]
+    A = np.zeros((2 * n_modes, 2 * n_modes), dtype=np.complex128)
+    c = 1.0 + 0.0j
+    for i in range(n_modes):
+        A[2 * i, 2 * i + 1] = A[2 * i + 1, 2 * i] = nbar[i] / (nbar[i] + 1)
+        c /= nbar[i] + 1
+    return A, np.zeros(2 * n_modes, dtype=np.complex128), c
+
+
 #  ~~~~~~~~~~~
 #  Pure States
 #  ~~~~~~~~~~~
@@ -175,13 +211,15 @@ def displaced_squeezed_vacuum_state_Abc(
         The ``(A, b, c)`` triple of the squeezed vacuum states.
     """
     x, y, r, phi = list(_reshape(x=x, y=y, r=r, phi=phi))
+    if math.backend_name == "numpy":
+        return _displaced_squeezed_vacuum_state_Abc_numba(x, y, r, phi)
 
-    A = math.diag(-math.sinh(r) / math.cosh(r) * math.exp(1j * phi))
-    b = (x + 1j * y) + (x - 1j * y) * math.sinh(r) / math.cosh(r) * math.exp(1j * phi)
-    c = math.exp(
-        -0.5 * (x**2 + y**2)
-        - 0.5 * (x - 1j * y) ** 2 * math.sinh(r) / math.cosh(r) * math.exp(1j * phi)
-    )
+    tanhr_phase = math.tanh(r) * math.exp(1j * phi)
+    alpha_conj = x - 1j * y
+
+    A = math.diag(-tanhr_phase)
+    b = (x + 1j * y) + alpha_conj * tanhr_phase
+    c = math.exp(-0.5 * (x**2 + y**2) - 0.5 * alpha_conj**2 * tanhr_phase)
     c = math.prod(c / math.sqrt(math.cosh(r)))
 
     return A, b, c
@@ -236,11 +274,13 @@ def thermal_state_Abc(nbar: Union[int, Iterable[int]]) -> Union[Matrix, Vector,
         The ``(A, b, c)`` triple of the thermal states.
     """
     nbar = math.atleast_1d(nbar, math.complex128)
+    if math.backend_name == "numpy":
+        return _thermal_state_Abc_numba(nbar)
     n_modes = len(nbar)
 
     A = math.astensor([[0, 1], [1, 0]], math.complex128)
     A = math.kron((nbar / (nbar + 1)) * math.eye(n_modes, math.complex128), A)
-    c = math.prod([1 / (_nbar + 1) for _nbar in nbar])
+    c = math.prod(1 / (nbar + 1))
     b = _vacuum_B_vector(n_modes * 2)
 
     return A, b, c
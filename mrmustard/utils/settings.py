@@ -112,6 +112,9 @@ class Settings:
         self.PRECISION_BITS_HERMITE_POLY = 128
         "The number of bits used to represent a single Fock amplitude when calculating Hermite polynomials. Default is 128."
 
+        self.HERMITE_GRAD_FP32 = False
+        "Whether the compact Fock gradients store their intermediate derivatives as complex64 (halving their memory footprint). Default is False."
+
         self.COMPLEX_WARNING = False
         "Whether tensorflow's ComplexWarning should be raised when a complex is cast to a float. Default is False."
 
@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from functools import lru_cache
+
 import numpy as np
 import pytest
 from hypothesis import given
@@ -38,12 +40,34 @@ from mrmustard.lab import (
 )
 from tests.random import none_or_
 
-from ..conftest import skip_np
-
 
 hbar = settings.HBAR
 
 
+def _tmsv_detection_moments(r, eta_s, eta_i, dc_s, dc_i):
+    """Means, variances and covariance of the photon counts of a two mode squeezed state
+    measured by detectors with the given efficiencies and dark counts."""
+    n_s = eta_s * np.sinh(r) ** 2
+    n_i = eta_i * np.sinh(r) ** 2
+    return (
+        n_s + dc_s,
+        n_i + dc_i,
+        n_s * (n_s + 1) + dc_s,
+        n_i * (n_i + 1) + dc_i,
+        eta_s * eta_i * (np.sinh(r) * np.cosh(r)) ** 2,
+    )
+
+
+@lru_cache()
+def _loss_probs_circuit(backend_name):  # pylint: disable=unused-argument
+    """The ideal detector and the gates of ``test_loss_probs``, which do not depend on the
+    Hypothesis example. Cached per backend, as their parameters are backend tensors."""
+    ideal_detector = PNRDetector(efficiency=1.0, dark_counts=0.0)
+    S = Sgate(r=0.2, phi=[0.0, 0.7])
+    BS = BSgate(theta=1.4, phi=0.0)
+    return ideal_detector, S, BS
+
+
 class TestPNRDetector:
     """tests related to PNR detectors"""
 
@@ -54,8 +78,6 @@ class TestPNRDetector:
     )
     def test_detector_coherent_state(self, alpha, eta, dc):
         """Tests the correct Poisson statistics are generated when a coherent state hits an imperfect detector"""
-        skip_np()
-
         detector = PNRDetector(efficiency=eta, dark_counts=dc, modes=[0])
         ps = Coherent(x=alpha.real, y=alpha.imag) << detector
         expected = poisson.pmf(k=np.arange(len(ps)), mu=eta * np.abs(alpha) ** 2 + dc)
@@ -69,15 +91,14 @@ class TestPNRDetector:
     )
     def test_detector_squeezed_state(self, r, phi, eta, dc):
         """Tests the correct mean and variance are generated when a squeezed state hits an imperfect detector"""
-        skip_np()
-
         S = Sgate(r=r, phi=phi)
-        ps = Vacuum(1) >> S >> PNRDetector(efficiency=eta, dark_counts=dc)
+        ps = math.asnumpy(Vacuum(1) >> S >> PNRDetector(efficiency=eta, dark_counts=dc))
+        n = np.arange(len(ps))
         assert np.allclose(np.sum(ps), 1.0)
-        mean = np.arange(len(ps)) @ math.asnumpy(ps)
+        mean = n @ ps
         expected_mean = eta * np.sinh(r) ** 2 + dc
         assert np.allclose(mean, expected_mean)
-        variance = np.arange(len(ps)) ** 2 @ math.asnumpy(ps) - mean**2
+        variance = n**2 @ ps - mean**2
         expected_variance = eta * np.sinh(r) ** 2 * (1 + eta * (1 + 2 * np.sinh(r) ** 2)) + dc
         assert np.allclose(variance, expected_variance)
 
@@ -89,44 +110,47 @@ class TestPNRDetector:
         dc_s=st.floats(0, 0.2),
         dc_i=st.floats(0, 0.2),
     )
-    def test_detector_two_mode_squeezed_state(self, r, phi, eta_s, eta_i, dc_s, dc_i):
-        """Tests the correct mean and variance are generated when a two mode squeezed state hits an imperfect detector"""
-        skip_np()
+    def test_two_mode_squeezed_state_moments(self, r, phi, eta_s, eta_i, dc_s, dc_i):
+        """Tests the photon number moments of a two mode squeezed state seen by imperfect detectors,
+        treating the efficiency as loss and the dark counts as independent Poisson noise"""
+        state = Vacuum(2) >> S2gate(r=r, phi=phi) >> Attenuator([eta_s, eta_i])
+        means = math.asnumpy(physics.gaussian.number_means(state.cov, state.means))
+        cov = math.asnumpy(physics.gaussian.number_cov(state.cov, state.means))
+        mean_s, mean_i = means + [dc_s, dc_i]
+        var_s, var_i = np.diag(cov) + [dc_s, dc_i]
+        covar = cov[0, 1]
+        assert np.allclose(
+            (mean_s, mean_i, var_s, var_i, covar),
+            _tmsv_detection_moments(r, eta_s, eta_i, dc_s, dc_i),
+        )
 
+    @pytest.mark.parametrize("r, eta_s, eta_i, dc_s, dc_i", [(0.3, 0.9, 0.7, 0.1, 0.05)])
+    def test_detector_two_mode_squeezed_state(self, r, eta_s, eta_i, dc_s, dc_i):
+        """Tests the correct mean and variance are generated when a two mode squeezed state hits an imperfect detector"""
         pnr = PNRDetector(efficiency=[eta_s, eta_i], dark_counts=[dc_s, dc_i])
-        ps = Vacuum(2) >> S2gate(r=r, phi=phi) >> pnr
+        ps = math.asnumpy(Vacuum(2) >> S2gate(r=r, phi=0.4) >> pnr)
         n = np.arange(len(ps))
         mean_s = np.sum(ps, axis=1) @ n
-        n_s = eta_s * np.sinh(r) ** 2
-        expected_mean_s = n_s + dc_s
         mean_i = np.sum(ps, axis=0) @ n
-        n_i = eta_i * np.sinh(r) ** 2
-        expected_mean_i = n_i + dc_i
-        expected_mean_s = n_s + dc_s
         var_s = np.sum(ps, axis=1) @ n**2 - mean_s**2
         var_i = np.sum(ps, axis=0) @ n**2 - mean_i**2
-        expected_var_s = n_s * (n_s + 1) + dc_s
-        expected_var_i = n_i * (n_i + 1) + dc_i
-        covar = n @ math.asnumpy(ps) @ n - mean_s * mean_i
-        expected_covar = eta_s * eta_i * (np.sinh(r) * np.cosh(r)) ** 2
-        assert np.allclose(mean_s, expected_mean_s)
-        assert np.allclose(mean_i, expected_mean_i)
-        assert np.allclose(var_s, expected_var_s)
-        assert np.allclose(var_i, expected_var_i)
-        assert np.allclose(covar, expected_covar)
+        covar = n @ ps @ n - mean_s * mean_i
+        assert np.allclose(
+            (mean_s, mean_i, var_s, var_i, covar),
+            _tmsv_detection_moments(r, eta_s, eta_i, dc_s, dc_i),
+        )
 
     def test_postselection(self):
         """Check the correct state is heralded for a two-mode squeezed vacuum with perfect detector"""
-        skip_np()
-
         n_mean = 1.0
         n_measured = 1
         cutoff = 3
         detector = PNRDetector(efficiency=1.0, dark_counts=0.0, cutoffs=[cutoff])
         S2 = S2gate(r=np.arcsinh(np.sqrt(n_mean)), phi=0.0)
         proj_state = (Vacuum(2) >> S2 >> detector)[n_measured]
-        success_prob = math.real(math.trace(proj_state))
-        proj_state = proj_state / math.trace(proj_state)
+        trace = math.trace(proj_state)
+        success_prob = math.real(trace)
+        proj_state = proj_state / trace
         # outputs the ket/dm in the third mode by projecting the first and second in 1,2 photons
         expected_prob = 1 / (1 + n_mean) * (n_mean / (1 + n_mean)) ** n_measured
         assert np.allclose(success_prob, expected_prob)
@@ -137,17 +161,35 @@ class TestPNRDetector:
     @given(eta=st.floats(0, 1))
     def test_loss_probs(self, eta):
         "Checks that a lossy channel is equivalent to quantum efficiency on detection probs"
-        skip_np()
-
-        ideal_detector = PNRDetector(efficiency=1.0, dark_counts=0.0)
+        ideal_detector, S, BS = _loss_probs_circuit(math.backend_name)
         lossy_detector = PNRDetector(efficiency=eta, dark_counts=0.0)
-        S = Sgate(r=0.2, phi=[0.0, 0.7])
-        BS = BSgate(theta=1.4, phi=0.0)
         L = Attenuator(transmissivity=eta)
         dms_lossy = Vacuum(2) >> S[0, 1] >> BS[0, 1] >> lossy_detector[0]
         dms_ideal = Vacuum(2) >> S[0, 1] >> BS[0, 1] >> L[0] >> ideal_detector[0]
         assert np.allclose(dms_lossy, dms_ideal, atol=1e-6)
 
+    def test_stochastic_channel_above_internal_cutoff(self):
+        """Checks that the stochastic channel can be built for cutoffs above the internal one,
+        where the dark counts alone follow the Poisson distribution"""
+        cutoff = settings.PNR_INTERNAL_CUTOFF + 5
+        detector = PNRDetector(efficiency=1.0, dark_counts=0.5)
+        detector.recompute_stochastic_channel([cutoff])
+        channel = detector._internal_stochastic_channel[0]  # pylint: disable=protected-access
+        channel = math.asnumpy(channel)
+        assert channel.shape == (cutoff, settings.PNR_INTERNAL_CUTOFF)
+        assert np.allclose(channel[:, 0], poisson.pmf(k=np.arange(cutoff), mu=0.5))
+
+    def test_trainable_detector_on_a_subset_of_modes(self):
+        """Checks that a trainable detector on one mode of a two-mode state only contracts its
+        own stochastic channel, and measures the Gaussian state as in the Fock basis"""
+        detector = PNRDetector(
+            efficiency=0.9, dark_counts=0.0, modes=[0], efficiency_trainable=True
+        )
+        state = Vacuum(2) >> S2gate(r=0.5)
+        expected = detector._measure_fock(state)  # pylint: disable=protected-access
+        measured = detector._measure_gaussian(state)  # pylint: disable=protected-access
+        assert np.allclose(measured, expected)
+
 
 class TestHomodyneDetector:
     """tests related to homodyne detectors"""
@@ -172,7 +214,8 @@ class TestHomodyneDetector:
 
         expected_state = Vacuum(1) >> S1
 
-        assert np.allclose(final_state.dm(), expected_state.dm())
+        assert np.allclose(final_state.cov, expected_state.cov)
+        assert np.allclose(final_state.means, expected_state.means)
 
         if outcome is not None:
             # checks postselection ensuring the x-quadrature
@@ -294,20 +337,26 @@ class TestHomodyneDetector:
         """Tests that the mean and variance estimates of many homodyne
         measurements are in agreement with the expected values for the states"""
         state = state(**kwargs)
-
-        if not gaussian_state:
-            state = State(dm=state.dm(cutoffs=[40]) * normalization)
         detector = Homodyne(0.0)
 
-        results = np.zeros((self.N_MEAS, 2))
-        for i in range(self.N_MEAS):
+        if gaussian_state:
+            results = np.zeros(self.N_MEAS)
+            for i in range(self.N_MEAS):
+                _ = state << detector
+                results[i] = math.asnumpy(detector.outcome)[0]
+        else:
+            # the Fock outcomes are drawn from a single pdf, so all the shots are drawn at once
+            state = State(dm=state.dm(cutoffs=[40]) * normalization)
+            fock_state = state.ket() if state.is_pure else state.dm()
+            results, _ = physics.fock.sample_homodyne(fock_state, 0.0, shots=self.N_MEAS)
+            results = math.asnumpy(results)
             _ = state << detector
-            results[i] = math.asnumpy(detector.outcome)
+            outcome = math.asnumpy(detector.outcome)
+            grid, _ = physics.fock.quadrature_distribution(fock_state)
+            assert np.isclose(outcome[1], 0.0) and np.isclose(math.asnumpy(grid), outcome[0]).any()
 
-        mean = results.mean(axis=0)
-        assert np.allclose(mean[0], mean_expected, atol=self.std_10, rtol=0)
-        var = results.var(axis=0)
-        assert np.allclose(var[0], var_expected, atol=self.std_10, rtol=0)
+        assert np.allclose(results.mean(), mean_expected, atol=self.std_10, rtol=0)
+        assert np.allclose(results.var(), var_expected, atol=self.std_10, rtol=0)
 
     def test_homodyne_squeezing_setting(self):
         r"""Check default homodyne squeezing on settings leads to the correct generaldyne
@@ -344,7 +393,8 @@ class TestHeterodyneDetector:
 
         expected_state = Vacuum(1) >> S1
 
-        assert np.allclose(final_state.dm(), expected_state.dm())
+        assert np.allclose(final_state.cov, expected_state.cov)
+        assert np.allclose(final_state.means, expected_state.means)
 
     @given(
         s=st.floats(min_value=0.0, max_value=10.0),
@@ -21,6 +21,7 @@ from unittest.mock import patch, MagicMock
 import numpy as np
 import pytest
 import tensorflow as tf
+from scipy.stats import multivariate_normal
 
 from mrmustard import math
 from ..conftest import skip_np
@@ -49,6 +50,16 @@ class TestBackendManager:
         with pytest.raises(NotImplementedError, match=msg):
             math._apply("ciao")
 
+    def test_apply_caches_functions(self):
+        r"""
+        Tests that `_apply` resolves each function of the backend in use only once.
+        """
+        math._apply("sum", (np.ones(2),))
+        fn = math._functions["sum"]
+        assert fn.__self__ is math.backend
+        math._apply("sum", (np.ones(2),))
+        assert math._functions["sum"] is fn
+
     def test_types(self):
         r"""
         Tests the types.
@@ -202,6 +213,8 @@ class TestBackendManager:
         else:
             exp_shape = arr.shape
         assert res.shape == exp_shape
+        if dtype:
+            assert res.dtype == getattr(np, t)
 
     def test_boolean_mask(self):
         r"""
@@ -234,6 +247,25 @@ class TestBackendManager:
         assert R.shape == (8, 8)
         assert np.allclose(math.block([[I, O], [O, 1j * I]]), R)
 
+    def test_block_diag_batched(self):
+        r"""
+        Tests the ``block_diag`` method with leading batch axes.
+        """
+        A = np.arange(12.0).reshape((3, 2, 2))
+        B = np.arange(3.0).reshape((1, 3, 1))
+        R = math.asnumpy(math.block_diag(math.astensor(A), math.astensor(B)))
+        assert R.shape == (3, 5, 3)
+        for a, r in zip(A, R):
+            assert np.allclose(r, math.asnumpy(math.block_diag(a, B[0])))
+
+    def test_broadcast_to(self):
+        r"""
+        Tests the ``broadcast_to`` method.
+        """
+        arr = np.arange(6).reshape((3, 1, 2))
+        res = math.asnumpy(math.broadcast_to(math.astensor(arr), (3, 4, 2)))
+        assert np.allclose(res, np.tile(arr, (1, 4, 1)))
+
     @pytest.mark.parametrize("t", types)
     def test_cast(self, t):
         r"""
@@ -356,6 +388,26 @@ class TestBackendManager:
         assert np.allclose(math.asnumpy(vals), np.array([1.0, 2.0, 3.0]))
         assert np.allclose(math.asnumpy(vecs), np.eye(3))
 
+    def test_eigvalsh(self):
+        r"""
+        Tests the ``eigvalsh`` method.
+        """
+        arr = np.array([[2.0, 1.0j], [-1.0j, 2.0]])
+        vals = math.asnumpy(math.eigvalsh(arr))
+
+        assert np.allclose(vals, np.array([1.0, 3.0]))
+
+    @pytest.mark.parametrize("string", ["ij,jk->ik", "ij,jk,kl->il", "nm,nj,mj->j"])
+    def test_einsum(self, string):
+        r"""
+        Tests the ``einsum`` method with two and more operands.
+        """
+        rng = np.random.default_rng(42)
+        shapes = {"i": 3, "j": 4, "k": 5, "l": 2, "n": 3, "m": 3}
+        operands = [rng.random([shapes[c] for c in op]) for op in string.split("->")[0].split(",")]
+        res = math.asnumpy(math.einsum(string, *[math.astensor(op) for op in operands]))
+        assert np.allclose(res, np.einsum(string, *operands))
+
     def test_exp(self):
         r"""
         Tests the ``exp`` method.
@@ -413,6 +465,14 @@ class TestBackendManager:
         exp2 = np.array([6, 7, 8])
         assert np.allclose(res2, exp2)
 
+    def test_gather2d(self):
+        r"""
+        Tests the ``gather2d`` method.
+        """
+        arr = np.arange(24).reshape((4, 3, 2))
+        res = math.asnumpy(math.gather2d(math.astensor(arr), [3, 0], [1, 2]))
+        assert np.allclose(res, arr[[3, 0]][:, [1, 2]])
+
     def test_imag(self):
         r"""
         Tests the ``imag`` method.
@@ -442,6 +502,19 @@ class TestBackendManager:
         assert not math.is_trainable(arr2)
         assert math.is_trainable(arr3) is (math.backend_name == "tensorflow")
 
+    def test_jit(self):
+        r"""
+        Tests the ``jit`` method.
+        """
+
+        @math.jit
+        def f(x, n):
+            return math.sum(x**n)
+
+        arr = math.astensor([1.0, 2.0, 3.0])
+        assert np.allclose(f(arr, 2), 14.0)
+        assert np.allclose(f(arr, 3), 36.0)
+
     def test_lgamma(self):
         r"""
         Tests the ``lgamma`` method.
@@ -532,6 +605,25 @@ class TestBackendManager:
         res = math.asnumpy(math.ones_like(arr))
         assert np.allclose(res, arr)
 
+    def test_abs_square(self):
+        r"""
+        Tests the ``abs_square`` method.
+        """
+        arr = np.array([1.0 + 2.0j, -3.0j, 0.5])
+        res = math.asnumpy(math.abs_square(math.astensor(arr)))
+        assert np.allclose(res, [5.0, 9.0, 0.25])
+        assert not np.iscomplexobj(res)
+
+    def test_outer(self):
+        r"""
+        Tests the ``outer`` method.
+        """
+        arr1 = np.random.random((2, 3)) + 1j * np.random.random((2, 3))
+        arr2 = np.random.random((4,)) + 1j * np.random.random((4,))
+        res = math.asnumpy(math.outer(math.astensor(arr1), math.astensor(arr2)))
+        assert res.shape == (2, 3, 4)
+        assert np.allclose(res, np.einsum("ab,c->abc", arr1, arr2))
+
     def test_pow(self):
         r"""
         Tests the ``pow`` method.
@@ -598,6 +690,14 @@ class TestBackendManager:
         arr = np.array(l)
         assert np.allclose(math.asnumpy(math.sinh(arr)), np.sinh(arr))
 
+    def test_single_mode_to_multimode_vec(self):
+        r"""
+        Tests the ``single_mode_to_multimode_vec`` method.
+        """
+        vec = math.astensor(np.array([1.5, -2.0]))
+        res = math.asnumpy(math.single_mode_to_multimode_vec(vec, 3))
+        assert np.allclose(res, [1.5, 1.5, 1.5, -2.0, -2.0, -2.0])
+
     def test_solve(self):
         r"""
         Tests the ``solve`` method.
@@ -631,6 +731,45 @@ class TestBackendManager:
         res = math.asnumpy(math.sum(arr))
         assert np.allclose(res, 12)
 
+    @pytest.mark.parametrize("l", lists)
+    def test_tanh(self, l):
+        r"""
+        Tests the ``tanh`` method.
+        """
+        arr = np.array(l)
+        assert np.allclose(math.asnumpy(math.tanh(arr)), np.tanh(arr))
+
+    def test_update_add_tensor(self):
+        r"""
+        Tests the ``update_add_tensor`` method, including repeated indices.
+        """
+        arr = math.zeros((3, 2))
+        res = math.update_add_tensor(
+            arr, [[0], [2], [0]], math.astensor([[1.0, 2], [3, 4], [5, 6]])
+        )
+        assert np.allclose(res, [[6, 8], [0, 0], [3, 4]])
+
+    def test_add_at_modes(self):
+        r"""
+        Tests the ``add_at_modes`` method.
+        """
+        old = np.arange(16, dtype=np.float64).reshape(4, 4)
+        new = np.array([[1.0, 2], [3, 4]])
+        expected = old.copy()
+        expected[np.ix_([1, 3], [1, 3])] += new
+        assert np.allclose(math.add_at_modes(math.astensor(old), math.astensor(new), [1]), expected)
+
+    @pytest.mark.parametrize("name", ["Xmat", "Zmat", "rotmat", "J"])
+    def test_constant_matrices_are_cached_read_only(self, name):
+        r"""
+        Tests that the cached constant matrices are shared between calls and cannot be
+        modified in place.
+        """
+        mat = getattr(math, name)(2)
+        assert mat is getattr(math, name)(2)
+        with pytest.raises(ValueError):
+            mat[0, 0] = 1
+
     def test_categorical(self):
         r"""
         Tests the ``Categorical`` method.
@@ -639,6 +778,24 @@ class TestBackendManager:
         results = [math.Categorical(probs, "") for _ in range(100)]
         assert len(set(results)) > 1
 
+    def test_multivariate_normal_tril(self):
+        r"""
+        Tests the ``MultivariateNormalTriL`` method.
+        """
+        loc = np.array([0.5, -1.0])
+        cov = np.array([[2.0, 0.6], [0.6, 1.0]])
+        pdf = math.MultivariateNormalTriL(math.astensor(loc), math.cholesky(math.astensor(cov)))
+
+        x = np.array([0.2, -0.3])
+        assert np.allclose(
+            math.asnumpy(pdf.prob(math.astensor(x))), multivariate_normal.pdf(x, loc, cov)
+        )
+
+        samples = np.array([math.asnumpy(pdf.sample(dtype=math.float64)) for _ in range(2000)])
+        assert samples.shape == (2000, 2)
+        assert np.allclose(samples.mean(axis=0), loc, atol=0.2)
+        assert np.allclose(np.cov(samples.T), cov, atol=0.3)
+
     @patch("importlib.metadata.distribution")
     @patch("platform.processor")
     @patch("platform.system")
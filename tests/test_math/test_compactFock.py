@@ -11,6 +11,13 @@ from hypothesis import strategies as st
 
 from mrmustard import math, settings
 from mrmustard.lab import Ggate, SqueezedVacuum, State, Vacuum
+from mrmustard.math.lattice.strategies.compactFock.helperFunctions import zeros_grad_buffer
+from mrmustard.math.lattice.strategies.compactFock.inputValidation import (
+    grad_hermite_multidimensional_1leftoverMode,
+    grad_hermite_multidimensional_diagonal,
+    hermite_multidimensional_1leftoverMode,
+    hermite_multidimensional_diagonal,
+)
 from mrmustard.physics import fidelity, normalize
 from mrmustard.physics.bargmann import wigner_to_bargmann_rho
 from mrmustard.training import Optimizer
@@ -157,3 +164,46 @@ def test_compactFock_1leftover_gradients(precision):
         assert opt.opt_history[i - 1] >= opt.opt_history[i]
 
     settings.PRECISION_BITS_HERMITE_POLY = original_precision
+
+
+@given(random_ABC(M=3))
+@pytest.mark.parametrize(
+    "amps, grads",
+    [
+        (hermite_multidimensional_diagonal, grad_hermite_multidimensional_diagonal),
+        (hermite_multidimensional_1leftoverMode, grad_hermite_multidimensional_1leftoverMode),
+    ],
+)
+def test_compactFock_fp32_gradients(amps, grads, A_B_G0):
+    r"""
+    Test that storing the intermediate derivatives as complex64 returns complex128 gradients
+    that agree with the full precision ones up to single precision.
+    """
+    skip_np()
+    A, B, G0 = (math.asnumpy(x) for x in A_B_G0)
+    arrs = amps(np.conj(-A), np.conj(B), np.conj(G0), (4, 3, 3))
+
+    ref = grads(np.conj(-A), np.conj(B), np.conj(G0), *arrs)
+    fp32 = grads(np.conj(-A), np.conj(B), np.conj(G0), *arrs, fp32_grads=True)
+    for g_ref, g_fp32 in zip(ref, fp32):
+        assert g_fp32.dtype == np.complex128
+        assert np.allclose(g_fp32, g_ref, rtol=1e-5, atol=1e-6 * np.max(np.abs(g_ref)))
+
+
+@pytest.mark.parametrize("dtype", [np.complex128, np.complex64])
+def test_zeros_grad_buffer_dtype(dtype):
+    r"""
+    Test that the derivative arrays are disjoint zero views of the requested dtype, and that
+    a complex128 value stored into a complex64 array is read back up to single precision.
+    """
+    arrs = [np.ones(shape, dtype=np.complex128) for shape in [(3, 2), (3, 2), (3, 2), (3, 2), (3,)]]
+    A, B = np.ones((2, 2), dtype=np.complex128), np.ones(2, dtype=np.complex128)
+    views = zeros_grad_buffer(*arrs, A, B, dtype)
+    value = 1 / 3 + 1j / 7
+    for k, view in enumerate(views):
+        assert view.dtype == dtype
+        assert view.shape == arrs[k % 5].shape + (A.shape if k < 5 else B.shape)
+        assert not np.any(view)
+        view[...] = value
+    for view in views:
+        assert np.allclose(view.astype(np.complex128), value, rtol=1e-6, atol=0)
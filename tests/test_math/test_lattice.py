@@ -18,10 +18,12 @@ import importlib
 import pytest
 import numpy as np
 
-from mrmustard.lab import Gaussian, Dgate
+from mrmustard.lab import Attenuator, Gaussian, Dgate
 from mrmustard import settings, math
 from mrmustard.physics.bargmann import wigner_to_bargmann_rho
+from mrmustard.math.lattice.paths import binomial_subspace_basis
 from mrmustard.math.lattice.strategies.binomial import binomial, binomial_dict
+from mrmustard.math.lattice.strategies.vanilla import vanilla_diagonal_batched
 
 original_precision = settings.PRECISION_BITS_HERMITE_POLY
 
@@ -66,6 +68,15 @@ def test_binomial_vs_binomialDict():
         assert np.isclose(D[idx], G[idx])
 
 
+@pytest.mark.parametrize("cutoffs", [(4,), (3, 3), (2, 5, 3), (4, 1, 3, 2)])
+def test_binomial_subspace_basis(cutoffs):
+    """Test that the binomial subspace basis contains all the indices of a given weight,
+    in lexicographic order."""
+    for weight in range(sum(cutoffs)):
+        expected = [idx for idx in np.ndindex(cutoffs) if sum(idx) == weight]
+        assert list(binomial_subspace_basis(cutoffs, weight)) == expected
+
+
 @pytest.mark.parametrize("batch_size", [1, 3])
 def test_vanillabatchNumba_vs_vanillaNumba(batch_size):
     """Test the batch version works versus the normal vanilla version."""
@@ -88,6 +99,34 @@ def test_vanillabatchNumba_vs_vanillaNumba(batch_size):
         assert np.allclose(G_ref, G_batched[:, :, :, :, nb])
 
 
+@pytest.mark.parametrize("batch_size", [1, 3])
+def test_vanillabatchedNumba_vs_vanillaNumba(batch_size):
+    """Test the version batched over whole triples works versus the normal vanilla version."""
+    states = [Gaussian(2) >> Dgate([0.1 * k, 0.2]) for k in range(batch_size)]
+    triples = [wigner_to_bargmann_rho(state.cov, state.means) for state in states]
+    A, B, C = (math.astensor([triple[i] for triple in triples]) for i in range(3))
+    shape = (5, 6, 5, 6)
+
+    G_batched = math.hermite_renormalized_batched(A, B, C, shape=shape)
+
+    assert G_batched.shape == (batch_size,) + shape
+    for nb in range(batch_size):
+        assert np.allclose(G_batched[nb], math.hermite_renormalized(A[nb], B[nb], C[nb], shape))
+
+
+def test_vanilladiagonalbatched_vs_vanillaNumba():
+    """Test the batched single-mode diagonal strategy versus the diagonal of the vanilla version."""
+    states = [Gaussian(1) >> Dgate(0.3 * k, 0.1) >> Attenuator(0.7) for k in range(3)]
+    triples = [wigner_to_bargmann_rho(state.cov, state.means) for state in states]
+    A, B, C = (np.array([math.asnumpy(triple[i]) for triple in triples]) for i in range(3))
+
+    diags = vanilla_diagonal_batched(30, A, B, C)
+
+    assert diags.shape == (3, 30)
+    for k in range(3):
+        assert np.allclose(diags[k], np.diag(math.hermite_renormalized(A[k], B[k], C[k], (30, 30))))
+
+
 @pytest.mark.parametrize("batch_size", [1, 3])
 def test_diagonalbatchNumba_vs_diagonalNumba(batch_size):
     """Test the batch version works versus the normal diagonal version."""
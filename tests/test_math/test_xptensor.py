@@ -14,8 +14,14 @@
 
 from hypothesis import strategies as st, given
 from hypothesis.extra.numpy import arrays
-from mrmustard.math.tensor_wrappers.xptensor import XPVector, XPMatrix
+from mrmustard.math.tensor_wrappers.xptensor import (
+    XPVector,
+    XPMatrix,
+    XPTensor,
+    _mode_aware_matmul,
+)
 import numpy as np
+import pytest
 
 even = st.integers(min_value=2, max_value=10).filter(lambda x: x % 2 == 0)
 floats = st.floats(min_value=-1e3, max_value=1e3, allow_nan=False, allow_infinity=False)
@@ -89,6 +95,12 @@ def test_from_xpxp_to_xpxp_is_the_same(matrix):
     assert np.allclose(xp1.to_xpxp(), xpxp_matrix)
 
 
+@given(vector())
+def test_from_xpxp_to_xpxp_is_the_same_vector(vector):
+    xp1 = XPVector.from_xpxp(vector)
+    assert np.allclose(xp1.to_xpxp(), vector)
+
+
 @given(matrix())
 def test_from_xxpp_to_xxpp_is_the_same(matrix):
     N = matrix.shape[0] // 2
@@ -267,3 +279,163 @@ def test_addition_all_different_modes_coherences(coherence):
     matrix1 = np.block([[coherence, np.zeros((2 * N, 2 * M))]])
     matrix2 = np.block([[np.zeros((2 * N, 2 * M)), coherence]])
     assert np.allclose((coh1 + coh2).to_xpxp(), matrix1 + matrix2, rtol=1e-5)
+
+
+@given(square_matrix(min_size=6, max_size=6))
+def test_getitem_matrix_gathers_rows_and_columns(matrix):
+    """Tests that indexing an XPMatrix selects and reorders both outmodes and inmodes."""
+    xp = XPMatrix.from_xxpp(matrix, modes=([0, 1, 2], [0, 1, 2]), like_1=True)
+    assert np.allclose(xp[[2, 0], [1]].tensor, xp.tensor[[2, 0]][:, [1]])
+    assert np.allclose(xp[[2, 1, 0], [2, 1, 0]].tensor, xp.tensor[::-1, ::-1])
+    assert np.allclose(xp[[0, 1, 2], [0, 1, 2]].tensor, xp.tensor)
+
+
+def test_getitem_vector_by_mode():
+    """Tests that indexing an XPVector with non-contiguous modes picks them by mode, not position."""
+    vec = XPVector.from_xxpp(np.arange(6.0), modes=[3, 7, 5])
+    assert np.allclose(vec[7].tensor, [[1.0, 4.0]])
+    assert vec[7].outmodes == [7]
+    assert np.allclose(vec[[5, 3]].tensor, [[2.0, 5.0], [0.0, 3.0]])
+    assert np.allclose(vec[:].tensor, vec.tensor)
+
+
+def test_modes_index_follows_reassigned_modes():
+    """Tests that the mode lookup of an XPTensor follows a reassignment of its modes."""
+    vec = XPVector.from_xxpp(np.arange(4.0), modes=[0, 1])
+    vec.modes = ([4, 2], [])
+    assert np.allclose(vec[2].tensor, [[1.0, 3.0]])
+
+
+@given(square_matrix(max_size=6))
+def test_clone_matrix_is_block_diagonal(matrix):
+    """Tests that cloning a matrix gives the block-diagonal matrix with one copy per clone."""
+    N = matrix.shape[0] // 2
+    xp = XPMatrix.from_xpxp(matrix, modes=(list(range(N)), list(range(N))), like_1=True)
+    cloned = xp.clone(3)
+    assert cloned.outmodes == list(range(3 * N))
+    expected = np.array([[np.eye(3)[t, s] * xp.tensor for s in range(3)] for t in range(3)])
+    assert np.allclose(
+        cloned.tensor, np.transpose(expected, (2, 0, 3, 1, 4, 5)).reshape(cloned.tensor.shape)
+    )
+
+
+@given(vector())
+def test_clone_vector(vec):
+    """Tests that cloning a vector repeats each mode the given number of times."""
+    xp = XPVector.from_xpxp(vec)
+    cloned = xp.clone(3)
+    assert cloned.outmodes == list(range(3 * xp.num_modes))
+    assert np.allclose(cloned.tensor, np.repeat(xp.tensor, 3, axis=0))
+
+
+@given(square_matrix())
+def test_addition_like_1_null_tensor(matrix):
+    """Tests that adding a like_1 null tensor adds the identity."""
+    expected = matrix + np.eye(matrix.shape[0])
+    xp = XPMatrix.from_xxpp(matrix, like_0=True)
+    assert np.allclose((XPMatrix(like_1=True) + xp).to_xxpp(), expected)
+
+
+@given(a=square_matrix(), b=square_matrix())
+def test_matmul_like_0_disjoint_modes_is_null(a, b):
+    """Tests that the product of two like_0 matrices on disjoint modes is a null like_0 matrix."""
+    Na, Nb = a.shape[0] // 2, b.shape[0] // 2
+    xp1 = XPMatrix.from_xpxp(a, modes=(list(range(Na)), list(range(Na))), like_0=True)
+    xp2 = XPMatrix.from_xpxp(
+        b, modes=(list(range(Na, Na + Nb)), list(range(Na, Na + Nb))), like_0=True
+    )
+    prod = xp1 @ xp2
+    assert prod.tensor is None and prod.like_0
+
+
+def test_matmul_repeated_layout_returns_fresh_modes():
+    """Tests that products sharing the same mode layout do not share their mode lists."""
+    a = XPMatrix.from_xxpp(2 * np.eye(4), like_1=True, modes=([3, 1], [3, 1]))
+    b = XPMatrix.from_xxpp(np.eye(8), like_1=True, modes=([0, 1, 2, 3], [0, 1, 2, 3]))
+    first = a @ b
+    first.outmodes.append(5)
+    second = a @ b
+    assert second.outmodes == [0, 1, 2, 3] and second.inmodes == [0, 1, 2, 3]
+    assert np.allclose(second.to_xxpp(), np.diag([1.0, 2, 1, 2, 1, 2, 1, 2]))
+
+
+def test_vecvec_partially_overlapping_modes():
+    """Tests that the product of two vectors only pairs up their common modes."""
+    v1 = XPVector.from_xxpp(np.array([1.0, 2.0, 3.0, 4.0]), modes=[3, 5])
+    v2 = XPVector.from_xxpp(np.array([5.0, 6.0, 7.0, 8.0]), modes=[5, 7])
+    assert np.isclose(v1 @ v2, 2.0 * 5.0 + 4.0 * 7.0)
+
+
+def test_vecvec_disjoint_modes():
+    """Tests that the product of two vectors on disjoint modes is zero."""
+    v1 = XPVector.from_xxpp(np.array([1.0, 2.0]), modes=[0])
+    v2 = XPVector.from_xxpp(np.array([3.0, 4.0]), modes=[1])
+    assert np.isclose(v1 @ v2, 0.0)
+
+
+@given(square_matrix())
+def test_to_xxpp_is_cached_until_tensor_changes(matrix):
+    """Tests that ``to_xxpp`` is computed once and recomputed after the tensor changes."""
+    xp = XPMatrix.from_xxpp(matrix, like_1=True)
+    assert xp.to_xxpp() is xp.to_xxpp()
+    assert np.allclose(xp.to_xxpp(), matrix)
+    xp = 2.0 * xp
+    assert np.allclose(xp.to_xxpp(), 2.0 * matrix)
+
+
+def test_chain_matmul_matches_left_to_right_product():
+    """Tests that ``chain_matmul`` gives the same product as evaluating the chain left to right."""
+    rng = np.random.default_rng(42)
+    ops = [
+        XPMatrix.from_xxpp(rng.random((2 * len(m), 2 * len(m))), like_1=True, modes=(m, m))
+        for m in ([0, 1], [1, 2], [3], [0, 3], [2])
+    ]
+    vec = XPVector.from_xxpp(rng.random(8), modes=[0, 1, 2, 3])
+    expected = ops[0] @ ops[1] @ ops[2] @ ops[3] @ ops[4]
+    assert np.allclose(XPTensor.chain_matmul(ops).to_xxpp(), expected.to_xxpp())
+    assert np.allclose(XPTensor.chain_matmul(ops + [vec]).to_xxpp(), (expected @ vec).to_xxpp())
+    with pytest.raises(ValueError):
+        XPTensor.chain_matmul([])
+
+
+@given(a=square_matrix(min_size=4, max_size=4), b=square_matrix(min_size=4, max_size=4))
+def test_conjugate(a, b):
+    """Tests that ``conjugate`` computes ``S @ C @ S.T`` with matching and permuted modes."""
+    S = XPMatrix.from_xxpp(a, like_1=True, modes=([0, 1], [0, 1]))
+    C = XPMatrix.from_xxpp(b, like_0=True, modes=([0, 1], [0, 1]))
+    assert np.allclose(S.conjugate(C).to_xxpp(), a @ b @ a.T)
+    C_swapped = XPMatrix.from_xxpp(b, like_0=True, modes=([1, 0], [1, 0]))
+    assert np.allclose(S.conjugate(C_swapped).to_xxpp(), (S @ C_swapped @ S.T).to_xxpp())
+
+
+@given(a=square_matrix(min_size=2, max_size=2), b=square_matrix(min_size=4, max_size=4))
+def test_conjugate_on_a_subset_of_modes(a, b):
+    """Tests that ``conjugate`` by a like_1 matrix acting on a subset of the modes matches the
+    dense product with the matrix padded by the identity."""
+    S = XPMatrix.from_xxpp(a, like_1=True, modes=([1], [1]))
+    C = XPMatrix.from_xxpp(b, like_0=True, modes=([0, 1], [0, 1]))
+    dense_S = np.eye(4)
+    dense_S[np.ix_([1, 3], [1, 3])] = a
+    assert np.allclose(S.conjugate(C).to_xxpp(), dense_S @ b @ dense_S.T)
+
+
+@given(a=square_matrix(min_size=4, max_size=4), v=vector(2))
+def test_vector_matrix_product_on_a_subset_of_modes(a, v):
+    """Tests that a vector times a matrix acting on more modes matches the dense product."""
+    S = XPMatrix.from_xxpp(a, like_1=True, modes=([0, 1], [0, 1]))
+    vec = XPVector.from_xxpp(v, modes=[1])
+    dense_v = np.array([0.0, v[0], 0.0, v[1]])
+    assert np.allclose((vec @ S).to_xxpp(), dense_v @ a)
+
+
+@given(a=square_matrix(min_size=4, max_size=4), b=square_matrix(min_size=4, max_size=4))
+def test_matmul_with_folded_transposes(a, b):
+    """Tests that folding the transpose of either operand into the product matches multiplying
+    by the explicit transpose, including the blocks copied through like_1 operands."""
+    A = XPMatrix.from_xxpp(a, like_1=True, modes=([0, 1], [0, 1]))
+    B = XPMatrix.from_xxpp(b, like_1=True, modes=([1, 2], [1, 2]))
+    for transpose_self, transpose_other in [(True, False), (False, True), (True, True)]:
+        tensor, modes = _mode_aware_matmul(A, B, transpose_self, transpose_other)
+        expected = (A.T if transpose_self else A) @ (B.T if transpose_other else B)
+        assert modes == expected.modes
+        assert np.allclose(XPMatrix(tensor, like_1=True, modes=modes).to_xxpp(), expected.to_xxpp())
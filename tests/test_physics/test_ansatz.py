@@ -16,6 +16,8 @@
 
 # pylint: disable = missing-function-docstring, pointless-statement, comparison-with-itself
 
+import operator
+
 import numpy as np
 import pytest
 
@@ -86,6 +88,16 @@ class TestPolyExpAnsatz:
         assert np.allclose(ansatz2.vec[0], b)
         assert np.allclose(ansatz2.array[0], d * c)
 
+    def test_neg_and_div_scalar_share_mat_and_vec(self):
+        A, b, c = Abc_triple(5)
+        ansatz = PolyExpAnsatz(A, b, c)
+
+        for ansatz2, expected_c in [(-ansatz, -c), (ansatz / 4, c / 4), (ansatz * 2, 2 * c)]:
+            assert ansatz2.mat is ansatz.mat
+            assert ansatz2.vec is ansatz.vec
+            assert np.allclose(ansatz2.array[0], expected_c)
+        assert np.allclose(ansatz.array[0], c)
+
     def test_call(self):
         A, b, c = Abc_triple(5)
         ansatz = PolyExpAnsatz(A, b, c)
@@ -104,6 +116,20 @@ class TestPolyExpAnsatz:
         assert np.allclose(ansatz3.vec[0], math.concat([b1, b2], -1))
         assert np.allclose(ansatz3.array[0], c1 * c2)
 
+    def test_and_batched(self):
+        triples1 = [Abc_triple(2) for _ in range(2)]
+        triples2 = [Abc_triple(3) for _ in range(3)]
+
+        A1, b1, c1 = [np.array(x) for x in zip(*triples1)]
+        A2, b2, c2 = [np.array(x) for x in zip(*triples2)]
+        ansatz3 = PolyExpAnsatz(A1, b1, c1[:, 0]) & PolyExpAnsatz(A2, b2, c2[:, 0])
+
+        assert ansatz3.batch_size == 6
+        for k, (i, j) in enumerate(np.ndindex(2, 3)):
+            assert np.allclose(ansatz3.mat[k], math.block_diag(A1[i], A2[j]))
+            assert np.allclose(ansatz3.vec[k], math.concat([b1[i], b2[j]], -1))
+            assert np.allclose(ansatz3.array[k], c1[i, 0] * c2[j, 0])
+
     def test_eq(self):
         A, b, c = Abc_triple(5)
 
@@ -194,10 +220,24 @@ class TestArrayAnsatz:
 
         assert isinstance(aa1_add_aa2, ArrayAnsatz)
         assert aa1_add_aa2.array.shape == (4, 2, 2)
-        assert np.allclose(aa1_add_aa2.array[0], np.array([[0, 2], [4, 6]]))
-        assert np.allclose(aa1_add_aa2.array[1], np.array([[4, 6], [8, 10]]))
-        assert np.allclose(aa1_add_aa2.array[2], np.array([[4, 6], [8, 10]]))
-        assert np.allclose(aa1_add_aa2.array[3], np.array([[8, 10], [12, 14]]))
+        expected = np.array(
+            [
+                [[0, 2], [4, 6]],
+                [[4, 6], [8, 10]],
+                [[4, 6], [8, 10]],
+                [[8, 10], [12, 14]],
+            ]
+        )
+        assert np.allclose(aa1_add_aa2.array, expected)
+
+    def test_add_different_ranks(self):
+        array = np.random.random((2, 3, 3))
+        array2 = np.random.random((3, 3))
+        aa1_add_aa2 = ArrayAnsatz(array=array) + ArrayAnsatz(array=array2)
+
+        assert aa1_add_aa2.array.shape == (6, 3, 3)
+        expected = np.array([a + b for a in array for b in array2])
+        assert np.allclose(aa1_add_aa2.array, expected)
 
     def test_and(self):
         array = np.arange(8).reshape(2, 2, 2)
@@ -207,42 +247,27 @@ class TestArrayAnsatz:
         aa1_and_aa2 = aa1 & aa2
         assert isinstance(aa1_and_aa2, ArrayAnsatz)
         assert aa1_and_aa2.array.shape == (4, 2, 2, 2, 2)
-        assert np.allclose(
-            aa1_and_aa2.array[0],
-            np.array(
+        expected = np.array(
+            [
                 [
                     [[[0, 0], [0, 0]], [[0, 1], [2, 3]]],
                     [[[0, 2], [4, 6]], [[0, 3], [6, 9]]],
-                ]
-            ),
-        )
-        assert np.allclose(
-            aa1_and_aa2.array[1],
-            np.array(
+                ],
                 [
                     [[[0, 0], [0, 0]], [[4, 5], [6, 7]]],
                     [[[8, 10], [12, 14]], [[12, 15], [18, 21]]],
-                ]
-            ),
-        )
-        assert np.allclose(
-            aa1_and_aa2.array[2],
-            np.array(
+                ],
                 [
                     [[[0, 4], [8, 12]], [[0, 5], [10, 15]]],
                     [[[0, 6], [12, 18]], [[0, 7], [14, 21]]],
-                ]
-            ),
-        )
-        assert np.allclose(
-            aa1_and_aa2.array[3],
-            np.array(
+                ],
                 [
                     [[[16, 20], [24, 28]], [[20, 25], [30, 35]]],
                     [[[24, 30], [36, 42]], [[28, 35], [42, 49]]],
-                ]
-            ),
+                ],
+            ]
         )
+        assert np.allclose(aa1_and_aa2.array, expected)
 
     def test_mul_a_scalar(self):
         array = np.random.random((2, 4, 5))
@@ -259,10 +284,15 @@ class TestArrayAnsatz:
         aa1_mul_aa2 = aa1 * aa2
         assert isinstance(aa1_mul_aa2, ArrayAnsatz)
         assert aa1_mul_aa2.array.shape == (4, 2, 2)
-        assert np.allclose(aa1_mul_aa2.array[0], np.array([[0, 1], [4, 9]]))
-        assert np.allclose(aa1_mul_aa2.array[1], np.array([[0, 5], [12, 21]]))
-        assert np.allclose(aa1_mul_aa2.array[2], np.array([[0, 5], [12, 21]]))
-        assert np.allclose(aa1_mul_aa2.array[3], np.array([[16, 25], [36, 49]]))
+        expected = np.array(
+            [
+                [[0, 1], [4, 9]],
+                [[0, 5], [12, 21]],
+                [[0, 5], [12, 21]],
+                [[16, 25], [36, 49]],
+            ]
+        )
+        assert np.allclose(aa1_mul_aa2.array, expected)
 
     def test_truediv_a_scalar(self):
         array = np.random.random((2, 4, 5))
@@ -279,31 +309,25 @@ class TestArrayAnsatz:
         aa1_div_aa2 = aa1 / aa2
         assert isinstance(aa1_div_aa2, ArrayAnsatz)
         assert aa1_div_aa2.array.shape == (4, 2, 2)
-        assert np.allclose(aa1_div_aa2.array[0], np.array([[1.0, 1.0], [1.0, 1.0]]))
-        assert np.allclose(aa1_div_aa2.array[1], np.array([[0.2, 0.33333], [0.42857143, 0.5]]))
-        assert np.allclose(aa1_div_aa2.array[2], np.array([[5.0, 3.0], [2.33333333, 2.0]]))
-        assert np.allclose(aa1_div_aa2.array[3], np.array([[1.0, 1.0], [1.0, 1.0]]))
-
-    def test_algebra_with_different_shape_of_array_raise_errors(self):
-        array = np.random.random((2, 4, 5))
-        array2 = np.random.random((3, 4, 8, 9))
-        aa1 = ArrayAnsatz(array=array)
-        aa2 = ArrayAnsatz(array=array2)
-
-        with pytest.raises(Exception):
-            aa1 + aa2
-
-        with pytest.raises(Exception):
-            aa1 - aa2
-
-        with pytest.raises(Exception):
-            aa1 * aa2
+        expected = np.array(
+            [
+                [[1.0, 1.0], [1.0, 1.0]],
+                [[0.2, 0.33333], [0.42857143, 0.5]],
+                [[5.0, 3.0], [2.33333333, 2.0]],
+                [[1.0, 1.0], [1.0, 1.0]],
+            ]
+        )
+        assert np.allclose(aa1_div_aa2.array, expected)
 
-        with pytest.raises(Exception):
-            aa1 / aa2
+    @pytest.mark.parametrize(
+        "op", [operator.add, operator.sub, operator.mul, operator.truediv, operator.eq]
+    )
+    def test_algebra_with_different_shape_of_array_raise_errors(self, op):
+        aa1 = ArrayAnsatz(array=np.random.random((2, 4, 5)))
+        aa2 = ArrayAnsatz(array=np.random.random((3, 4, 8, 9)))
 
         with pytest.raises(Exception):
-            aa1 == aa2
+            op(aa1, aa2)
 
     def test_bargmann_Abc_to_phasespace_cov_means(self):
         # The init state cov and means comes from the random state 'state = Gaussian(1) >> Dgate([0.2], [0.3])'
@@ -1,12 +1,15 @@
 import numpy as np
 
-from mrmustard.lab import Attenuator, Dgate, Gaussian, Ggate
+from mrmustard import math
+from mrmustard.lab import Attenuator, Dgate, Gaussian, Ggate, Thermal
 from mrmustard.physics.bargmann import (
+    cayley,
     wigner_to_bargmann_Choi,
     wigner_to_bargmann_psi,
     wigner_to_bargmann_rho,
     wigner_to_bargmann_U,
 )
+from mrmustard.physics.husimi import pq_to_aadag, wigner_to_husimi
 
 
 def test_wigner_to_bargmann_psi():
@@ -25,6 +28,30 @@ def test_wigner_to_bargmann_rho():
         assert np.allclose(x, y)
 
 
+def test_wigner_to_bargmann_rho_husimi():
+    """Test that the Bargmann representation of a dm agrees with the one obtained from
+    the Husimi covariance matrix and means vector"""
+    G = Gaussian(3) >> Dgate([0.1, 0.2, 0.3], [0.3, 0.2, 0.1]) >> Attenuator(0.8)
+    cov, means = math.asnumpy(G.cov), math.asnumpy(G.means)
+
+    Q, beta = wigner_to_husimi(cov, means)
+    b = np.linalg.solve(Q, beta)
+    A_ref = math.Xmat(3) @ cayley(pq_to_aadag(cov), c=0.5)
+    C_ref = np.exp(-0.5 * np.sum(np.conj(beta) * b)) / np.sqrt(np.linalg.det(Q))
+
+    A, B, C = wigner_to_bargmann_rho(cov, means)
+    assert np.allclose(A, A_ref)
+    assert np.allclose(B, np.conj(b))
+    assert np.allclose(C, C_ref)
+
+
+def test_wigner_to_bargmann_rho_large_determinant():
+    """Test that C is finite when the determinant of the Husimi covariance matrix overflows"""
+    state = Thermal([999.0] * 60)
+    _, _, C = wigner_to_bargmann_rho(state.cov, state.means)
+    assert np.isclose(C / 1000.0**-60, 1.0)
+
+
 def test_wigner_to_bargmann_U():
     """Test that the Bargmann representation of a unitary is correct"""
     G = Ggate(2) >> Dgate(0.1, 0.2)
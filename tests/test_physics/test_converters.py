@@ -18,7 +18,7 @@ import numpy as np
 import pytest
 
 from mrmustard.physics.representations import Bargmann, Fock
-from mrmustard.physics.converters import to_fock
+from mrmustard.physics.converters import to_fock, _hermite_renormalized_batched
 from mrmustard.physics.triples import (
     vacuum_state_Abc,
     coherent_state_Abc,
@@ -55,6 +55,18 @@ class TestToFock:
         assert vacuum_fock_with_int_shape.array.shape[-1] == 80
         assert vacuum_fock_with_int_shape.array.shape == (1, 80, 80)
 
+    def test_tofock_cache(self):
+        r"""Tests that converting the same triples with the same shape reuses the cached array."""
+        _hermite_renormalized_batched.cache_clear()
+        coherent_fock = to_fock(Bargmann(*coherent_state_Abc(x=0.1, y=0.2)), shape=10)
+        coherent_fock_again = to_fock(Bargmann(*coherent_state_Abc(x=0.1, y=0.2)), shape=10)
+        coherent_fock_other = to_fock(Bargmann(*coherent_state_Abc(x=0.1, y=0.3)), shape=10)
+
+        if math.backend_name == "numpy":
+            assert _hermite_renormalized_batched.cache_info().hits == 1
+        assert coherent_fock_again == coherent_fock
+        assert coherent_fock_other != coherent_fock
+
     def test_incompatible_shape(self):
         r"""Tests that the ValueError raises when the shape given are incompatible."""
         vacuum_bargmann = Bargmann(*vacuum_state_Abc(n_modes=2))
@@ -1,13 +1,28 @@
+from functools import lru_cache
+
 import numpy as np
 import pytest
 from thewalrus.quantum import real_to_complex_displacements
 from thewalrus.random import random_covariance
 
-from mrmustard import physics, settings
+from mrmustard import math, physics, settings
 from mrmustard.lab import Coherent, Fock, State
 from mrmustard.physics import fock as fp
 from mrmustard.physics import gaussian as gp
 
+# displacements of ``test_fidelity_vac_to_displaced_squeezed``, from a fixed seed
+_RNG = np.random.default_rng(0)
+_ALPHAS = _RNG.random(3) + 1j * _RNG.random(3)
+
+
+@lru_cache(maxsize=None)
+def _random_covariance(num_modes, hbar, pure, block_diag, seed):
+    """A random covariance matrix, drawn once per set of arguments and shared between the tests."""
+    np.random.seed(seed)
+    cov = random_covariance(num_modes, hbar=hbar, pure=pure, block_diag=block_diag)
+    cov.flags.writeable = False
+    return cov
+
 
 class TestGaussianStates:
     hbar0: float = settings.HBAR
@@ -22,9 +37,9 @@ class TestGaussianStates:
     def test_fidelity_is_symmetric(self, num_modes, hbar, pure, block_diag):
         """Test that the fidelity is symmetric"""
         settings._hbar = hbar
-        cov1 = random_covariance(num_modes, hbar=hbar, pure=pure, block_diag=block_diag)
+        cov1 = _random_covariance(num_modes, hbar, pure, block_diag, seed=1)
         means1 = np.sqrt(2 * hbar) * np.random.rand(2 * num_modes)
-        cov2 = random_covariance(num_modes, hbar=hbar, pure=pure, block_diag=block_diag)
+        cov2 = _random_covariance(num_modes, hbar, pure, block_diag, seed=2)
         means2 = np.sqrt(2 * hbar) * np.random.rand(2 * num_modes)
         f12 = gp.fidelity(means1, cov1, means2, cov2)
         f21 = gp.fidelity(means2, cov2, means1, cov1)
@@ -37,9 +52,9 @@ class TestGaussianStates:
     def test_fidelity_is_leq_one(self, num_modes, hbar, pure, block_diag):
         """Test that the fidelity is between 0 and 1"""
         settings._hbar = hbar
-        cov1 = random_covariance(num_modes, hbar=hbar, pure=pure, block_diag=block_diag)
+        cov1 = _random_covariance(num_modes, hbar, pure, block_diag, seed=1)
         means1 = np.sqrt(2 * hbar) * np.random.rand(2 * num_modes)
-        cov2 = random_covariance(num_modes, hbar=hbar, pure=pure, block_diag=block_diag)
+        cov2 = _random_covariance(num_modes, hbar, pure, block_diag, seed=2)
         means2 = np.sqrt(2 * hbar) * np.random.rand(2 * num_modes)
         f12 = gp.fidelity(means1, cov1, means2, cov2)
         assert 0 <= np.real_if_close(f12) < 1.0
@@ -51,23 +66,30 @@ class TestGaussianStates:
     def test_fidelity_with_self(self, num_modes, hbar, pure, block_diag):
         """Test that the fidelity of two identical quantum states is 1"""
         settings._hbar = hbar
-        cov = random_covariance(num_modes, hbar=hbar, pure=pure, block_diag=block_diag)
+        cov = _random_covariance(num_modes, hbar, pure, block_diag, seed=0)
         means = np.random.rand(2 * num_modes)
         assert np.allclose(gp.fidelity(means, cov, means, cov), 1, atol=1e-3)
 
+    @pytest.fixture(scope="class")
+    def betas(self):
+        """Pairs of random multimode displacements, drawn once per number of modes"""
+        return {
+            n: tuple(np.random.rand(n) + 1j * np.random.rand(n) for _ in range(2))
+            for n in range(5, 10)
+        }
+
     @pytest.mark.parametrize("num_modes", np.arange(5, 10))
     @pytest.mark.parametrize("hbar", [0.5, 1.0, 2.0, 1.6])
-    def test_fidelity_coherent_state(self, num_modes, hbar):
+    def test_fidelity_coherent_state(self, num_modes, hbar, betas):
         """Test the fidelity of two multimode coherent states"""
         settings._hbar = hbar
-        beta1 = np.random.rand(num_modes) + 1j * np.random.rand(num_modes)
-        beta2 = np.random.rand(num_modes) + 1j * np.random.rand(num_modes)
+        beta1, beta2 = betas[num_modes]
         means1 = real_to_complex_displacements(np.concatenate([beta1, beta1.conj()]), hbar=hbar)
         means2 = real_to_complex_displacements(np.concatenate([beta2, beta2.conj()]), hbar=hbar)
-        cov1 = hbar * np.identity(2 * num_modes) / 2
-        cov2 = hbar * np.identity(2 * num_modes) / 2
-        fid = gp.fidelity(means1, cov1, means2, cov2)
-        expected = np.exp(-(np.linalg.norm(beta1 - beta2) ** 2))
+        cov = hbar * np.identity(2 * num_modes) / 2
+        fid = gp.fidelity(means1, cov, means2, cov)
+        delta = beta1 - beta2
+        expected = np.exp(-np.vdot(delta, delta).real)
         assert np.allclose(expected, fid)
 
     @pytest.mark.parametrize("r1", [0.1, 0.2, 0.3])
@@ -76,8 +98,9 @@ class TestGaussianStates:
     def test_fidelity_squeezed_vacuum(self, r1, r2, hbar):
         """Tests fidelity between two squeezed states"""
         settings._hbar = hbar
-        cov1 = np.diag([np.exp(2 * r1), np.exp(-2 * r1)]) * hbar / 2
-        cov2 = np.diag([np.exp(2 * r2), np.exp(-2 * r2)]) * hbar / 2
+        e1, e2 = np.exp(2 * r1), np.exp(2 * r2)
+        cov1 = np.array([[e1, 0.0], [0.0, 1 / e1]]) * hbar / 2
+        cov2 = np.array([[e2, 0.0], [0.0, 1 / e2]]) * hbar / 2
         mu = np.zeros([2])
         assert np.allclose(1 / np.cosh(r1 - r2), gp.fidelity(mu, cov1, mu, cov2))
 
@@ -96,9 +119,10 @@ class TestGaussianStates:
 
     @pytest.mark.parametrize("hbar", [0.5, 1.0, 2.0, 1.6])
     @pytest.mark.parametrize("r", [-2.0, 0.0, 2.0])
-    @pytest.mark.parametrize("alpha", np.random.rand(10) + 1j * np.random.rand(10))
+    @pytest.mark.parametrize("alpha", _ALPHAS)
     def test_fidelity_vac_to_displaced_squeezed(self, r, alpha, hbar):
-        """Calculates the fidelity between a coherent squeezed state and vacuum"""
+        """Calculates the fidelity between a coherent squeezed state and vacuum,
+        for three displacements drawn from a fixed seed"""
         settings._hbar = hbar
         cov1 = np.diag([np.exp(2 * r), np.exp(-2 * r)]) * hbar / 2
         means1 = real_to_complex_displacements(np.array([alpha, np.conj(alpha)]), hbar=hbar)
@@ -138,35 +162,44 @@ class TestMixedStates:
         expected = 5 / 6
         assert np.allclose(expected, fp.fidelity(self.state1, self.state2, False, False))
 
+    def test_fidelity_formula_multimode(self):
+        """Test fidelity of known two-mode mixed states, using that it is multiplicative."""
+        state12 = np.einsum("ij,kl->ikjl", self.state1, self.state2)
+        state21 = np.einsum("ij,kl->ikjl", self.state2, self.state1)
+        expected = (5 / 6) ** 2
+        assert np.allclose(expected, fp.fidelity(state12, state21, False, False))
+
 
 class TestGaussianFock:
     """Tests for the fidelity between a pair of single-mode states in Gaussian and Fock representation"""
 
-    def test_fidelity_across_representations_ket_ket(self):
-        """Test that the fidelity of these two states is what it should be"""
+    @pytest.fixture(scope="class")
+    def states(self, pytestconfig):
+        """The two states as kets and as density matrices, built once for the class"""
+        # class fixtures are set up before the per-test ``set_backend`` fixture
+        math.change_backend(pytestconfig.getoption("--backend"))
         state1ket = Coherent(x=1.0)
+        state1dm = State(dm=state1ket.dm())
         state2ket = Fock(n=1)
+        state2dm = State(dm=state2ket.dm(state1dm.cutoffs))
+        return state1ket, state1dm, state2ket, state2dm
+
+    def test_fidelity_across_representations_ket_ket(self, states):
+        """Test that the fidelity of these two states is what it should be"""
+        state1ket, _, state2ket, _ = states
         assert np.allclose(physics.fidelity(state1ket, state2ket), 0.36787944, atol=1e-4)
 
-    def test_fidelity_across_representations_ket_dm(self):
+    def test_fidelity_across_representations_ket_dm(self, states):
         """Test that the fidelity of these two states is what it should be"""
-        state1ket = Coherent(x=1.0)
-        state1dm = State(dm=state1ket.dm())
-        state2ket = Fock(n=1)
-        state2dm = State(dm=state2ket.dm(state1dm.cutoffs))
+        state1ket, _, _, state2dm = states
         assert np.allclose(physics.fidelity(state1ket, state2dm), 0.36787944, atol=1e-4)
 
-    def test_fidelity_across_representations_dm_ket(self):
+    def test_fidelity_across_representations_dm_ket(self, states):
         """Test that the fidelity of these two states is what it should be"""
-        state1ket = Coherent(x=1.0)
-        state1dm = State(dm=state1ket.dm())
-        state2ket = Fock(n=1)
+        _, state1dm, state2ket, _ = states
         assert np.allclose(physics.fidelity(state1dm, state2ket), 0.36787944, atol=1e-4)
 
-    def test_fidelity_across_representations_dm_dm(self):
+    def test_fidelity_across_representations_dm_dm(self, states):
         """Test that the fidelity of these two states is what it should be"""
-        state1ket = Coherent(x=1.0)
-        state1dm = State(dm=state1ket.dm())
-        state2ket = Fock(n=1)
-        state2dm = State(dm=state2ket.dm(state1dm.cutoffs))
+        _, state1dm, _, state2dm = states
         assert np.allclose(physics.fidelity(state1dm, state2dm), 0.36787944, atol=1e-4)
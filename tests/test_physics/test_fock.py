@@ -20,10 +20,10 @@ import numpy as np
 import pytest
 from hypothesis import given
 from hypothesis import strategies as st
-from scipy.special import factorial
+from scipy.special import eval_hermite, factorial
 from thewalrus.quantum import total_photon_number_distribution
 
-from mrmustard import math
+from mrmustard import math, settings
 from mrmustard.lab import (
     TMSV,
     Attenuator,
@@ -263,6 +263,19 @@ def test_fock_trace_function():
     assert np.allclose(dm_traced, State(dm=dm).get_modes(0).dm(), atol=1e-5)
 
 
+@pytest.mark.parametrize("keep", [[1], [0, 2], [2, 0], [0, 1, 2]])
+def test_fock_trace_function_multimode(keep):
+    """tests that the Fock state is correctly traced when keeping non-adjacent modes"""
+    ket = np.random.random((3, 4, 5)) + 1j * np.random.random((3, 4, 5))
+    dm = np.einsum("abc,def->abcdef", ket, np.conj(ket))
+    expected = {
+        (1,): np.einsum("abcaec->be", dm),
+        (0, 2): np.einsum("abcdbf->acdf", dm),
+        (0, 1, 2): dm,
+    }[tuple(sorted(keep))]
+    assert np.allclose(fock.trace(math.astensor(dm), keep=keep), expected)
+
+
 def test_dm_choi():
     """tests that choi op is correctly applied to a dm"""
     circ = Ggate(1) >> Attenuator([0.1])
@@ -341,6 +354,15 @@ def test_apply_kraus_to_dm_2mode_2():
     assert dm_out.shape == (2, 6, 4, 5, 2, 6, 4, 5)
 
 
+def test_apply_kraus_to_dm_values():
+    """Test the values of a dm after applying a Kraus operator that adds a mode"""
+    dm = np.random.normal(size=(2, 3, 2, 3)) + 1j * np.random.normal(size=(2, 3, 2, 3))
+    kraus = np.random.normal(size=(4, 5, 3)) + 1j * np.random.normal(size=(4, 5, 3))
+    dm_out = fock.apply_kraus_to_dm(math.astensor(kraus), math.astensor(dm), [1], [2, 1])
+    expected = np.einsum("ehb,abcd,fgd->ahecgf", kraus, dm, np.conj(kraus))
+    assert np.allclose(dm_out, expected)
+
+
 def test_apply_choi_to_ket_1mode():
     """Test that choi operators are applied to a ket on the correct indices"""
     ket = np.random.normal(size=(3, 5))
@@ -389,6 +411,16 @@ def test_apply_choi_to_dm_2mode():
     assert dm_out.shape == (4, 2, 3, 4, 2, 3)
 
 
+def test_contract_states_dm_dm_values():
+    """Test the values of the contraction of two density matrices"""
+    dmA = np.random.normal(size=(2, 3, 2, 3)) + 1j * np.random.normal(size=(2, 3, 2, 3))
+    dmB = np.random.normal(size=(3, 3)) + 1j * np.random.normal(size=(3, 3))
+    dm_out = fock.contract_states(
+        math.astensor(dmA), math.astensor(dmB), True, True, [1], normalize=False
+    )
+    assert np.allclose(dm_out, np.einsum("bd,abcd->ac", dmB, dmA))
+
+
 def test_displacement_grad():
     """Tests the value of the analytic gradient for the Dgate against finite differences"""
     cutoff = 4
@@ -478,3 +510,84 @@ def test_number_variances_fock():
 def test_normalize_dm():
     dm = np.array([[0.2, 0], [0, 0.2]])
     assert np.allclose(fock.normalize(dm, True), np.array([[0.5, 0], [0, 0.5]]))
+
+
+def test_normalize_ket():
+    ket = np.array([[0.3, 0.1j], [-0.2, 0.4]])
+    assert np.isclose(np.linalg.norm(fock.normalize(ket, False)), 1)
+
+
+def test_oscillator_eigenstate():
+    """Tests the oscillator eigenstates against the closed form of the Hermite functions"""
+    q = np.linspace(-3, 3, 11)
+    cutoff = 8
+    psi = math.asnumpy(fock.oscillator_eigenstate(q, cutoff))
+
+    x = q / np.sqrt(settings.HBAR)
+    n = np.arange(cutoff)[:, None]
+    expected = (
+        (np.pi * settings.HBAR) ** (-0.25)
+        / np.sqrt(2.0**n * factorial(n))
+        * np.exp(-(x**2) / 2)
+        * eval_hermite(n, x)
+    )
+    assert psi.shape == (cutoff, len(q))
+    assert np.allclose(psi, expected)
+
+
+def test_purity():
+    """Tests the purity of (unnormalized) Fock density matrices"""
+    dm = np.diag([0.5, 0.5, 0.0]).astype(np.complex128)
+    assert np.isclose(fock.purity(dm), 0.5)
+    assert np.isclose(fock.purity(3 * dm), 0.5)
+
+    ket = np.array([0.6, 0.8j, 0.0])
+    assert np.isclose(fock.purity(2 * np.outer(ket, np.conj(ket))), 1.0)
+    assert np.isclose(fock.purity(np.einsum("ij,kl->ikjl", dm, dm)), 0.25)
+
+
+def test_number_means_and_variances_multimode():
+    """Tests the number means and variances of a multimode ket against the marginals"""
+    rng = np.random.default_rng(42)
+    ket = rng.normal(size=(3, 4, 5)) + 1j * rng.normal(size=(3, 4, 5))
+    probs = np.abs(ket) ** 2
+    marginals = [probs.sum(axis=(1, 2)), probs.sum(axis=(0, 2)), probs.sum(axis=(0, 1))]
+    means = [np.sum(m * np.arange(len(m))) for m in marginals]
+    variances = [
+        np.sum(m * np.arange(len(m)) ** 2) - np.sum(m * np.arange(len(m))) ** 2 for m in marginals
+    ]
+
+    assert np.allclose(fock.number_means(ket, is_dm=False), means)
+    assert np.allclose(fock.number_variances(ket, is_dm=False), variances)
+
+
+def test_sample_homodyne_shots():
+    """Tests that ``sample_homodyne`` draws a vector of outcomes from the pdf when given ``shots``"""
+    ket = Coherent(x=1.0, y=0.0).ket(cutoffs=[30])
+    x, pdf = fock.quadrature_distribution(ket)
+    probs = math.asnumpy(pdf) * (x[1] - x[0])
+
+    samples, probabilities = fock.sample_homodyne(ket, shots=20)
+    samples, probabilities = math.asnumpy(samples), math.asnumpy(probabilities)
+    assert samples.shape == probabilities.shape == (20,)
+    idx = [np.argmin(np.abs(math.asnumpy(x) - s)) for s in samples]
+    assert np.allclose(probabilities, probs[idx])
+
+
+@pytest.mark.parametrize("leftover", [None, 0, 1, 2])
+def test_wigner_to_fock_diagonal(leftover):
+    """Tests that ``wigner_to_fock_diagonal`` matches the diagonal of the density matrix, with the
+    leftover mode (if any) kept in full"""
+    state = Gaussian(3) >> Attenuator([0.9, 0.8, 0.7])
+    cutoffs = [4, 5, 6]
+    dm = math.asnumpy(state.dm(cutoffs))
+
+    probs = math.asnumpy(fock.wigner_to_fock_diagonal(state.cov, state.means, cutoffs, leftover))
+
+    if leftover is None:
+        expected = np.einsum("ijkijk->ijk", dm)
+    else:
+        others = "".join("ijk"[m] for m in range(3) if m != leftover)
+        right = "".join("l" if m == leftover else "ijk"[m] for m in range(3))
+        expected = np.einsum(f"ijk{right}->{'ijk'[leftover]}l{others}", dm)
+    assert np.allclose(probs, expected)
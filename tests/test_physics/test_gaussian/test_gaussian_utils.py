@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import numpy as np
+import pytest
 
 from mrmustard import *
 from mrmustard.physics import gaussian as gp
@@ -80,3 +81,55 @@ def test_CPTP_with_none_XYd():
     )
     assert np.allclose(cov, np.eye(2))
     assert np.allclose(means, np.zeros(2))
+
+
+@pytest.mark.parametrize("transf_modes", [[1], [2, 0], [0, 1, 2]])
+def test_CPTP_matches_dense_channel(transf_modes):
+    """Tests CPTP against the dense ``X cov X^T + Y`` and that the inputs are not modified."""
+    rng = np.random.default_rng(1)
+    N, M = 3, len(transf_modes)
+    c = rng.random((2 * N, 2 * N))
+    cov, means = c @ c.T, rng.random(2 * N)
+    X, Y, d = rng.random((2 * M, 2 * M)), rng.random((2 * M, 2 * M)), rng.random(2 * M)
+    cov_in, means_in = cov.copy(), means.copy()
+
+    idx = transf_modes + [m + N for m in transf_modes]
+    X_full, Y_full, d_full = np.eye(2 * N), np.zeros((2 * N, 2 * N)), np.zeros(2 * N)
+    X_full[np.ix_(idx, idx)] = X
+    Y_full[np.ix_(idx, idx)] = Y
+    d_full[idx] = d
+
+    new_cov, new_means = gp.CPTP(cov, means, X, Y, d, [0, 1, 2], transf_modes)
+    assert np.allclose(new_cov, X_full @ cov @ X_full.T + Y_full)
+    assert np.allclose(new_means, X_full @ means + d_full)
+    assert np.allclose(cov, cov_in) and np.allclose(means, means_in)
+
+
+def test_purity_many_thermal_modes():
+    """Tests that the purity doesn't underflow to zero when det(cov) overflows."""
+    nbar = 10.0
+    cov = gp.thermal_cov(gp.math.astensor(np.full(120, nbar)))
+    expected = np.exp(-120 * np.log(2 * nbar + 1))
+    assert np.isclose(gp.purity(cov), expected, rtol=1e-10, atol=0)
+
+
+def test_join_covs_and_means():
+    """Tests that joining covariances and means places each block on its own modes."""
+    rng = np.random.default_rng(0)
+    sizes = [1, 3, 2]
+    covs = [rng.random((2 * n, 2 * n)) for n in sizes]
+    means = [rng.random(2 * n) for n in sizes]
+    N = sum(sizes)
+
+    expected_cov = np.zeros((2 * N, 2 * N))
+    expected_means = np.zeros(2 * N)
+    start = 0
+    for c, m, n in zip(covs, means, sizes):
+        idx = np.concatenate([np.arange(start, start + n), N + np.arange(start, start + n)])
+        expected_cov[np.ix_(idx, idx)] = c
+        expected_means[idx] = m
+        start += n
+
+    cov = gp.join_covs([gp.math.astensor(c) for c in covs])
+    assert np.allclose(cov, expected_cov)
+    assert np.allclose(gp.join_means([gp.math.astensor(m) for m in means]), expected_means)
@@ -23,7 +23,7 @@ from thewalrus.symplectic import (
     two_mode_squeezing,
 )
 
-from mrmustard import math
+from mrmustard import math, settings
 from mrmustard.lab import (
     Amplifier,
     Attenuator,
@@ -39,7 +39,17 @@ from mrmustard.lab import (
     Sgate,
 )
 from mrmustard.lab.states import TMSV, Thermal, Vacuum
-from mrmustard.physics.gaussian import controlled_X, controlled_Z
+from mrmustard.physics.gaussian import (
+    beam_splitter_symplectic,
+    controlled_X,
+    controlled_Z,
+    displacement,
+    rotation_symplectic,
+    squeezed_vacuum_cov,
+    squeezing_symplectic,
+    two_mode_squeezed_vacuum_cov,
+    two_mode_squeezing_symplectic,
+)
 
 
 @given(r=st.floats(0, 2))
@@ -63,6 +73,50 @@ def test_Sgate(r, phi):
     assert np.allclose(cov, expected, atol=1e-6)
 
 
+@given(r=st.floats(0, 10), phi=st.floats(-3, 3))
+def test_squeezed_vacuum_cov(r, phi):
+    """Tests the covariance matrix of a squeezed vacuum state, also for large squeezing"""
+    cov = squeezed_vacuum_cov(r, phi)
+    expected = squeezing(r, phi) @ squeezing(r, phi).T * settings.HBAR / 2
+    assert np.allclose(cov, expected, rtol=1e-10, atol=1e-12)
+
+
+@given(r=st.floats(0, 5), phi=st.floats(-3, 3))
+def test_two_mode_squeezed_vacuum_cov(r, phi):
+    """Tests the covariance matrix of a two-mode squeezed vacuum state"""
+    cov = two_mode_squeezed_vacuum_cov(r, phi)
+    S = math.asnumpy(two_mode_squeezing_symplectic(r, phi))
+    assert np.allclose(cov, S @ S.T * settings.HBAR / 2)
+
+
+@given(r=st.floats(0, 2), phi0=st.floats(-3, 3), phi1=st.floats(-3, 3))
+def test_squeezing_symplectic_broadcasts_single_parameter(r, phi0, phi1):
+    """Tests that a single squeezing magnitude is broadcast against a vector of angles"""
+    S = squeezing_symplectic(r, math.astensor([phi0, phi1]))
+    expected = squeezing_symplectic(math.astensor([r, r]), math.astensor([phi0, phi1]))
+    assert np.allclose(S, expected)
+    assert np.allclose(S[[0, 2]][:, [0, 2]], squeezing(r, phi0))
+
+
+def test_symplectics_with_batch_dimension():
+    """Tests that a leading batch dimension of the parameters is kept in front of the matrix"""
+    rng = np.random.default_rng(0)
+    a, b = rng.uniform(-1, 1, (2, 3, 2))
+    t, p = rng.uniform(-1, 1, (2, 3))
+    batched = [
+        (rotation_symplectic, (a,)),
+        (squeezing_symplectic, (a, b)),
+        (displacement, (a, b)),
+        (beam_splitter_symplectic, (t, p)),
+        (two_mode_squeezing_symplectic, (t, p)),
+    ]
+    for f, args in batched:
+        result = f(*[math.astensor(x) for x in args])
+        expected = [f(*[math.astensor(x[i]) for x in args]) for i in range(3)]
+        assert result.shape[0] == 3
+        assert np.allclose(result, np.array(expected))
+
+
 @given(s=st.floats(0, 1))
 def test_Pgate(s):
     """Tests the Pgate is implemented correctly by applying it on one half of a maximally entangled state"""
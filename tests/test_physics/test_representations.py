@@ -231,6 +231,7 @@ class TestFockRepresentation:
         fock1 = Fock(self.array5578)
         fock2 = Fock.from_ansatz(fock1.ansatz)
         assert fock1 == fock2
+        assert fock2.ansatz is fock1.ansatz
 
     def test_sum_batch(self):
         fock = Fock(self.array2578, batched=True)
@@ -283,6 +284,12 @@ class TestFockRepresentation:
         fock_conj = fock.conj()
         assert np.allclose(fock_conj.array, np.conj(self.array1578))
 
+    def test_conj_keeps_contract_idxs(self):
+        fock = Fock(self.array1578, batched=True)
+        fock_conj = fock[1].conj()
+        assert np.allclose(fock_conj.array, np.conj(self.array1578))
+        assert fock_conj._contract_idxs == (1,)
+
     def test_matmul_fock_fock(self):
         array2 = math.astensor(np.random.random((5, 6, 7, 8, 10)))
         fock1 = Fock(self.array2578, batched=True)
@@ -100,6 +100,22 @@ class TestTriples:
         assert math.allclose(b3, b3_correct)
         assert math.allclose(c3, c3_correct)
 
+    @pytest.mark.parametrize("r, phi", [(0.3, 0.4), (0.3, [0.4, 0.5]), ([0.1, 0.2, 0.3], 0)])
+    def test_two_mode_squeezed_vacuum_state_Abc(self, r, phi):
+        A, b, c = triples.two_mode_squeezed_vacuum_state_Abc(r, phi)
+
+        # mode i is squeezed together with mode i + n_modes, <k,k|psi> = c (-e^{i phi} tanh r)^k
+        r, phi = np.broadcast_arrays(np.atleast_1d(r), np.atleast_1d(phi))
+        n_modes = len(r)
+        A_correct = np.zeros((2 * n_modes, 2 * n_modes), dtype=np.complex128)
+        for i in range(n_modes):
+            A_correct[i, n_modes + i] = -np.exp(1j * phi[i]) * np.tanh(r[i])
+            A_correct[n_modes + i, i] = A_correct[i, n_modes + i]
+
+        assert math.allclose(A, A_correct)
+        assert math.allclose(b, np.zeros(2 * n_modes))
+        assert math.allclose(c, np.prod(1 / np.cosh(r)))
+
     def test_thermal_state_Abc(self):
         A1, b1, c1 = triples.thermal_state_Abc(0.1)
         assert math.allclose(A1, [[0, 0.09090909], [0.09090909, 0]])